@@ -22,13 +22,9 @@ export default function EnterExamCode() {
     setJoinExamError("");
 
     try {
+      // GET so the browser can revalidate the cached paper (ETag / 304)
       const response = await fetch(
-        `${API_BASE_URL}/api/examinee/enter-exam-code`,
-        {
-          method: "POST",
-          headers: { "Content-Type": "application/json" },
-          body: JSON.stringify({ exam_code: examineeAttemptExamCode }),
-        }
+        `${API_BASE_URL}/api/examinee/enter-exam-code/${encodeURIComponent(examineeAttemptExamCode)}`
       );
 
       const data = await response.json();
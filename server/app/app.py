@@ -1,7 +1,21 @@
-from flask import Flask
+import hmac
+from flask import Flask, request, abort
 from flask_migrate import Migrate
 from .config import Config
 from .models import db
+from .utils.exam_cache_utils import exam_paper_cache
+from .utils.leaderboard_index_utils import leaderboard_registry
+from .utils.grading_utils import answer_key_cache
+from .utils.auth_cache_utils import token_cache
+from .utils.jwt_utils import jwt_manager
+from .utils.password_utils import password_hasher
+from .utils.upload_utils import upload_pipeline
+from .utils.media_gc_utils import media_gc
+from .utils.exam_code_utils import exam_code_allocator
+from .utils.db_pool_utils import db_pool
+from .utils.instrumentation_utils import request_metrics
+from .utils.json_utils import OrjsonProvider
+from .utils.compression_utils import response_compression
 from flask_cors import CORS
 import os
 
@@ -10,13 +24,38 @@ migrate = Migrate()
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
+    app.json = OrjsonProvider(app)
 
     CORS(app, resources={r"/*": {"origins": "*"}})
 
-    # Initialize database and migrations
+    # Initialize database and migrations (pool options must be set before the engine exists)
+    db_pool.init_app(app)
     db.init_app(app)
     migrate.init_app(app, db)
 
+    # Auth signer/verifier (keys bound once per app)
+    jwt_manager.init_app(app)
+    password_hasher.init_app(app)
+
+    # Per-worker caches
+    exam_paper_cache.init_app(app)
+    leaderboard_registry.init_app(app)
+    answer_key_cache.init_app(app)
+    token_cache.init_app(app)
+
+    # Media uploads (parallel, with retry and cleanup)
+    upload_pipeline.init_app(app)
+    media_gc.init_app(app)
+
+    # Collision-free exam codes
+    exam_code_allocator.init_app(app)
+
+    # Per-request SQL / serialization metrics and slow-request profiles
+    request_metrics.init_app(app)
+
+    # gzip / br / zstd response compression (after metrics so it is timed)
+    response_compression.init_app(app)
+
 
 
     # Register all routes from subfolders
@@ -31,7 +70,28 @@ def create_app(config_class=Config):
     # Health check endpoint
     @app.route('/health')
     def health_check():
-        return {'status': 'healthy', 'message': 'Server is running'}
+        return {
+            'status': 'healthy',
+            'message': 'Server is running',
+            'exam_paper_cache': exam_paper_cache.stats(),
+            'answer_key_cache': answer_key_cache.stats(),
+            'token_cache': token_cache.stats(),
+            'media_gc': media_gc.stats(),
+            'db_pool': db_pool.stats(),
+            'compression': response_compression.stats()
+        }
+
+    # Prometheus scrape endpoint (internal)
+    @app.route('/metrics')
+    def metrics():
+        token = app.config.get('METRICS_TOKEN')
+        # Fails closed: without a token it is only served in debug
+        if not request_metrics.enabled or not (token or app.debug):
+            abort(404)
+        if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            abort(401)
+        return app.response_class(request_metrics.render_prometheus(),
+                                  mimetype='text/plain; version=0.0.4')
 
     # Shell context for flask shell
     @app.shell_context_processor
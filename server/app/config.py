@@ -3,6 +3,9 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Public default for local runs only; keys derived from it must not reach production
+FALLBACK_SECRET_KEY = "fallback-secret-key"
+
 class Config:
    # Render provides DATABASE_URL in production
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
@@ -11,7 +14,107 @@ class Config:
     if SQLALCHEMY_DATABASE_URI and SQLALCHEMY_DATABASE_URI.startswith("postgres://"):
         SQLALCHEMY_DATABASE_URI = SQLALCHEMY_DATABASE_URI.replace("postgres://", "postgresql://", 1)  
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SECRET_KEY = os.getenv("SECRET_KEY", "fallback-secret-key")
-    DEBUG = os.getenv("FLASK_DEBUG", False)
+    SECRET_KEY = os.getenv("SECRET_KEY", FALLBACK_SECRET_KEY)
+
+    # Connection pool, per gunicorn worker: keep workers * (size + overflow) under
+    # max_connections. DB_PGBOUNCER=1 for a transaction-pooling PgBouncer in front.
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 30000))
+    DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() in ("1", "true", "yes")
+    # Checkouts waiting at least this long are counted and logged as starvation
+    DB_POOL_SLOW_CHECKOUT_MS = int(os.getenv("DB_POOL_SLOW_CHECKOUT_MS", 100))
+    # FLASK_DEBUG=0 (as on Render) must mean off, not the truthy string "0"
+    DEBUG = os.getenv("FLASK_DEBUG", "false").lower() in ("1", "true", "yes")
+
+    # JWT key rotation: "kid1:secret1,kid2:secret2"; unset = sign with SECRET_KEY
+    JWT_SIGNING_KEYS = os.getenv("JWT_SIGNING_KEYS")
+    JWT_ACTIVE_KID = os.getenv("JWT_ACTIVE_KID")
+    # Accept kid-less tokens signed with SECRET_KEY while migrating to JWT_SIGNING_KEYS;
+    # set to false once they have expired (tokens live 30 days)
+    JWT_ACCEPT_LEGACY_TOKENS = os.getenv("JWT_ACCEPT_LEGACY_TOKENS", "true").lower() in ("1", "true", "yes")
+
+    # Per-worker cache of serialized exam papers (enter-exam-code)
+    EXAM_PAPER_CACHE_MAX_ENTRIES = int(os.getenv("EXAM_PAPER_CACHE_MAX_ENTRIES", 256))
+    EXAM_PAPER_CACHE_MAX_BYTES = int(os.getenv("EXAM_PAPER_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    EXAM_PAPER_CACHE_TTL = int(os.getenv("EXAM_PAPER_CACHE_TTL", 300))
+    ANSWER_KEY_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_KEY_CACHE_MAX_ENTRIES", 1024))
+
+    # Verified-token cache for token_required (seconds / entries). The TTL bounds how long
+    # other workers honour a deleted user or a pre-password-change token; capped at 60
+    TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL", 30))
+    TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", 10000))
+
+    # Materialized in-memory leaderboards (0 disables, SQL ranking is used)
+    LEADERBOARD_INDEX_MAX_EXAMS = int(os.getenv("LEADERBOARD_INDEX_MAX_EXAMS", 512))
     
- 
\ No newline at end of file
+ 
+
+    # Password hashing: werkzeug method string, e.g. "scrypt:32768:8:1" or
+    # "pbkdf2:sha256:600000". Hashes made with other parameters are upgraded on login.
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt")
+    # Hashing pool per worker; requests beyond workers + queue get 429 (0 workers = inline)
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+    PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", 16))
+    PASSWORD_HASH_TIMEOUT = int(os.getenv("PASSWORD_HASH_TIMEOUT", 10))
+    PASSWORD_HASH_RETRY_AFTER = int(os.getenv("PASSWORD_HASH_RETRY_AFTER", 1))
+
+    # Media storage backend: "cloudinary" (production), "local" (disk under MEDIA_ROOT,
+    # served from MEDIA_URL_PATH) or "fake" (in-memory, local runs)
+    MEDIA_STORAGE = os.getenv("MEDIA_STORAGE", "cloudinary")
+    MEDIA_ROOT = os.getenv("MEDIA_ROOT", "media")
+    MEDIA_URL_PATH = os.getenv("MEDIA_URL_PATH", "/media")
+    # Seconds a worker trusts a dedup hit without asking the backend again
+    # (must stay below MEDIA_GC_TOMBSTONE_SECONDS)
+    MEDIA_KNOWN_TTL = int(os.getenv("MEDIA_KNOWN_TTL", 300))
+    # Parallel image uploads per worker; timeout is per attempt (seconds)
+    UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", 8))
+    UPLOAD_TIMEOUT = int(os.getenv("UPLOAD_TIMEOUT", 30))
+    UPLOAD_RETRIES = int(os.getenv("UPLOAD_RETRIES", 2))
+    UPLOAD_RETRY_BACKOFF = float(os.getenv("UPLOAD_RETRY_BACKOFF", 0.5))
+
+    # Deferred image deletion: `flask media gc` / `flask media sweep` from cron, or a
+    # background thread per worker every MEDIA_GC_INTERVAL seconds (0 = cron only)
+    MEDIA_GC_INTERVAL = int(os.getenv("MEDIA_GC_INTERVAL", 0))
+    MEDIA_GC_BATCH_SIZE = int(os.getenv("MEDIA_GC_BATCH_SIZE", 50))
+    MEDIA_GC_RATE_PER_SEC = float(os.getenv("MEDIA_GC_RATE_PER_SEC", 5))
+    MEDIA_GC_GRACE_SECONDS = int(os.getenv("MEDIA_GC_GRACE_SECONDS", 3600))
+    MEDIA_GC_MAX_ATTEMPTS = int(os.getenv("MEDIA_GC_MAX_ATTEMPTS", 10))
+    # Deleted entries are kept this long so uploads that reused the asset can restore it
+    MEDIA_GC_TOMBSTONE_SECONDS = int(os.getenv("MEDIA_GC_TOMBSTONE_SECONDS", 86400))
+
+    # Per-request SQL/serialization metrics at /metrics (Prometheus text; per worker).
+    # METRICS_TOKEN is required as "Authorization: Bearer <token>"; without it
+    # /metrics is only served in debug (404 otherwise).
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+    # X-SQL-* / Server-Timing headers on every response (default: on in debug, off in production)
+    METRICS_RESPONSE_HEADERS = os.getenv(
+        "METRICS_RESPONSE_HEADERS", "true" if DEBUG else "false"
+    ).lower() in ("1", "true", "yes")
+    # Sampled cProfile dumps of requests slower than PROFILE_SLOW_REQUEST_MS (0 = off)
+    PROFILE_SLOW_REQUEST_MS = int(os.getenv("PROFILE_SLOW_REQUEST_MS", 0))
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0.1))
+    PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+    PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", 200))
+
+    # Exam codes: keyed permutation of a DB-backed sequence. The key is required
+    # outside debug (debug falls back to SECRET_KEY) and must never change once
+    # codes exist; blocks are per worker.
+    EXAM_CODE_KEY = os.getenv("EXAM_CODE_KEY")
+    EXAM_CODE_BLOCK_SIZE = int(os.getenv("EXAM_CODE_BLOCK_SIZE", 64))
+
+    # Response compression, negotiated by Accept-Encoding in this preference order
+    # (br / zstd only when the Brotli / zstandard packages are installed)
+    COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+    COMPRESSION_ALGORITHMS = os.getenv("COMPRESSION_ALGORITHMS", "zstd,br,gzip")
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+    COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", 6))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", 5))
+    COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", 3))
+
+    # Rows fetched per round trip by the streaming results export
+    EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
@@ -4,13 +4,19 @@ from .base_model import db
 # Import all models from subfolders
 from .authModels import User
 from .examinerModels.createExamModels import ExaminerCreatedExam, ExaminerCreatedExamQuestion
+from .examinerModels.examCodeCounterModel import ExamCodeCounter
 from .examineeModels.examineeAttemptExamsModel import ExamineeAttemptExams, ExamineeAttemptExamQuestions
+from .examineeModels.examLeaderboardModel import ExamLeaderboardSummary
+from .mediaModels import MediaDeletionQueue
 
 __all__ = [
     'db',
     'User',
     'ExaminerCreatedExam',
     'ExaminerCreatedExamQuestion',
+    'ExamCodeCounter',
     'ExamineeAttemptExams',
-    'ExamineeAttemptExamQuestions'
+    'ExamineeAttemptExamQuestions',
+    'ExamLeaderboardSummary',
+    'MediaDeletionQueue'
 ]
\ No newline at end of file
@@ -1,5 +1,5 @@
 from ..base_model import db, BaseModel
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.utils.password_utils import password_hasher
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from datetime import datetime
@@ -17,10 +17,13 @@ class User(BaseModel):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # auto update
 
     def set_password(self, password: str):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password: str) -> bool:
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+
+    def password_needs_rehash(self) -> bool:
+        return password_hasher.needs_rehash(self.password_hash)
 
     def to_dict(self) -> dict:
         return {'id': self.id, 'name': self.name, 'email': self.email}
@@ -2,6 +2,7 @@
 
 # Import all models from this subfolder
 from .examineeAttemptExamsModel import ExamineeAttemptExams, ExamineeAttemptExamQuestions
+from .examLeaderboardModel import ExamLeaderboardSummary
 
 # Optional: define __all__ for clarity
-__all__ = ['ExamineeAttemptExams','ExamineeAttemptExamQuestions']
\ No newline at end of file
+__all__ = ['ExamineeAttemptExams','ExamineeAttemptExamQuestions', 'ExamLeaderboardSummary']
\ No newline at end of file
@@ -0,0 +1,21 @@
+from datetime import datetime
+from ..base_model import db, BaseModel
+from sqlalchemy.dialects.postgresql import UUID
+
+# -----------------------------
+# Per-Exam Leaderboard Summary
+# -----------------------------
+class ExamLeaderboardSummary(BaseModel):
+    __tablename__ = "exam_leaderboard_summaries"
+
+    exam_id = db.Column(
+        UUID(as_uuid=True), db.ForeignKey("examiner_created_exams.exam_id", ondelete="CASCADE"),
+        primary_key=True, nullable=False
+    )
+
+    # 🔹 Bumped in the same transaction as every submit-exam insert
+    attempt_count = db.Column(db.Integer, nullable=False, default=0)
+    top_score = db.Column(db.Float, nullable=True)
+    last_attempt_at = db.Column(db.DateTime, nullable=True)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
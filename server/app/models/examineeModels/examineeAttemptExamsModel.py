@@ -8,6 +8,15 @@ import uuid
 # -----------------------------
 class ExamineeAttemptExams(BaseModel):
     __tablename__ = "examinee_attempt_exams"
+    __table_args__ = (
+        # Leaderboards: rows of one exam already in LEADERBOARD_ORDER
+        db.Index(
+            "ix_examinee_attempt_exams_leaderboard",
+            "exam_id", db.text("score DESC"), "time_taken_seconds", "created_at", "attempt_exam_id"
+        ),
+        # Attempt history, newest first
+        db.Index("ix_examinee_attempt_exams_examinee_created", "examinee_id", db.text("created_at DESC")),
+    )
 
     attempt_exam_id = db.Column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4,
@@ -57,6 +66,12 @@ class ExamineeAttemptExams(BaseModel):
 # -----------------------------
 class ExamineeAttemptExamQuestions(BaseModel):
     __tablename__ = "examinee_attempt_exam_questions"
+    __table_args__ = (
+        # Attempt review, in question order
+        db.Index("ix_examinee_attempt_exam_questions_attempt_created", "attempt_exam_id", "created_at"),
+        # ON DELETE SET NULL lookups when an examiner deletes/replaces questions
+        db.Index("ix_examinee_attempt_exam_questions_original_question", "original_question_id"),
+    )
 
     attempt_question_id = db.Column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4,
@@ -100,4 +115,16 @@ class ExamineeAttemptExamQuestions(BaseModel):
     selected_option_label = db.Column(db.String(5), nullable=True)  # null = unanswered
     is_correct = db.Column(db.Boolean, nullable=False, default=False)
 
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# Partial indexes on image ids (most questions have none) for media GC reference checks
+ATTEMPT_QUESTION_IMAGE_ID_COLUMNS = (
+    'question_image_id', 'option_a_image_id', 'option_b_image_id', 'option_c_image_id', 'option_d_image_id'
+)
+for _column_name in ATTEMPT_QUESTION_IMAGE_ID_COLUMNS:
+    _column = getattr(ExamineeAttemptExamQuestions, _column_name)
+    db.Index(
+        f"ix_examinee_attempt_exam_questions_{_column_name}", _column,
+        postgresql_where=_column.isnot(None), sqlite_where=_column.isnot(None)
+    )
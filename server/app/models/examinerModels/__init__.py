@@ -2,6 +2,7 @@
 
 # Import all models from this subfolder
 from .createExamModels import ExaminerCreatedExam, ExaminerCreatedExamQuestion
+from .examCodeCounterModel import ExamCodeCounter
 
 # Optional: define __all__ for clarity
-__all__ = ['ExaminerCreatedExam', 'ExaminerCreatedExamQuestion']
\ No newline at end of file
+__all__ = ['ExaminerCreatedExam', 'ExaminerCreatedExamQuestion', 'ExamCodeCounter']
\ No newline at end of file
@@ -8,6 +8,10 @@ import uuid
 # -----------------------------
 class ExaminerCreatedExam(BaseModel):
     __tablename__ = "examiner_created_exams"  # updated table name
+    __table_args__ = (
+        # My created exams, newest first
+        db.Index("ix_examiner_created_exams_user_created", "user_id", db.text("created_at DESC")),
+    )
     exam_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, unique=True, nullable=False)
     exam_name = db.Column(db.String(255), nullable=False)
     exam_code = db.Column(db.String(20), unique=True, nullable=False)
@@ -31,7 +35,9 @@ class ExaminerCreatedExam(BaseModel):
     questions = db.relationship(
         "ExaminerCreatedExamQuestion",
         backref="exam",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        # Same order as the answer key (load_answer_key): packed answers rely on it
+        order_by="[ExaminerCreatedExamQuestion.question_order, ExaminerCreatedExamQuestion.created_at]"
     )
 
 
@@ -40,6 +46,9 @@ class ExaminerCreatedExam(BaseModel):
 # -----------------------------
 class ExaminerCreatedExamQuestion(BaseModel):
     __tablename__ = "examiner_created_exam_questions"  # updated table name
+    __table_args__ = (
+        db.Index("ix_examiner_created_exam_questions_exam_order", "exam_id", "question_order", "created_at"),
+    )
     question_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, unique=True, nullable=False)
     exam_id = db.Column(
         UUID(as_uuid=True),
@@ -68,4 +77,16 @@ class ExaminerCreatedExamQuestion(BaseModel):
     question_order = db.Column(db.Integer, nullable=False)
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+# Partial indexes on image ids (most questions have none) for media GC reference checks
+QUESTION_IMAGE_ID_COLUMNS = (
+    'question_image_id', 'optA_image_id', 'optB_image_id', 'optC_image_id', 'optD_image_id'
+)
+for _column_name in QUESTION_IMAGE_ID_COLUMNS:
+    _column = getattr(ExaminerCreatedExamQuestion, _column_name)
+    db.Index(
+        f"ix_examiner_created_exam_questions_{_column_name.lower()}", _column,
+        postgresql_where=_column.isnot(None), sqlite_where=_column.isnot(None)
+    )
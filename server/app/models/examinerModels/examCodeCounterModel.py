@@ -0,0 +1,11 @@
+from ..base_model import db, BaseModel
+
+# -----------------------------
+# Exam Code Counters
+# -----------------------------
+class ExamCodeCounter(BaseModel):
+    __tablename__ = "exam_code_counters"
+
+    # One row per code sequence; workers reserve blocks by bumping next_value
+    name = db.Column(db.String(50), primary_key=True)
+    next_value = db.Column(db.BigInteger, nullable=False, default=0)
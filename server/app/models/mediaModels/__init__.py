@@ -0,0 +1,7 @@
+# mediaModels/__init__.py
+
+# Import all models from this subfolder
+from .mediaDeletionQueueModel import MediaDeletionQueue
+
+# Optional: define __all__ for clarity
+__all__ = ['MediaDeletionQueue']
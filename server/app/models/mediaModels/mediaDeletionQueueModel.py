@@ -0,0 +1,20 @@
+from datetime import datetime
+from ..base_model import db, BaseModel
+
+# -----------------------------
+# Deferred Image Deletion Queue
+# -----------------------------
+class MediaDeletionQueue(BaseModel):
+    __tablename__ = "media_deletion_queue"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    public_id = db.Column(db.String(255), nullable=False, index=True)
+    reason = db.Column(db.String(50), nullable=False)  # "exam_deleted", "question_updated", "orphan_sweep"
+
+    # 🔹 Processing state (rows are dropped when the asset is still in use; once it is
+    # deleted the row stays as a tombstone until MEDIA_GC_TOMBSTONE_SECONDS have passed)
+    enqueued_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    not_before = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    last_error = db.Column(db.Text, nullable=True)
+    deleted_at = db.Column(db.DateTime, nullable=True)
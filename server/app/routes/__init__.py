@@ -6,9 +6,11 @@ def init_app(app):
     from .authRoutes import init_app as auth_routes
     from .examinerRoutes import init_app as examiner_routes
     from .examineeRoutes import init_app as examinee_routes
+    from .mediaRoutes import init_app as media_routes
     auth_routes(app)
     examiner_routes(app)
     examinee_routes(app)
+    media_routes(app)
 
     # Example for future subfolders
     # from .examineeRoutes import init_app as examinee_routes
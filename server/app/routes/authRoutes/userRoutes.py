@@ -1,11 +1,21 @@
 from flask import Blueprint, request, jsonify
 from app.models import User, db
 from app.utils.jwt_utils import generate_jwt, decode_jwt
+from app.utils.auth_cache_utils import token_cache, principal_from_user
+from app.utils.password_utils import PasswordHasherBusy
 from functools import wraps
+import uuid
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
 
+@auth_bp.errorhandler(PasswordHasherBusy)
+def password_hasher_busy(e):
+    response = jsonify({'error': 'Server is busy, please try again shortly'})
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, 429
+
+
 
 
 
@@ -26,17 +36,26 @@ def token_required(f):
         if not token:
             return jsonify({'message': 'Token is missing!'}), 401
         
-        # Decode token
-        payload = decode_jwt(token)
-        if not payload:
-            return jsonify({'message': 'Token is invalid or expired!'}), 401
-        
-        # Get user from database
-        user = User.query.get(payload['user_id'])
-        if not user:
-            return jsonify({'message': 'User not found!'}), 401
-        
-        return f(user, *args, **kwargs)
+        # Recently verified tokens skip the decode and the users lookup
+        principal = token_cache.get(token)
+        if principal is None:
+            # Decode token
+            payload = decode_jwt(token)
+            if not payload:
+                return jsonify({'message': 'Token is invalid or expired!'}), 401
+
+            # Get user from database (UUID, not the raw claim string: SQLite rejects strings)
+            try:
+                user = db.session.get(User, uuid.UUID(str(payload['user_id'])))
+            except (KeyError, ValueError):
+                user = None
+            if not user:
+                return jsonify({'message': 'User not found!'}), 401
+
+            principal = principal_from_user(user)
+            token_cache.set(token, principal, payload.get('exp'))
+
+        return f(principal, *args, **kwargs)
     
     return decorated
 
@@ -102,6 +121,14 @@ def login():
     if not user.check_password(password):
         return jsonify({'error': 'Invalid password'}), 401
 
+    # Upgrade hashes made with old cost parameters while we have the plaintext
+    if user.password_needs_rehash():
+        try:
+            user.set_password(password)
+            db.session.commit()
+        except PasswordHasherBusy:
+            pass
+
     # Convert UUID to string for JWT
     token = generate_jwt(str(user.id))
 
@@ -1,6 +1,13 @@
 from flask import Blueprint, request, jsonify
-from app.models import db, ExamineeAttemptExams, ExamineeAttemptExamQuestions
+from app.models import db, ExamineeAttemptExams
 from app.routes.authRoutes.userRoutes import token_required
+from app.utils.leaderboard_index_utils import bump_leaderboard_summary, leaderboard_registry
+from app.utils.submission_utils import (
+    build_attempt_question_rows, build_attempt_question_rows_from_paper,
+    insert_attempt_question_rows, parse_compact_answers
+)
+from app.utils.exam_cache_utils import load_exam_paper
+from app.utils.grading_utils import answer_key_cache
 import uuid
 
 examinee_attempt_exams_bp = Blueprint(
@@ -33,11 +40,20 @@ def examineeAttempExams(user):
 
     if not exam_id:
         return jsonify({'error': 'Exam ID is required'}), 400
+    try:
+        uuid.UUID(str(exam_id))
+    except ValueError:
+        return jsonify({'error': 'Invalid exam ID format'}), 400
+
+    # Grade against the server's answer key, never the client's correct_answer
+    answer_key = answer_key_cache.get(exam_id)
+    if answer_key is None:
+        return jsonify({'status': 'error', 'message': 'Exam not found'}), 404
+    if len(answer_key) == 0:
+        # Nothing to grade against; client-supplied answers are never trusted
+        return jsonify({'status': 'error', 'message': 'Exam has no questions'}), 400
 
-    total_questions = len(questions_payload)
-    correct_count = 0
-    wrong_count = 0
-    unanswered_count = 0
+    total_questions = len(answer_key)
 
     # Convert time_taken to integer to ensure it's stored correctly
     try:
@@ -70,112 +86,26 @@ def examineeAttempExams(user):
     db.session.add(attempt_exam)
     db.session.flush()  # get attempt_exam_id
 
-    # Save each question attempt
-    attempted_questions = []
-    for q in questions_payload:
-        selected_label = None
-        # Determine user selected option
-        for opt in q.get('options', []):
-            if opt.get('selected_by_user'):
-                selected_label = opt.get('option_letter')
-                break
-
-        is_correct = selected_label == q.get('correct_answer') if selected_label else False
-
-        if selected_label is None:
-            unanswered_count += 1
-        elif is_correct:
-            correct_count += 1
-        else:
-            wrong_count += 1
-
-        # Prepare question data for response - ensure all fields are included
-        question_data = {
-            'question_id': q.get('question_id'),
-            'question_text': q.get('question_text'),
-            'question_image_url': q.get('question_image_url'),
-            'question_image_id': q.get('question_image_id'),
-            'marks': q.get('marks', 1),  # Include marks
-            'correct_answer': q.get('correct_answer'),
-            'selected_answer': selected_label,
-            'is_correct': is_correct,
-            'options': []
-        }
-
-        # Add options data - ensure all options are included even if empty
-        options_data = []
-        for opt in q.get('options', []):
-            option_data = {
-                'option_letter': opt.get('option_letter'),
-                'option_text': opt.get('option_text'),
-                'option_image_url': opt.get('option_image_url'),
-                'option_image_id': opt.get('option_image_id'),
-                'is_correct': opt.get('option_letter') == q.get('correct_answer'),
-                'selected_by_user': opt.get('selected_by_user', False)
-            }
-            options_data.append(option_data)
-        
-        # Ensure we always have 4 options (A, B, C, D) even if some are missing
-        for letter in ['A', 'B', 'C', 'D']:
-            existing_option = next((opt for opt in options_data if opt['option_letter'] == letter), None)
-            if not existing_option:
-                options_data.append({
-                    'option_letter': letter,
-                    'option_text': '',
-                    'option_image_url': None,
-                    'option_image_id': None,
-                    'is_correct': False,
-                    'selected_by_user': False
-                })
-        
-        # Sort options by letter (A, B, C, D)
-        options_data.sort(key=lambda x: x['option_letter'])
-        question_data['options'] = options_data
-        
-        attempted_questions.append(question_data)
-
-        # Save to database
-        attempt_question = ExamineeAttemptExamQuestions(
-            attempt_exam_id=attempt_exam.attempt_exam_id,
-            original_question_id=uuid.UUID(q.get('question_id')),
-            question_text=q.get('question_text'),
-            question_image_url=q.get('question_image_url'),
-            question_image_id=q.get('question_image_id'),
-
-            option_a_text=next((opt.get('option_text') for opt in q.get('options', []) if opt.get('option_letter') == 'A'), ''),
-            option_a_image_url=next((opt.get('option_image_url') for opt in q.get('options', []) if opt.get('option_letter') == 'A'), None),
-            option_a_image_id=next((opt.get('option_image_id') for opt in q.get('options', []) if opt.get('option_letter') == 'A'), None),
-
-            option_b_text=next((opt.get('option_text') for opt in q.get('options', []) if opt.get('option_letter') == 'B'), ''),
-            option_b_image_url=next((opt.get('option_image_url') for opt in q.get('options', []) if opt.get('option_letter') == 'B'), None),
-            option_b_image_id=next((opt.get('option_image_id') for opt in q.get('options', []) if opt.get('option_letter') == 'B'), None),
-
-            option_c_text=next((opt.get('option_text') for opt in q.get('options', []) if opt.get('option_letter') == 'C'), ''),
-            option_c_image_url=next((opt.get('option_image_url') for opt in q.get('options', []) if opt.get('option_letter') == 'C'), None),
-            option_c_image_id=next((opt.get('option_image_id') for opt in q.get('options', []) if opt.get('option_letter') == 'C'), None),
-
-            option_d_text=next((opt.get('option_text') for opt in q.get('options', []) if opt.get('option_letter') == 'D'), ''),
-            option_d_image_url=next((opt.get('option_image_url') for opt in q.get('options', []) if opt.get('option_letter') == 'D'), None),
-            option_d_image_id=next((opt.get('option_image_id') for opt in q.get('options', []) if opt.get('option_letter') == 'D'), None),
-
-            correct_option_label=q.get('correct_answer'),
-            selected_option_label=selected_label,
-            is_correct=is_correct,
-        )
-        db.session.add(attempt_question)
+    # Grade and write all question attempts in one batch
+    attempted_questions, question_rows, grade = \
+        build_attempt_question_rows(attempt_exam.attempt_exam_id, questions_payload, answer_key)
+    insert_attempt_question_rows(question_rows)
 
     # Update overall attempt result
-    attempt_exam.correct_answers = correct_count
-    attempt_exam.wrong_answers = wrong_count
-    attempt_exam.unanswered_questions = unanswered_count
-    attempt_exam.score = correct_count
+    attempt_exam.correct_answers = grade.correct_count
+    attempt_exam.wrong_answers = grade.wrong_count
+    attempt_exam.unanswered_questions = grade.unanswered_count
+    attempt_exam.score = grade.score
 
     try:
+        bump_leaderboard_summary(attempt_exam)
         db.session.commit()
     except Exception as e:
         db.session.rollback()
         return jsonify({'status':'error', 'message': f'Database commit failed: {str(e)}'}), 500
 
+    leaderboard_registry.record_attempt(attempt_exam)
+
     # Return comprehensive response that frontend can use directly
     return jsonify({
         'status': 'success',
@@ -183,11 +113,11 @@ def examineeAttempExams(user):
         'attempt_exam': {
             'examinee_id': str(examinee_id),
             'exam_id': exam_id,
-            'score': correct_count,
+            'score': grade.score,
             'total_questions': total_questions,
-            'correct_answers': correct_count,
-            'wrong_answers': wrong_count,
-            'unanswered_questions': unanswered_count,
+            'correct_answers': grade.correct_count,
+            'wrong_answers': grade.wrong_count,
+            'unanswered_questions': grade.unanswered_count,
             'time_taken_seconds': time_taken_seconds,
             'created_at': attempt_exam.created_at.isoformat() if attempt_exam.created_at else None
         },
@@ -201,4 +131,101 @@ def examineeAttempExams(user):
             'total_time_minutes': total_time_minutes
         },
         'questions': attempted_questions
-    }), 200
\ No newline at end of file
+    }), 200
+
+# -----------------------------
+# Compact submission (answers only)
+# -----------------------------
+@examinee_attempt_exams_bp.route('/v2/submit-exam', methods=['POST'])
+@token_required
+def examineeSubmitExamV2(user):
+    """
+    Expects JSON with:
+    - exam_id
+    - time_taken_seconds
+    - answers: {question_id: "A"} or a packed string in paper order, e.g. "AB-D"
+    Question/option snapshots are resolved from the server's exam paper.
+    The full review is available from /previous-attempt-exam/<attempt_exam_id>.
+    """
+    data = request.get_json()
+    if not data:
+        return jsonify({'error': 'No data provided'}), 400
+
+    exam_id = data.get('exam_id')
+    if not exam_id:
+        return jsonify({'error': 'Exam ID is required'}), 400
+    try:
+        exam_uuid = uuid.UUID(str(exam_id))
+    except ValueError:
+        return jsonify({'error': 'Invalid exam ID format'}), 400
+
+    try:
+        time_taken_seconds = int(data.get('time_taken_seconds', 0))
+    except (ValueError, TypeError):
+        time_taken_seconds = 0
+
+    # The answer key is checked against the exam's updated_at; the paper is
+    # then loaded at that same version, so both describe the current questions
+    answer_key = answer_key_cache.get(exam_uuid)
+    exam_paper = load_exam_paper(exam_uuid, answer_key.version) if answer_key is not None else None
+    if answer_key is None or exam_paper is None:
+        return jsonify({'status': 'error', 'message': 'Exam not found'}), 404
+
+    try:
+        # Packed answers follow paper order, which is the answer key's question order
+        answers = parse_compact_answers(data.get('answers', {}), answer_key.question_ids)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    grade = answer_key.grade(answers)
+
+    attempt_exam = ExamineeAttemptExams(
+        attempt_exam_id=uuid.uuid4(),
+        examinee_id=uuid.UUID(str(user.id)),
+        exam_id=exam_uuid,
+        exam_name=exam_paper['exam_name'],
+        subject=exam_paper['subject'],
+        class_name=exam_paper['class_name'],
+        chapter=exam_paper['chapter'],
+        total_marks=exam_paper['total_marks'],
+        total_time_minutes=exam_paper['total_time_minutes'],
+        negative_marks_value=exam_paper['negative_marks_value'],
+        examiner_name=exam_paper['examiner_name'],
+        score=grade.score,
+        total_questions=len(answer_key),
+        correct_answers=grade.correct_count,
+        wrong_answers=grade.wrong_count,
+        unanswered_questions=grade.unanswered_count,
+        time_taken_seconds=time_taken_seconds,
+    )
+    db.session.add(attempt_exam)
+    # The Core insert below bypasses the unit of work: flush the parent row first (FK)
+    db.session.flush()
+    insert_attempt_question_rows(
+        build_attempt_question_rows_from_paper(attempt_exam.attempt_exam_id, exam_paper, answer_key, grade)
+    )
+
+    try:
+        bump_leaderboard_summary(attempt_exam)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'status': 'error', 'message': f'Database commit failed: {str(e)}'}), 500
+
+    leaderboard_registry.record_attempt(attempt_exam)
+
+    return jsonify({
+        'status': 'success',
+        'message': 'Exam attempt saved successfully',
+        'attempt_exam': {
+            'attempt_exam_id': str(attempt_exam.attempt_exam_id),
+            'exam_id': str(exam_uuid),
+            'score': grade.score,
+            'total_questions': len(answer_key),
+            'correct_answers': grade.correct_count,
+            'wrong_answers': grade.wrong_count,
+            'unanswered_questions': grade.unanswered_count,
+            'time_taken_seconds': time_taken_seconds,
+            'created_at': attempt_exam.created_at.isoformat() if attempt_exam.created_at else None
+        }
+    }), 200
@@ -1,65 +1,57 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app.models import User, db, ExaminerCreatedExam
+from app.utils.exam_cache_utils import exam_paper_cache, compile_exam_paper, exam_paper_etag, exam_last_modified
+from app.utils.http_cache_utils import not_modified, with_validators
+from app.utils.compression_utils import response_compression
+from functools import partial
 
 enter_exam_code_bp = Blueprint('enter_exam_code', __name__, url_prefix='/api/examinee/')
 
+# Papers change on update_exam; clients keep them but revalidate every time
+EXAM_PAPER_CACHE_CONTROL = 'private, no-cache'
+
 # ----------------------------
 # Login
 # ----------------------------
+# GET /enter-exam-code/<code> is the cacheable form (ETag / 304); POST keeps the original JSON-body API
 @enter_exam_code_bp.route('/enter-exam-code', methods=['POST'])
-def enterExamCode():
-    data = request.get_json()
-    if not data:
-        return jsonify({'error': 'No data provided'}), 400
+@enter_exam_code_bp.route('/enter-exam-code/<exam_code>', methods=['GET'])
+def enterExamCode(exam_code=None):
+    if exam_code is None:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
 
-    exam_code = data.get('exam_code')
+        exam_code = data.get('exam_code')
 
     if not exam_code:
         return jsonify({'error': 'Exam code is required'}), 400
 
-    #fetch exams by exam code
+    #fetch exams by exam code (the exam row only: it carries the paper's version)
     exam = ExaminerCreatedExam.query.filter_by(exam_code=exam_code).first()
     if not exam:
         return jsonify({'status':'error', 'message': 'Invalid Exam Code'}), 404
 
-    exam_data = {
-            'exam_id': str(exam.exam_id),
-            'exam_name': exam.exam_name,
-            'exam_code': exam.exam_code,
-            'subject': exam.subject,
-            'chapter': exam.chapter,
-            'class_name': exam.class_name,
-            'description': exam.description,
-            'total_marks': exam.total_marks,
-            'passing_marks': exam.passing_marks,
-            'total_time_minutes': exam.total_time_minutes,
-            'attempts_allowed': exam.attempts_allowed,
-            'negative_marks_value': exam.negative_marks_value,
-            'examiner_name': exam.examiner_name,
-            'created_at': exam.created_at.isoformat() if exam.created_at else None,
-            'updated_at': exam.updated_at.isoformat() if exam.updated_at else None,
-            'questions': []
-    }
-
-    for question in exam.questions:
-            exam_data['questions'].append({
-                'question_id': str(question.question_id),
-                'question_text': question.question_text,
-                'question_image_url': question.question_image_url,
-                'question_image_id': question.question_image_id,
-                'marks': question.marks,
-                'question_order': question.question_order,
-                'options': {
-                    'A': {'text': question.optA_text, 'image_url': question.optA_image_url, 'image_id': question.optA_image_id},
-                    'B': {'text': question.optB_text, 'image_url': question.optB_image_url, 'image_id': question.optB_image_id},
-                    'C': {'text': question.optC_text, 'image_url': question.optC_image_url, 'image_id': question.optC_image_id},
-                    'D': {'text': question.optD_text, 'image_url': question.optD_image_url, 'image_id': question.optD_image_id}
-                },
-                'correct_answer': question.correct_answer
-            })
-
-    return jsonify({
-        'status': "success",
-        'message': 'Got Exam successfully',
-        'exam_data': exam_data
-    }), 200
\ No newline at end of file
+    # Client already has this version: answer before the questions are loaded
+    etag, last_modified = exam_paper_etag(exam), exam_last_modified(exam)
+    unchanged = not_modified(etag, last_modified, EXAM_PAPER_CACHE_CONTROL)
+    if unchanged is not None:
+        return unchanged
+
+    # Serve the compiled paper from the per-worker cache when it is this version
+    cached = exam_paper_cache.get(exam_code, last_modified)
+    if cached is not None:
+        body = cached[0]
+    else:
+        _, body = compile_exam_paper(exam)
+
+    return paper_response(exam_code, body, etag, last_modified)
+
+
+def paper_response(exam_code, body, etag, last_modified):
+    response = current_app.response_class(body, status=200, mimetype='application/json')
+    with_validators(response, etag, last_modified, EXAM_PAPER_CACHE_CONTROL)
+    # Compressed bytes come from the cache entry: once per paper version, not per student
+    return response_compression.compress_cached(
+        response, body, partial(exam_paper_cache.get_encoded, exam_code, body)
+    )
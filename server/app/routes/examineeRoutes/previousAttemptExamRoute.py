@@ -3,10 +3,21 @@ from app.models import db, ExaminerCreatedExam, ExamineeAttemptExams, ExamineeAt
 import uuid
 from app.utils.cloudinary_utils import upload_image
 from app.routes.authRoutes.userRoutes import token_required
+from app.utils.pagination_utils import keyset_paginate, encode_cursor, InvalidCursor
+from app.utils.projection_utils import ATTEMPT_HISTORY
+from app.utils.serializer_utils import ATTEMPT_REVIEW_EXAM, ATTEMPT_REVIEW_QUESTION
+from app.utils.http_cache_utils import payload_etag, not_modified, with_validators
+from app.utils.leaderboard_utils import (
+    get_leaderboard, get_leaderboard_around, get_user_rank,
+    leaderboard_row_to_dict, leaderboard_exam_snapshot
+)
 import json
 
 examinee_previous_attempt_exam_bp = Blueprint("examinee_previous_attempt_exam", __name__, url_prefix="/api/examinee")
 
+# Attempt snapshots never change after submit
+ATTEMPT_REVIEW_CACHE_CONTROL = 'private, max-age=86400'
+
 
 # -----------------------------
 # Get all exams created by the logged-in user (without status/delete)
@@ -17,48 +28,49 @@ def get_attempt_exams(user):
     try:
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
+        cursor = request.args.get('cursor')
+        include_total = request.args.get('include_total', 'false').lower() in ('1', 'true', 'yes')
+
+        exams_query = ATTEMPT_HISTORY.query().filter(ExamineeAttemptExams.examinee_id == user.id)
+
+        if cursor is not None:
+            # Keyset pagination: ?cursor= (empty for the first page), then pass next_cursor back
+            exams_page = keyset_paginate(
+                exams_query, ExamineeAttemptExams.created_at, ExamineeAttemptExams.attempt_exam_id,
+                cursor=cursor, per_page=per_page, with_total=include_total
+            )
+            items = exams_page.items
+            pagination = {
+                'per_page': exams_page.per_page,
+                'next_cursor': exams_page.next_cursor,
+                'has_next': exams_page.has_next,
+                'total_exams': exams_page.total
+            }
+        else:
+            # page/per_page (OFFSET); paginate() already runs the count
+            exams = exams_query.order_by(ExamineeAttemptExams.created_at.desc(), ExamineeAttemptExams.attempt_exam_id.desc()).paginate(
+                page=page, per_page=per_page, error_out=False
+            )
+            items = exams.items
+            pagination = {
+                'page': exams.page,
+                'per_page': exams.per_page,
+                'total_pages': exams.pages,
+                'total_exams': exams.total,
+                'has_next': exams.has_next,
+                'has_prev': exams.has_prev,
+                'next_cursor': encode_cursor(items[-1].created_at, items[-1].attempt_exam_id) if exams.has_next else None
+            }
 
-        exams_query = ExamineeAttemptExams.query.filter_by(examinee_id=user.id)
-        total_exams = exams_query.count()
-
-        exams = exams_query.order_by(ExamineeAttemptExams.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
-
-        exams_list = []
-        for exam in exams.items:
-            exams_list.append({
-                'attempt_exam_id': str(exam.attempt_exam_id),
-                'exam_id': str(exam.exam_id),
-                'exam_name': exam.exam_name,
-                'subject': exam.subject,
-                'class_name': exam.class_name,
-                'chapter': exam.chapter,
-                'total_marks': exam.total_marks,
-                'total_time_minutes': exam.total_time_minutes,
-                'negative_marks_value': exam.negative_marks_value,
-                'examiner_name': exam.examiner_name,
-                'score': exam.score,
-                'total_questions': exam.total_questions,
-                'correct_answers': exam.correct_answers,
-                'wrong_answers': exam.wrong_answers,
-                'unanswered_questions': exam.unanswered_questions,
-                'time_taken_seconds': exam.time_taken_seconds,
-                'created_at': exam.created_at.isoformat() if exam.created_at else None
-            })
+        exams_list = [ATTEMPT_HISTORY.to_dict(row) for row in items]
 
         return jsonify({
             'status': 'success',
             'exams': exams_list,
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total_pages': exams.pages,
-                'total_exams': total_exams,
-                'has_next': exams.has_next,
-                'has_prev': exams.has_prev
-            }
+            'pagination': pagination
         })
+    except InvalidCursor as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
     except Exception as e:
         return jsonify({
             'status': 'error',
@@ -71,6 +83,11 @@ def get_attempt_exams(user):
 @token_required
 def get_attempt_exam(user, attemptExamId):
     try:
+        try:
+            attemptExamId = uuid.UUID(attemptExamId)
+        except ValueError:
+            return jsonify({'error': 'Invalid attempt exam ID format'}), 400
+
         # Find the specific exam attempt
         exam = ExamineeAttemptExams.query.filter_by(
             attempt_exam_id=attemptExamId,
@@ -83,72 +100,26 @@ def get_attempt_exam(user, attemptExamId):
                 'message': 'Exam attempt not found'
             }), 404
 
+        etag = payload_etag(
+            'attempt_review', ATTEMPT_REVIEW_EXAM.fingerprint, ATTEMPT_REVIEW_QUESTION.fingerprint,
+            exam.attempt_exam_id, exam.created_at
+        )
+        unchanged = not_modified(etag, exam.created_at, ATTEMPT_REVIEW_CACHE_CONTROL)
+        if unchanged is not None:
+            return unchanged
+
         # Get all questions for this exam attempt
         questions = ExamineeAttemptExamQuestions.query.filter_by(
             attempt_exam_id=attemptExamId
         ).order_by(ExamineeAttemptExamQuestions.created_at).all()
 
-        exam_data = {
-            'attempt_exam_id': str(exam.attempt_exam_id),
-            'exam_id': str(exam.exam_id),
-            'exam_name': exam.exam_name,
-            'subject': exam.subject,
-            'class_name': exam.class_name,
-            'chapter': exam.chapter,
-            'total_marks': exam.total_marks,
-            'total_time_minutes': exam.total_time_minutes,
-            'negative_marks_value': exam.negative_marks_value,
-            'examiner_name': exam.examiner_name,
-            'score': exam.score,
-            'total_questions': exam.total_questions,
-            'correct_answers': exam.correct_answers,
-            'wrong_answers': exam.wrong_answers,
-            'unanswered_questions': exam.unanswered_questions,
-            'time_taken_seconds': exam.time_taken_seconds,
-            'created_at': exam.created_at.isoformat() if exam.created_at else None,
-            'questions': []
-        }
-        
-        for question in questions:
-            exam_data['questions'].append({
-                'question_id': str(question.attempt_question_id),
-                'original_question_id': str(question.original_question_id) if question.original_question_id else None,
-                'question_text': question.question_text,
-                'question_image_url': question.question_image_url,
-                'question_image_id': question.question_image_id,
-                'marks': 1,  # You might want to store marks per question in your model
-                'question_order': None,  # You might want to add order field to your model
-                'selected_answer': question.selected_option_label,
-                'correct_answer': question.correct_option_label,
-                'is_correct': question.is_correct,
-                'options': {
-                    'A': {
-                        'text': question.option_a_text, 
-                        'image_url': question.option_a_image_url, 
-                        'image_id': question.option_a_image_id
-                    },
-                    'B': {
-                        'text': question.option_b_text, 
-                        'image_url': question.option_b_image_url, 
-                        'image_id': question.option_b_image_id
-                    },
-                    'C': {
-                        'text': question.option_c_text, 
-                        'image_url': question.option_c_image_url, 
-                        'image_id': question.option_c_image_id
-                    },
-                    'D': {
-                        'text': question.option_d_text, 
-                        'image_url': question.option_d_image_url, 
-                        'image_id': question.option_d_image_id
-                    }
-                }
-            })
+        exam_data = ATTEMPT_REVIEW_EXAM(exam)
+        exam_data['questions'] = ATTEMPT_REVIEW_QUESTION.many(questions)
 
-        return jsonify({
+        return with_validators(jsonify({
             'status': 'success',
             'exam': exam_data
-        })
+        }), etag, exam.created_at, ATTEMPT_REVIEW_CACHE_CONTROL)
     except Exception as e:
         return jsonify({
             'status': 'error',
@@ -168,61 +139,35 @@ def get_exam_leaderboard(user, exam_id):
         except ValueError:
             return jsonify({'error': 'Invalid exam ID format'}), 400
 
-        # Get all attempt results for this exam, ordered by score then time
-        attempts = ExamineeAttemptExams.query.filter_by(
-            exam_id=exam_uuid
-        ).order_by(
-            ExamineeAttemptExams.score.desc(),
-            ExamineeAttemptExams.time_taken_seconds.asc()
-        ).all()
+        limit = request.args.get('limit', type=int)
+        offset = request.args.get('offset', 0, type=int)
+        around_me = request.args.get('around_me', type=int)
 
-        if not attempts:
-            return jsonify({'error': 'No attempts found for this exam'}), 404
+        # Ranked rows + examinee names come from a single windowed query
+        if around_me is not None:
+            rows = get_leaderboard_around(exam_uuid, user.id, neighbours=max(around_me, 0))
+        else:
+            rows = get_leaderboard(exam_uuid, limit=limit, offset=max(offset, 0))
 
-        leaderboard_data = []
-        current_user_rank = None
-
-        for rank, attempt in enumerate(attempts, 1):
-            from app.models.authModels.user import User
-            examinee = User.query.get(attempt.examinee_id)
-
-            row = {
-                'attempt_exam_id': str(attempt.attempt_exam_id),
-                'rank': rank,
-                'examinee_id': str(examinee.id) if examinee else None,
-                'examinee_name': examinee.name if examinee else "Unknown",
-                'score': attempt.score,
-                'correct_answers': attempt.correct_answers,
-                'wrong_answers': attempt.wrong_answers,
-                'unanswered_questions': attempt.unanswered_questions,
-                'time_taken_seconds': attempt.time_taken_seconds,
-                'created_at': attempt.created_at.isoformat() if attempt.created_at else None
-            }
-            leaderboard_data.append(row)
+        # A page past the last rank is empty, not missing: the top row still
+        # provides the exam snapshot and total
+        head = rows or get_leaderboard(exam_uuid, limit=1)
+        if not head:
+            return jsonify({'error': 'No attempts found for this exam'}), 404
 
-            # Track current user's rank
-            if attempt.examinee_id == user.id:
-                current_user_rank = rank
+        leaderboard_data = [leaderboard_row_to_dict(row) for row in rows]
 
-        # Use the first attempt for exam snapshot
-        exam_snapshot = attempts[0]
+        # Rows are in rank order, so the first match is the user's best rank
+        current_user_rank = next((row['rank'] for row in rows if row['examinee_id'] == user.id), None)
+        if current_user_rank is None and around_me is None and (limit is not None or offset):
+            current_user_rank = get_user_rank(exam_uuid, user.id)
 
         return jsonify({
             'status': 'success',
-            'exam': {
-                'exam_id': str(exam_snapshot.exam_id),
-                'exam_name': exam_snapshot.exam_name,
-                'subject': exam_snapshot.subject,
-                'chapter': exam_snapshot.chapter,
-                'class_name': exam_snapshot.class_name,
-                'total_questions': exam_snapshot.total_questions,
-                'total_marks': exam_snapshot.total_marks,
-                'total_time_minutes': exam_snapshot.total_time_minutes,
-                'negative_marks_value': exam_snapshot.negative_marks_value,
-                'examiner_name': exam_snapshot.examiner_name,
-            },
+            'exam': leaderboard_exam_snapshot(head[0]),
             'leaderboard': leaderboard_data,
-            'current_user_rank': current_user_rank
+            'current_user_rank': current_user_rank,
+            'total_attempts': head[0]['total_attempts']
         }), 200
 
     except Exception as e:
@@ -1,12 +1,30 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, stream_with_context
 from app.models import db, ExaminerCreatedExam, ExaminerCreatedExamQuestion,ExamineeAttemptExams, ExamineeAttemptExamQuestions
+import logging
 import uuid
-from app.utils.cloudinary_utils import upload_image
+from app.utils.exam_cache_utils import exam_paper_cache, exam_paper_etag, exam_last_modified
+from app.utils.http_cache_utils import not_modified, with_validators
+from app.utils.grading_utils import answer_key_cache
+from app.utils.exam_update_utils import diff_exam_questions, apply_question_diff
+from app.utils.upload_utils import upload_pipeline, UploadError
+from app.utils.media_gc_utils import enqueue_media_deletion, collect_exam_image_ids, claim_reused_uploads
+from app.utils.leaderboard_utils import get_leaderboard, leaderboard_row_to_dict, leaderboard_exam_snapshot
+from app.utils.leaderboard_index_utils import leaderboard_registry
 from app.routes.authRoutes.userRoutes import token_required
+from app.utils.pagination_utils import keyset_paginate, encode_cursor, InvalidCursor
+from app.utils.projection_utils import MY_CREATED_EXAMS
+from app.utils.serializer_utils import EXAM_PAPER
+from app.utils.export_utils import (
+    EXPORT_FORMATS, XLSX_MAX_ROWS, attempt_export_rows, count_attempts, csv_stream, xlsx_stream
+)
 import json
 
 all_created_exam_bp = Blueprint("all_created_exam", __name__, url_prefix="/api/examiner")
 
+logger = logging.getLogger(__name__)
+
+EXAM_DETAILS_CACHE_CONTROL = 'private, no-cache'
+
 # -----------------------------
 # Get all exams created by the logged-in user (without status/delete)
 # -----------------------------
@@ -16,41 +34,50 @@ def get_my_exams(user):
     try:
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
+        cursor = request.args.get('cursor')
+        include_total = request.args.get('include_total', 'false').lower() in ('1', 'true', 'yes')
+
+        # Only the listed columns, question counts from one correlated COUNT per row
+        exams_query = MY_CREATED_EXAMS.query().filter(ExaminerCreatedExam.user_id == user.id)
+
+        if cursor is not None:
+            # Keyset pagination: ?cursor= (empty for the first page), then pass next_cursor back
+            exams_page = keyset_paginate(
+                exams_query, ExaminerCreatedExam.created_at, ExaminerCreatedExam.exam_id,
+                cursor=cursor, per_page=per_page, with_total=include_total
+            )
+            items = exams_page.items
+            pagination = {
+                'per_page': exams_page.per_page,
+                'next_cursor': exams_page.next_cursor,
+                'has_next': exams_page.has_next,
+                'total_exams': exams_page.total
+            }
+        else:
+            # page/per_page (OFFSET); paginate() already runs the count
+            exams = exams_query.order_by(ExaminerCreatedExam.created_at.desc(), ExaminerCreatedExam.exam_id.desc()).paginate(
+                page=page, per_page=per_page, error_out=False
+            )
+            items = exams.items
+            pagination = {
+                'page': exams.page,
+                'per_page': exams.per_page,
+                'total_pages': exams.pages,
+                'total_exams': exams.total,
+                'has_next': exams.has_next,
+                'has_prev': exams.has_prev,
+                'next_cursor': encode_cursor(items[-1].created_at, items[-1].exam_id) if exams.has_next else None
+            }
 
-        exams_query = ExaminerCreatedExam.query.filter_by(user_id=user.id)
-        total_exams = exams_query.count()
-
-        exams = exams_query.order_by(ExaminerCreatedExam.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
-
-        exams_list = []
-        for exam in exams.items:
-            exams_list.append({
-                'exam_id': str(exam.exam_id),
-                'exam_name': exam.exam_name,
-                'exam_code': exam.exam_code,
-                'subject': exam.subject,
-                'chapter': exam.chapter,
-                'class_name': exam.class_name,
-                'total_marks': exam.total_marks,
-                'total_time_minutes': exam.total_time_minutes,
-                'created_at': exam.created_at.isoformat() if exam.created_at else None,
-                'question_count': len(exam.questions) if exam.questions else 0
-            })
+        exams_list = [MY_CREATED_EXAMS.to_dict(row) for row in items]
 
         return jsonify({
             'status': 'success',
             'exams': exams_list,
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total_pages': exams.pages,
-                'total_exams': total_exams,
-                'has_next': exams.has_next,
-                'has_prev': exams.has_prev
-            }
+            'pagination': pagination
         })
+    except InvalidCursor as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
     except Exception as e:
         return jsonify({
             'status': 'error',
@@ -69,43 +96,17 @@ def get_exam_details(user, exam_id):
         if not exam:
             return jsonify({'status': 'error', 'message': 'Exam not found'}), 404
 
-        exam_data = {
-            'exam_id': str(exam.exam_id),
-            'exam_name': exam.exam_name,
-            'exam_code': exam.exam_code,
-            'subject': exam.subject,
-            'chapter': exam.chapter,
-            'class_name': exam.class_name,
-            'description': exam.description,
-            'total_marks': exam.total_marks,
-            'passing_marks': exam.passing_marks,
-            'total_time_minutes': exam.total_time_minutes,
-            'attempts_allowed': exam.attempts_allowed,
-            'negative_marks_value': exam.negative_marks_value,
-            'examiner_name': exam.examiner_name,
-            'created_at': exam.created_at.isoformat() if exam.created_at else None,
-            'updated_at': exam.updated_at.isoformat() if exam.updated_at else None,
-            'questions': []
-        }
-
-        for question in exam.questions:
-            exam_data['questions'].append({
-                'question_id': str(question.question_id),
-                'question_text': question.question_text,
-                'question_image_url': question.question_image_url,
-                'question_image_id': question.question_image_id,
-                'marks': question.marks,
-                'question_order': question.question_order,
-                'options': {
-                    'A': {'text': question.optA_text, 'image_url': question.optA_image_url, 'image_id': question.optA_image_id},
-                    'B': {'text': question.optB_text, 'image_url': question.optB_image_url, 'image_id': question.optB_image_id},
-                    'C': {'text': question.optC_text, 'image_url': question.optC_image_url, 'image_id': question.optC_image_id},
-                    'D': {'text': question.optD_text, 'image_url': question.optD_image_url, 'image_id': question.optD_image_id}
-                },
-                'correct_answer': question.correct_answer
-            })
-
-        return jsonify({'status': 'success', 'exam': exam_data})
+        # The examiner edits this exam: revalidate on every view, 304 before loading questions
+        etag, last_modified = exam_paper_etag(exam, 'exam_details'), exam_last_modified(exam)
+        unchanged = not_modified(etag, last_modified, EXAM_DETAILS_CACHE_CONTROL)
+        if unchanged is not None:
+            return unchanged
+
+        exam_data = EXAM_PAPER(exam)
+
+        return with_validators(
+            jsonify({'status': 'success', 'exam': exam_data}), etag, last_modified, EXAM_DETAILS_CACHE_CONTROL
+        )
 
     except Exception as e:
         return jsonify({
@@ -129,6 +130,7 @@ from datetime import datetime  # Add this import
 @all_created_exam_bp.route('/my-created-exams/update-exam/<exam_id>', methods=['PUT'])
 @token_required
 def update_exam(user, exam_id):
+    uploads = {}
     try:
         # Get the exam to update
         exam = ExaminerCreatedExam.query.filter_by(exam_id=uuid.UUID(exam_id), user_id=user.id).first()
@@ -143,6 +145,16 @@ def update_exam(user, exam_id):
             if not data:
                 return jsonify({'status': 'error', 'message': 'No data provided'}), 400
 
+        if 'questions' in data:
+            # All new images upload in parallel before any write; the ownership
+            # check's transaction (and pooled connection) is released meanwhile
+            db.session.close()
+            uploads = upload_pipeline.upload_exam_images(request.files, len(data['questions']))
+            exam = ExaminerCreatedExam.query.filter_by(exam_id=uuid.UUID(exam_id), user_id=user.id).first()
+            if not exam:
+                upload_pipeline.discard(uploads)
+                return jsonify({'status': 'error', 'message': 'Exam not found'}), 404
+
         # Update exam details
         exam.exam_name = data.get('exam_name', exam.exam_name)
         exam.subject = data.get('subject', exam.subject)
@@ -163,75 +175,33 @@ def update_exam(user, exam_id):
         exam.start_datetime = datetime.fromisoformat(start_datetime.replace('Z', '+00:00')) if start_datetime else None
         exam.end_datetime = datetime.fromisoformat(end_datetime.replace('Z', '+00:00')) if end_datetime else None
 
-        # Update questions
+        # Update questions: only changed rows are written, unchanged ones keep their ids
+        question_changes = None
         if 'questions' in data:
-            # Delete existing questions
-            ExaminerCreatedExamQuestion.query.filter_by(exam_id=exam.exam_id).delete()
-
-            for i, q_data in enumerate(data['questions']):
-                # Question image
-                q_image_url = q_data.get('question_image_url')
-                q_image_id = q_data.get('question_image_id')
-
-                q_file = request.files.get(f"question_{i + 1}_image")
-                if q_file:
-                    upload_result = upload_image(q_file, folder="exam-app/questions")
-                    q_image_url = upload_result["url"]
-                    q_image_id = upload_result["public_id"]
-                else:
-                    # Retain existing URL and ID if no new file
-                    if q_image_url:
-                        q_image_url = q_data.get('question_image_url')
-                    if q_image_id:
-                        q_image_id = q_data.get('question_image_id')
-
-                question = ExaminerCreatedExamQuestion(
-                    question_id=uuid.uuid4(),
-                    exam_id=exam.exam_id,
-                    question_text=q_data.get('question_text', ''),
-                    question_image_url=q_image_url,
-                    question_image_id=q_image_id,
-                    question_order=q_data.get('question_order', i + 1),
-                    marks=q_data.get('marks', 1.0),
-                    optA_text=q_data.get('optA_text', ''),
-                    optB_text=q_data.get('optB_text', ''),
-                    optC_text=q_data.get('optC_text', ''),
-                    optD_text=q_data.get('optD_text', ''),
-                    correct_answer=q_data.get('correct_answer', ''),
-                    created_at=datetime.utcnow(),
-                    updated_at=datetime.utcnow()
-                )
-
-                # Option images
-                for opt_key in ["A", "B", "C", "D"]:
-                    o_file = request.files.get(f"question_{i + 1}_opt{opt_key}_image")
-                    if o_file:
-                        upload_result = upload_image(o_file, folder="exam-app/options")
-                        setattr(question, f"opt{opt_key}_image_url", upload_result["url"])
-                        setattr(question, f"opt{opt_key}_image_id", upload_result["public_id"])
-                    else:
-                        # Retain existing URL and ID
-                        opt_url = q_data.get(f"opt{opt_key}_image_url")
-                        opt_id = q_data.get(f"opt{opt_key}_image_id")
-                        if opt_url:
-                            setattr(question, f"opt{opt_key}_image_url", opt_url)
-                        if opt_id:
-                            setattr(question, f"opt{opt_key}_image_id", opt_id)
-
-                db.session.add(question)
+            claim_reused_uploads(request.files, uploads)
+            question_changes = apply_question_diff(
+                diff_exam_questions(exam.exam_id, data['questions'], uploads)
+            )
 
         db.session.commit()
+        exam_paper_cache.invalidate_exam(exam.exam_id)
+        answer_key_cache.invalidate(exam.exam_id)
 
         return jsonify({
             'status': 'success',
             'message': 'Exam updated successfully',
-            'exam_id': str(exam.exam_id)
+            'exam_id': str(exam.exam_id),
+            'questions': question_changes
         })
 
+    except UploadError as e:
+        db.session.rollback()
+        upload_pipeline.discard(uploads)
+        return jsonify({'status': 'error', 'message': str(e)}), 502
     except Exception as e:
         db.session.rollback()
-        import traceback
-        traceback.print_exc()
+        upload_pipeline.discard(uploads)
+        logger.exception("Failed to update exam %s", exam_id)
         return jsonify({
             'status': 'error',
             'message': 'Failed to update exam',
@@ -252,8 +222,14 @@ def delete_exam(user, exam_id):
             return jsonify({'status': 'error', 'message': 'Exam not found'}), 404
 
         # Delete the exam (this will cascade delete related questions due to the relationship)
+        exam_id = exam.exam_id
+        # Images are removed later by the media GC, in the same transaction as the delete
+        enqueue_media_deletion(collect_exam_image_ids(exam_id), 'exam_deleted')
         db.session.delete(exam)
         db.session.commit()
+        exam_paper_cache.invalidate_exam(exam_id)
+        answer_key_cache.invalidate(exam_id)
+        leaderboard_registry.invalidate(exam_id)
         
         return jsonify({
             'status': 'success',
@@ -280,66 +256,76 @@ def get_exam_leaderboard(user, exam_id):
         except ValueError:
             return jsonify({'error': 'Invalid exam ID format'}), 400
 
-        # Get all attempt results for this exam, ordered by score then time
-        attempts = ExamineeAttemptExams.query.filter_by(
-            exam_id=exam_uuid
-        ).order_by(
-            ExamineeAttemptExams.score.desc(),
-            ExamineeAttemptExams.time_taken_seconds.asc()
-        ).all()
-
-        if not attempts:
-            return jsonify({'error': 'No attempts found for this exam'}), 404
+        # Only the examiner who created the exam sees its results
+        owned = db.session.execute(
+            db.select(ExaminerCreatedExam.exam_id).filter_by(exam_id=exam_uuid, user_id=user.id)
+        ).first()
+        if not owned:
+            return jsonify({'status': 'error', 'message': 'Exam not found'}), 404
 
-        leaderboard_data = []
-        current_user_rank = None
-
-        for rank, attempt in enumerate(attempts, 1):
-            from app.models.authModels.user import User
-            examinee = User.query.get(attempt.examinee_id)
-
-            row = {
-                'attempt_exam_id': str(attempt.attempt_exam_id),
-                'rank': rank,
-                'score': attempt.score,
-                'correct_answers': attempt.correct_answers,
-                'examinee_name': examinee.name if examinee else "Unknown",
-                'wrong_answers': attempt.wrong_answers,
-                'unanswered_questions': attempt.unanswered_questions,
-                'time_taken_seconds': attempt.time_taken_seconds,
-                'created_at': attempt.created_at.isoformat() if attempt.created_at else None
-            }
-            leaderboard_data.append(row)
+        limit = request.args.get('limit', type=int)
+        offset = request.args.get('offset', 0, type=int)
 
-            # Track current user's rank
-            if attempt.examinee_id == user.id:
-                current_user_rank = rank
+        # Ranked rows + examinee names come from a single windowed query
+        rows = get_leaderboard(exam_uuid, limit=limit, offset=max(offset, 0))
+        # A page past the last rank is empty, not missing: the top row still
+        # provides the exam snapshot and total
+        head = rows or get_leaderboard(exam_uuid, limit=1)
+        if not head:
+            return jsonify({'error': 'No attempts found for this exam'}), 404
 
-        # Use the first attempt for exam snapshot
-        exam_snapshot = attempts[0]
+        leaderboard_data = [leaderboard_row_to_dict(row) for row in rows]
 
         return jsonify({
             'status': 'success',
-            'exam': {
-                'exam_id': str(exam_snapshot.exam_id),
-                'exam_name': exam_snapshot.exam_name,
-                'subject': exam_snapshot.subject,
-                'chapter': exam_snapshot.chapter,
-                'class_name': exam_snapshot.class_name,
-                'total_questions': exam_snapshot.total_questions,
-                'total_marks': exam_snapshot.total_marks,
-                'total_time_minutes': exam_snapshot.total_time_minutes,
-                'negative_marks_value': exam_snapshot.negative_marks_value,
-                'examiner_name': exam_snapshot.examiner_name,
-            },
+            'exam': leaderboard_exam_snapshot(head[0]),
             'leaderboard': leaderboard_data,
+            'total_attempts': head[0]['total_attempts']
         }), 200
 
-    except Exception as e:
-        print(f"Error fetching leaderboard: {str(e)}")
+    except Exception:
+        logger.exception("Error fetching leaderboard for exam %s", exam_id)
         return jsonify({'error': 'Failed to fetch leaderboard data'}), 500
 
 
+EXPORT_MIMETYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+# Export every attempt of an exam as CSV / XLSX (?format=csv|xlsx&answers=1)
+@all_created_exam_bp.route('/taken-exam-result/<exam_id>/export', methods=['GET'])
+@token_required
+def export_exam_results(user, exam_id):
+    try:
+        exam_uuid = uuid.UUID(exam_id)
+    except ValueError:
+        return jsonify({'error': 'Invalid exam ID format'}), 400
+
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    include_answers = request.args.get('answers', 'false').lower() in ('1', 'true', 'yes')
+
+    exam = ExaminerCreatedExam.query.filter_by(exam_id=exam_uuid, user_id=user.id).first()
+    if not exam:
+        return jsonify({'status': 'error', 'message': 'Exam not found'}), 404
+    if export_format == 'xlsx' and count_attempts(exam_uuid) >= XLSX_MAX_ROWS:
+        return jsonify({'error': 'Too many attempts for one XLSX sheet, export as CSV'}), 400
+
+    # Rows are streamed from a server-side cursor while the body is being sent
+    rows = attempt_export_rows(exam_uuid, include_answers, current_app.config.get('EXPORT_BATCH_SIZE', 1000))
+    body = csv_stream(rows) if export_format == 'csv' else xlsx_stream(rows, sheet_name=exam.exam_code or 'Results')
+    response = current_app.response_class(stream_with_context(body), mimetype=EXPORT_MIMETYPES[export_format])
+    response.headers['Content-Disposition'] = (
+        f'attachment; filename="{exam.exam_code or exam.exam_id}-results.{export_format}"'
+    )
+    response.headers['Cache-Control'] = 'private, no-store'
+    response.headers['X-Accel-Buffering'] = 'no'  # let nginx pass chunks through as they come
+    return response
+
+
 
 # -----------------------------
 # Register Blueprint
@@ -1,34 +1,20 @@
 
 from flask import Blueprint, request, jsonify
-from app.models import db, ExaminerCreatedExam, ExaminerCreatedExamQuestion
+from app.models import db, ExaminerCreatedExam, ExaminerCreatedExamQuestion, ExamLeaderboardSummary
 import uuid
-from app.utils.cloudinary_utils import upload_image
+from app.utils.upload_utils import upload_pipeline, UploadError
 from app.routes.authRoutes.userRoutes import token_required
 import json
-import random
-import string
+from sqlalchemy.exc import IntegrityError
+from app.utils.exam_code_utils import exam_code_allocator
+from app.utils.media_gc_utils import claim_reused_uploads
 
 
 create_exam_bp = Blueprint("create_exam_bp", __name__, url_prefix="/api/examiner")
 
 
-# --- ADD THIS HELPER FUNCTION --- #
-def generate_exam_code(length=9):
-    """
-    Generates a random alphanumeric code in format: X7B9-2K3M
-    Avoids ambiguous characters (0, O, 1, I, L)
-    """
-    # Define a safe alphabet
-    alphabet = string.digits + string.ascii_uppercase
-    # Remove ambiguous characters
-    for ambiguous_char in "0O1IL":
-        alphabet = alphabet.replace(ambiguous_char, "")
-    
-    # Generate the code parts
-    part1 = ''.join(random.choice(alphabet) for _ in range(4))
-    part2 = ''.join(random.choice(alphabet) for _ in range(4))
-    
-    return f"{part1}-{part2}"
+# Attempts before giving up when an allocated code clashes with a legacy random one
+EXAM_CODE_INSERT_ATTEMPTS = 5
 
 
 # -----------------------------
@@ -43,6 +29,7 @@ def create_full_exam(user):
     - question images as files: question_1_image, question_2_image, ...
     - option images as files: question_1_optA_image, question_1_optB_image, ...
     """
+    uploads = {}
     try:
 
          # Check if exam_data exists
@@ -58,27 +45,19 @@ def create_full_exam(user):
             if not data.get(field):
                 return jsonify({"status": "error", "message": f"{field} is required"}), 400
        
-        # --- ADD EXAM CODE GENERATION LOGIC HERE --- #
-        # Generate a unique exam code
-        is_code_unique = False
-        exam_code = None
-        
-        while not is_code_unique:
-            exam_code = generate_exam_code()
-            # Check if this code already exists in the database
-            existing_exam = ExaminerCreatedExam.query.filter_by(exam_code=exam_code).first()
-            if not existing_exam:
-                is_code_unique = True
-        # --- END EXAM CODE GENERATION --- #
-       
         # Parse JSON data
         data = json.loads(request.form.get("exam_data"))
 
-        # 1️⃣ Create Exam
+        # 1️⃣ Upload all images in parallel before any write, with no transaction
+        # (or pooled connection) held: the auth lookup may have opened one
+        questions = data.get("questions", [])
+        db.session.close()
+        uploads = upload_pipeline.upload_exam_images(request.files, len(questions))
+
+        # 2️⃣ Create Exam
         new_exam = ExaminerCreatedExam(
             exam_id=uuid.uuid4(),
             exam_name=data.get("exam_name"),
-            exam_code=exam_code,  
             subject=data.get("subject"),
             chapter=data.get("chapter"),
             class_name=data.get("class_name"),
@@ -93,18 +72,27 @@ def create_full_exam(user):
             examiner_name=data.get("examiner_name"),
             user_id=uuid.UUID(str(user.id))
         )
-        db.session.add(new_exam)
-        db.session.flush()  # get new_exam.exam_id for FK
-
-        # 2️⃣ Create Questions
-        for q_idx, q in enumerate(data.get("questions", []), start=1):
+        # Codes come from a collision-free allocator; the savepoint only guards
+        # against the rare clash with a code issued by the old random generator
+        for attempt in range(EXAM_CODE_INSERT_ATTEMPTS):
+            new_exam.exam_code = exam_code_allocator.allocate()
+            try:
+                with db.session.begin_nested():
+                    db.session.add(new_exam)  # flushed on exit: get new_exam.exam_id for FK
+                break
+            except IntegrityError:
+                if attempt == EXAM_CODE_INSERT_ATTEMPTS - 1:
+                    raise
+
+        # Leaderboard counter row exists before the first submit
+        db.session.add(ExamLeaderboardSummary(exam_id=new_exam.exam_id, attempt_count=0))
+
+        # 3️⃣ Create questions
+        claim_reused_uploads(request.files, uploads)
+
+        for q_idx, q in enumerate(questions, start=1):
             # Question image
-            q_file = request.files.get(f"question_{q_idx}_image")
-            q_image_url, q_image_id = None, None
-            if q_file:
-                upload_result = upload_image(q_file, folder="exam-app/questions")
-                q_image_url = upload_result["url"]
-                q_image_id = upload_result["public_id"]
+            q_upload = uploads.get(f"question_{q_idx}_image")
 
             new_question = ExaminerCreatedExamQuestion(
                 question_id=uuid.uuid4(),
@@ -112,8 +100,8 @@ def create_full_exam(user):
                 question_text=q.get("question_text"),
                 marks=q.get("marks", 1.0),
                 question_order=q.get("question_order", q_idx),
-                question_image_url=q_image_url,
-                question_image_id=q_image_id,
+                question_image_url=q_upload["url"] if q_upload else None,
+                question_image_id=q_upload["public_id"] if q_upload else None,
                 # Options
                 optA_text=q.get("optA_text"),
                 optB_text=q.get("optB_text"),
@@ -124,21 +112,25 @@ def create_full_exam(user):
 
             # Option images
             for opt_key in ["A", "B", "C", "D"]:
-                o_file = request.files.get(f"question_{q_idx}_opt{opt_key}_image")
-                if o_file:
-                    upload_result = upload_image(o_file, folder="exam-app/options")
-                    setattr(new_question, f"opt{opt_key}_image_url", upload_result["url"])
-                    setattr(new_question, f"opt{opt_key}_image_id", upload_result["public_id"])
+                o_upload = uploads.get(f"question_{q_idx}_opt{opt_key}_image")
+                if o_upload:
+                    setattr(new_question, f"opt{opt_key}_image_url", o_upload["url"])
+                    setattr(new_question, f"opt{opt_key}_image_id", o_upload["public_id"])
 
             db.session.add(new_question)
 
         db.session.commit()
-        return jsonify({"status": "success", "exam_id": str(new_exam.exam_id), "exam_code": exam_code})
+        return jsonify({"status": "success", "exam_id": str(new_exam.exam_id), "exam_code": new_exam.exam_code})
 
     except json.JSONDecodeError:
         return jsonify({"status": "error", "message": "Invalid JSON in exam_data"}), 400
+    except UploadError as e:
+        db.session.rollback()
+        upload_pipeline.discard(uploads)
+        return jsonify({"status": "error", "message": str(e)}), 502
     except Exception as e:
         db.session.rollback()
+        upload_pipeline.discard(uploads)
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
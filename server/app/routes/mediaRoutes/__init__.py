@@ -0,0 +1,8 @@
+# app/routes/mediaRoutes/__init__.py
+def init_app(app):
+    """
+    Register all blueprints in the mediaRoutes folder.
+    """
+    from .mediaRoute import media_bp
+
+    app.register_blueprint(media_bp)
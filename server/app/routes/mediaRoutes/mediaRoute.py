@@ -0,0 +1,37 @@
+from flask import Blueprint, jsonify, send_file
+from app.utils.storage_utils import LocalStorage
+from app.utils.upload_utils import upload_pipeline
+
+media_bp = Blueprint("media", __name__, url_prefix="/media")
+
+# Files are stored by hash without an extension; sniff the type from magic bytes
+IMAGE_SIGNATURES = (
+    (b'\x89PNG', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF8', 'image/gif'),
+)
+
+
+def sniff_mimetype(path):
+    with open(path, 'rb') as f:
+        head = f.read(16)
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    return next((mimetype for magic, mimetype in IMAGE_SIGNATURES if head.startswith(magic)),
+                'application/octet-stream')
+
+
+# -----------------------------
+# Serve content-addressed images (MEDIA_STORAGE=local only)
+# -----------------------------
+@media_bp.route('/<path:public_id>', methods=['GET'])
+def get_media(public_id):
+    storage = upload_pipeline.storage
+    path = storage.path_for(public_id) if isinstance(storage, LocalStorage) else None
+    if not path:
+        return jsonify({'status': 'error', 'message': 'Media not found'}), 404
+    try:
+        # Content never changes for a given hash, so it can be cached forever
+        return send_file(path, mimetype=sniff_mimetype(path), max_age=31536000, conditional=True)
+    except FileNotFoundError:
+        return jsonify({'status': 'error', 'message': 'Media not found'}), 404
@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from sqlalchemy import event, inspect
+
+from app.models import User
+
+# Upper bound for TOKEN_CACHE_TTL: how long another worker may keep honouring
+# a deleted user or a token issued before a password change
+TOKEN_CACHE_MAX_TTL = 60
+
+# Lightweight, immutable stand-in for the User row handed to protected routes
+AuthenticatedUser = namedtuple('AuthenticatedUser', ['id', 'name', 'email'])
+
+
+class TokenCache:
+    """
+    Per-worker cache of verified tokens -> AuthenticatedUser.
+    A hit skips both the JWT decode and the users lookup. Entries live for a
+    short TTL (never past the token's own exp) and are dropped when the user
+    is deleted or changes password through the ORM.
+
+    Those evictions only reach the worker that made the change: every other
+    worker keeps accepting the user's cached tokens until they expire there.
+    That staleness is bounded by the TTL, which is therefore capped at
+    TOKEN_CACHE_MAX_TTL seconds.
+    """
+
+    def __init__(self, max_entries=10000, ttl_seconds=30):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # token -> (principal, expires_at)
+        self._tokens_by_user = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def init_app(self, app):
+        self.max_entries = app.config.get('TOKEN_CACHE_MAX_ENTRIES', self.max_entries)
+        self.ttl_seconds = min(app.config.get('TOKEN_CACHE_TTL', self.ttl_seconds), TOKEN_CACHE_MAX_TTL)
+        app.extensions['token_cache'] = self
+
+    def get(self, token):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[1] < time.time():
+                self._remove(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, token, principal, token_exp=None):
+        if self.max_entries <= 0:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+        with self._lock:
+            self._remove(token)
+            self._entries[token] = (principal, expires_at)
+            self._tokens_by_user.setdefault(principal.id, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                oldest_token = next(iter(self._entries))
+                self._remove(oldest_token)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._remove(token)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def _remove(self, token):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        user_tokens = self._tokens_by_user.get(entry[0].id)
+        if user_tokens is not None:
+            user_tokens.discard(token)
+            if not user_tokens:
+                del self._tokens_by_user[entry[0].id]
+
+
+token_cache = TokenCache()
+
+
+def principal_from_user(user):
+    return AuthenticatedUser(id=user.id, name=user.name, email=user.email)
+
+
+@event.listens_for(User, 'after_delete')
+def _invalidate_deleted_user(mapper, connection, target):
+    token_cache.invalidate_user(target.id)
+
+
+@event.listens_for(User, 'after_update')
+def _invalidate_on_password_change(mapper, connection, target):
+    if inspect(target).attrs.password_hash.history.has_changes():
+        token_cache.invalidate_user(target.id)
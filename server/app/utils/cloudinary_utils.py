@@ -13,9 +13,10 @@ cloudinary.config(
     secure=True
 )
 
-def upload_image(file, folder="exam-app"):
-    result = cloudinary.uploader.upload(file, folder=folder)
-    return {"url": result["secure_url"], "public_id": result["public_id"]}
+def upload_image(file, folder="exam-app", **options):
+    result = cloudinary.uploader.upload(file, folder=folder, **options)
+    # "existing" is only set by uploads with overwrite=False (None when absent)
+    return {"url": result["secure_url"], "public_id": result["public_id"], "existing": result.get("existing")}
 
-def delete_image(public_id):
-    return cloudinary.uploader.destroy(public_id)
+def delete_image(public_id, **options):
+    return cloudinary.uploader.destroy(public_id, **options)
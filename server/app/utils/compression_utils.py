@@ -0,0 +1,140 @@
+import gzip
+import threading
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional: br is simply not offered
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional: zstd is simply not offered
+    zstandard = None
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/plain', 'text/html', 'text/csv')
+
+
+class ResponseCompression:
+    """
+    Compresses response bodies with the best encoding the client accepts
+    (server preference zstd > br > gzip, among those installed). Small
+    bodies, streamed responses and non-text types are sent as they are.
+
+    Routes serving a cached body (the exam paper) call `compress_cached`
+    instead, so that each paper is compressed once per version and encoding
+    rather than once per request; the after_request hook then leaves the
+    already-encoded response alone.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.min_size = 1024
+        self.gzip_level = 6
+        self.brotli_quality = 5
+        self.zstd_level = 3
+        self.algorithms = ('zstd', 'br', 'gzip')
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.compressed = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def init_app(self, app):
+        self.enabled = app.config.get('COMPRESSION_ENABLED', self.enabled)
+        self.min_size = app.config.get('COMPRESSION_MIN_SIZE', self.min_size)
+        self.gzip_level = app.config.get('COMPRESSION_GZIP_LEVEL', self.gzip_level)
+        self.brotli_quality = app.config.get('COMPRESSION_BROTLI_QUALITY', self.brotli_quality)
+        self.zstd_level = app.config.get('COMPRESSION_ZSTD_LEVEL', self.zstd_level)
+        algorithms = app.config.get('COMPRESSION_ALGORITHMS') or ','.join(self.algorithms)
+        self.algorithms = tuple(
+            name for name in (part.strip() for part in algorithms.split(','))
+            if name == 'gzip' or (name == 'br' and brotli is not None) or (name == 'zstd' and zstandard is not None)
+        )
+        app.extensions['response_compression'] = self
+        if self.enabled:
+            app.after_request(self._after_request)
+
+    def negotiate(self, size):
+        """Encoding to use for a body of `size` bytes in this request, or None."""
+        if not self.enabled or size < self.min_size:
+            return None
+        accept = request.accept_encodings
+        for name in self.algorithms:
+            if accept.quality(name) > 0:
+                return name
+        return None
+
+    def compress(self, data, encoding):
+        if encoding == 'gzip':
+            return gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        if encoding == 'zstd':
+            # ZstdCompressor is not thread-safe: one per thread
+            compressor = getattr(self._local, 'zstd', None)
+            if compressor is None:
+                compressor = self._local.zstd = zstandard.ZstdCompressor(level=self.zstd_level)
+            return compressor.compress(data)
+        raise ValueError(f"unsupported encoding {encoding!r}")
+
+    def compress_cached(self, response, body, encoded):
+        """
+        Encode a cached body. `encoded(encoding)` returns the cached
+        compressed bytes for that encoding, compressing on first use.
+        """
+        response.vary.add('Accept-Encoding')
+        encoding = self.negotiate(len(body))
+        if encoding is None:
+            return response
+        data = encoded(encoding)
+        self._set_body(response, data, encoding)
+        self._record(encoding, len(body), len(data))
+        return response
+
+    def stats(self):
+        with self._lock:
+            return {
+                'algorithms': list(self.algorithms),
+                'responses': dict(self.compressed),
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+                'ratio': round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else None,
+            }
+
+    def _after_request(self, response):
+        if (response.status_code < 200 or response.status_code in (204, 206, 304)
+                or response.direct_passthrough or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+        body = response.get_data()
+        if len(body) < self.min_size:
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = self.negotiate(len(body))
+        if encoding is None:
+            return response
+        data = self.compress(body, encoding)
+        self._set_body(response, data, encoding)
+        self._record(encoding, len(body), len(data))
+        return response
+
+    def _set_body(self, response, data, encoding):
+        response.set_data(data)
+        response.headers['Content-Encoding'] = encoding
+        # Each encoding is a different representation: a strong ETag must not
+        # be shared across them. Weak still matches If-None-Match.
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+
+    def _record(self, encoding, size_in, size_out):
+        with self._lock:
+            self.compressed[encoding] = self.compressed.get(encoding, 0) + 1
+            self.bytes_in += size_in
+            self.bytes_out += size_out
+
+
+response_compression = ResponseCompression()
@@ -0,0 +1,153 @@
+import logging
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            db_pool.record_timeout(time.perf_counter() - start)
+            raise
+        db_pool.record_checkout(time.perf_counter() - start, self)
+        return connection
+
+
+class DatabasePool:
+    """
+    Builds SQLALCHEMY_ENGINE_OPTIONS from the DB_* settings (pool size,
+    overflow, recycle, pre-ping, statement timeout) and records pool
+    checkout waits, so connection starvation during exam peaks shows up in
+    /health instead of as slow requests.
+
+    Every gunicorn worker has its own pool: keep
+    workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) below the server's (or
+    PgBouncer's) connection limit.
+
+    With DB_PGBOUNCER (transaction pooling) no session state may outlive a
+    transaction, so the statement timeout is applied with SET LOCAL at the
+    start of each transaction rather than as a connection startup option,
+    and drivers that prepare statements server-side are told not to.
+    psycopg2 never does, so nothing else changes for it.
+    """
+
+    def __init__(self, slow_checkout_ms=100, window=1000):
+        self.slow_checkout_ms = slow_checkout_ms
+        self.pgbouncer = False
+        self.statement_timeout_ms = 0
+        self._waits = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._pool = None
+        self._listening = False
+        self.checkouts = 0
+        self.slow_checkouts = 0
+        self.timeouts = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    def init_app(self, app):
+        """Call before db.init_app(app): Flask-SQLAlchemy creates the engine there."""
+        self.slow_checkout_ms = app.config.get('DB_POOL_SLOW_CHECKOUT_MS', self.slow_checkout_ms)
+        self.pgbouncer = app.config.get('DB_PGBOUNCER', False)
+        self.statement_timeout_ms = app.config.get('DB_STATEMENT_TIMEOUT_MS', 0)
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = self.engine_options(app.config)
+        app.extensions['db_pool'] = self
+
+        if self.pgbouncer and self.statement_timeout_ms and not self._listening:
+            event.listen(Engine, 'begin', self._set_local_statement_timeout)
+            self._listening = True
+
+    def engine_options(self, config):
+        """Pool options for the configured URL; explicit SQLALCHEMY_ENGINE_OPTIONS win."""
+        configured = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+        uri = config.get('SQLALCHEMY_DATABASE_URI')
+        if not uri:
+            return configured
+        url = make_url(uri)
+        if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+            return configured  # in-memory SQLite needs its single shared connection
+
+        options = {
+            'poolclass': InstrumentedQueuePool,
+            'pool_size': config.get('DB_POOL_SIZE', 5),
+            'max_overflow': config.get('DB_MAX_OVERFLOW', 10),
+            'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+            'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),
+            'pool_pre_ping': config.get('DB_POOL_PRE_PING', True),
+        }
+        connect_args = {}
+        if url.get_backend_name() == 'postgresql':
+            timeout = config.get('DB_STATEMENT_TIMEOUT_MS', 0)
+            if timeout and not config.get('DB_PGBOUNCER', False):
+                connect_args['options'] = f'-c statement_timeout={int(timeout)}'
+            if config.get('DB_PGBOUNCER', False) and url.get_driver_name() == 'psycopg':
+                connect_args['prepare_threshold'] = None
+        connect_args.update(configured.pop('connect_args', {}))
+        if connect_args:
+            options['connect_args'] = connect_args
+        options.update(configured)
+        return options
+
+    def record_checkout(self, seconds, pool):
+        wait_ms = seconds * 1000
+        with self._lock:
+            self._pool = pool
+            self.checkouts += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            self._waits.append(wait_ms)
+            slow = wait_ms >= self.slow_checkout_ms
+            if slow:
+                self.slow_checkouts += 1
+        if slow:
+            logger.warning("Waited %.0f ms for a database connection (%s)", wait_ms, pool.status())
+
+    def record_timeout(self, seconds):
+        with self._lock:
+            self.timeouts += 1
+        logger.error("Gave up waiting for a database connection after %.1f s", seconds)
+
+    def stats(self):
+        with self._lock:
+            waits = sorted(self._waits)
+            pool = self._pool
+            stats = {
+                'checkouts': self.checkouts,
+                'slow_checkouts': self.slow_checkouts,
+                'timeouts': self.timeouts,
+                'avg_wait_ms': round(self.total_wait_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                'p95_wait_ms': round(waits[int(len(waits) * 0.95)], 3) if waits else 0.0,
+                'max_wait_ms': round(self.max_wait_ms, 3),
+            }
+        if pool is not None:
+            stats.update({
+                'pool_size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'overflow': max(pool.overflow(), 0),
+            })
+        return stats
+
+    def reset_stats(self):
+        with self._lock:
+            self._waits.clear()
+            self.checkouts = self.slow_checkouts = self.timeouts = 0
+            self.total_wait_ms = self.max_wait_ms = 0.0
+
+    def _set_local_statement_timeout(self, conn):
+        if self.pgbouncer and self.statement_timeout_ms and conn.dialect.name == 'postgresql':
+            conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(self.statement_timeout_ms)}")
+
+
+db_pool = DatabasePool()
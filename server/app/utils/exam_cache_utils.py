@@ -0,0 +1,190 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from app.models import ExaminerCreatedExam
+from app.utils.serializer_utils import EXAM_PAPER
+from app.utils.http_cache_utils import payload_etag
+from app.utils.compression_utils import response_compression
+
+
+class ExamPaperCache:
+    """
+    Per-worker LRU cache of serialized exam papers keyed by exam_code.
+    Stores the final JSON bytes so repeated joins skip the DB and jsonify.
+    Bounded by entry count and total bytes. Every entry carries the exam's
+    last_modified (updated_at, bumped by update_exam): callers pass the
+    current value, read with the exam row, and an entry for an older version
+    is a miss, so an edit made through another worker is seen at once. The
+    TTL only bounds how long an unused entry lingers. Compressed variants of the body (gzip/br/zstd) are kept with the entry
+    and count towards max_bytes.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024, ttl_seconds=300):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        # exam_code -> (exam_id, body, expires_at, paper, etag, last_modified, {encoding: bytes})
+        self._entries = OrderedDict()
+        self._codes_by_exam_id = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def init_app(self, app):
+        self.max_entries = app.config.get('EXAM_PAPER_CACHE_MAX_ENTRIES', self.max_entries)
+        self.max_bytes = app.config.get('EXAM_PAPER_CACHE_MAX_BYTES', self.max_bytes)
+        self.ttl_seconds = app.config.get('EXAM_PAPER_CACHE_TTL', self.ttl_seconds)
+        app.extensions['exam_paper_cache'] = self
+
+    def get(self, exam_code, last_modified):
+        """(body, etag, last_modified) of the cached paper at that version, or None."""
+        with self._lock:
+            entry = self._entries.get(exam_code)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[2] < time.monotonic() or entry[5] != last_modified:
+                self._remove(exam_code)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(exam_code)
+            self.hits += 1
+            return entry[1], entry[4], entry[5]
+
+    def get_paper(self, exam_id, updated_at):
+        """
+        Structured paper (exam_data dict) for an exam_id, or None. A paper
+        cached before `updated_at` is stale (None: the exam was never edited).
+        """
+        with self._lock:
+            exam_code = self._codes_by_exam_id.get(str(exam_id))
+            entry = self._entries.get(exam_code) if exam_code is not None else None
+            if (entry is None or entry[2] < time.monotonic()
+                    or (updated_at is not None and entry[5] != updated_at)):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(exam_code)
+            self.hits += 1
+            return entry[3]
+
+    def set(self, exam_code, exam_id, body, paper=None, etag=None, last_modified=None):
+        if self.max_entries <= 0 or len(body) > self.max_bytes:
+            return
+        exam_id = str(exam_id)
+        with self._lock:
+            self._remove(exam_code)
+            self._entries[exam_code] = (
+                exam_id, body, time.monotonic() + self.ttl_seconds, paper, etag, last_modified, {}
+            )
+            self._codes_by_exam_id[exam_id] = exam_code
+            self._size += len(body)
+            self._evict()
+
+    def get_encoded(self, exam_code, body, encoding):
+        """
+        `body` compressed with `encoding`: compressed on first request and
+        kept with the cache entry, so a paper is compressed once per version.
+        """
+        with self._lock:
+            entry = self._entries.get(exam_code)
+            if entry is not None and entry[1] is body:
+                data = entry[6].get(encoding)
+                if data is not None:
+                    return data
+        data = response_compression.compress(body, encoding)
+        with self._lock:
+            entry = self._entries.get(exam_code)
+            if entry is not None and entry[1] is body and encoding not in entry[6]:
+                entry[6][encoding] = data
+                self._size += len(data)
+                self._evict()
+        return data
+
+    def invalidate_exam(self, exam_id):
+        """Drop the cached paper for an exam (call after update/delete)."""
+        with self._lock:
+            exam_code = self._codes_by_exam_id.get(str(exam_id))
+            if exam_code is not None:
+                self._remove(exam_code)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._codes_by_exam_id.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def _remove(self, exam_code):
+        entry = self._entries.pop(exam_code, None)
+        if entry is None:
+            return
+        self._size -= len(entry[1]) + sum(len(data) for data in entry[6].values())
+        if self._codes_by_exam_id.get(entry[0]) == exam_code:
+            del self._codes_by_exam_id[entry[0]]
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._size > self.max_bytes):
+            oldest_code = next(iter(self._entries))
+            self._remove(oldest_code)
+            self.evictions += 1
+
+
+exam_paper_cache = ExamPaperCache()
+
+
+def build_exam_paper(exam):
+    """Exam + questions as served to examinees by enter-exam-code."""
+    return EXAM_PAPER(exam)
+
+
+def exam_last_modified(exam):
+    return exam.updated_at or exam.created_at
+
+
+def exam_paper_etag(exam, kind='exam_paper'):
+    """ETag of an exam's paper; update_exam bumps updated_at, which changes it."""
+    return payload_etag(kind, EXAM_PAPER.fingerprint, exam.exam_id, exam_last_modified(exam))
+
+
+def compile_exam_paper(exam):
+    """Build, serialize and cache an exam paper. Returns (exam_data, body)."""
+    exam_data = build_exam_paper(exam)
+    body = (current_app.json.dumps({
+        'status': "success",
+        'message': 'Got Exam successfully',
+        'exam_data': exam_data
+    }) + "\n").encode('utf-8')
+    exam_paper_cache.set(
+        exam.exam_code, exam.exam_id, body, exam_data, exam_paper_etag(exam), exam_last_modified(exam)
+    )
+    return exam_data, body
+
+
+def load_exam_paper(exam_id, updated_at):
+    """
+    Structured exam paper by exam_id, from the cache or the DB. None if
+    missing. `updated_at` is the exam's current version (AnswerKey.version).
+    """
+    exam_data = exam_paper_cache.get_paper(exam_id, updated_at)
+    if exam_data is not None:
+        return exam_data
+    exam = ExaminerCreatedExam.query.filter_by(exam_id=exam_id).first()
+    if not exam:
+        return None
+    exam_data, _ = compile_exam_paper(exam)
+    return exam_data
@@ -0,0 +1,155 @@
+import hashlib
+import hmac
+import threading
+
+from sqlalchemy.exc import IntegrityError
+
+from app.config import FALLBACK_SECRET_KEY
+from app.models import db, ExamCodeCounter
+
+# Safe alphabet: digits + uppercase without the ambiguous 0, O, 1, I, L
+ALPHABET = "23456789ABCDEFGHJKMNPQRSTUVWXYZ"
+CODE_LENGTH = 8
+CODE_SPACE = len(ALPHABET) ** CODE_LENGTH  # 31^8 ~= 8.5e11 codes
+
+COUNTER_NAME = 'exam_code'
+
+
+class ExamCodeExhausted(Exception):
+    pass
+
+
+class FeistelPermutation:
+    """
+    Keyed bijection on [0, domain): a balanced Feistel network over the
+    smallest even bit width covering the domain, with cycle walking to stay
+    inside it. Consecutive inputs map to unrelated-looking outputs, and
+    distinct inputs always map to distinct outputs.
+    """
+
+    def __init__(self, key, domain=CODE_SPACE, rounds=8):
+        if isinstance(key, str):
+            key = key.encode()
+        self.key = key
+        self.domain = domain
+        self.rounds = rounds
+        bits = max((domain - 1).bit_length(), 2)
+        self.half_bits = (bits + 1) // 2
+        self.half_mask = (1 << self.half_bits) - 1
+
+    def permute(self, value):
+        self._check(value)
+        value = self._encrypt(value)
+        while value >= self.domain:
+            value = self._encrypt(value)
+        return value
+
+    def invert(self, value):
+        self._check(value)
+        value = self._decrypt(value)
+        while value >= self.domain:
+            value = self._decrypt(value)
+        return value
+
+    def _encrypt(self, value):
+        left, right = value >> self.half_bits, value & self.half_mask
+        for r in range(self.rounds):
+            left, right = right, left ^ self._round(r, right)
+        return (left << self.half_bits) | right
+
+    def _decrypt(self, value):
+        left, right = value >> self.half_bits, value & self.half_mask
+        for r in reversed(range(self.rounds)):
+            left, right = right ^ self._round(r, left), left
+        return (left << self.half_bits) | right
+
+    def _round(self, r, half):
+        digest = hmac.new(self.key, bytes((r,)) + half.to_bytes(8, 'big'), hashlib.blake2b).digest()
+        return int.from_bytes(digest[:8], 'big') & self.half_mask
+
+    def _check(self, value):
+        if not 0 <= value < self.domain:
+            raise ValueError(f"value {value} outside [0, {self.domain})")
+
+
+def format_exam_code(value):
+    """Index in the code space -> readable code like X7B9-2K3M."""
+    chars = []
+    for _ in range(CODE_LENGTH):
+        value, digit = divmod(value, len(ALPHABET))
+        chars.append(ALPHABET[digit])
+    code = ''.join(reversed(chars))
+    return f"{code[:4]}-{code[4:]}"
+
+
+class ExamCodeAllocator:
+    """
+    Hands out exam codes without query-until-unique loops. Each code is
+    format_exam_code(permutation(n)) for a sequence number n, so codes look
+    random but can never collide. Sequence numbers come from the
+    exam_code_counters row: a worker reserves a block of them with one
+    atomic UPDATE ... RETURNING in its own transaction, then serves the
+    block from memory. Numbers of a block left unused when a worker exits
+    are simply skipped.
+
+    The key (EXAM_CODE_KEY; SECRET_KEY only in debug) fixes the permutation;
+    it must never change once codes have been issued. Anyone holding it can
+    enumerate the codes, so the app refuses to start on a missing or public
+    key outside debug.
+    """
+
+    def __init__(self, key=FALLBACK_SECRET_KEY, block_size=64):
+        self.permutation = FeistelPermutation(key)
+        self.block_size = block_size
+        self._next = 0
+        self._end = 0
+        self._lock = threading.Lock()
+        self.blocks_reserved = 0
+
+    def init_app(self, app):
+        key = app.config.get('EXAM_CODE_KEY')
+        if not key and app.debug:
+            key = app.config['SECRET_KEY']
+        if not app.debug and (not key or key == FALLBACK_SECRET_KEY):
+            raise ValueError("EXAM_CODE_KEY is not configured")
+        self.permutation = FeistelPermutation(key)
+        self.block_size = app.config.get('EXAM_CODE_BLOCK_SIZE', self.block_size)
+        self._next = self._end = 0
+        app.extensions['exam_code_allocator'] = self
+
+    def allocate(self):
+        with self._lock:
+            if self._next >= self._end:
+                self._next, self._end = self._reserve_block()
+            value = self._next
+            self._next += 1
+        return format_exam_code(self.permutation.permute(value))
+
+    def _reserve_block(self):
+        counter = ExamCodeCounter
+        bump = (
+            db.update(counter)
+            .where(counter.name == COUNTER_NAME)
+            .values(next_value=counter.next_value + self.block_size)
+            .returning(counter.next_value)
+        )
+        while True:
+            # Separate transaction: the reservation survives a rolled back request
+            try:
+                with db.engine.begin() as conn:
+                    end = conn.execute(bump).scalar()
+                    if end is None:
+                        end = self.block_size
+                        conn.execute(db.insert(counter).values(name=COUNTER_NAME, next_value=end))
+            except IntegrityError:
+                continue  # another worker created the row first
+            break
+
+        start = end - self.block_size
+        if end > CODE_SPACE:
+            raise ExamCodeExhausted("Exam code space exhausted")
+        self.blocks_reserved += 1
+        return start, end
+
+
+exam_code_allocator = ExamCodeAllocator()
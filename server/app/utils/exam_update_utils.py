@@ -0,0 +1,124 @@
+import uuid
+from collections import namedtuple
+from datetime import datetime
+
+from app.models import db, ExaminerCreatedExamQuestion
+from app.models.examinerModels.createExamModels import QUESTION_IMAGE_ID_COLUMNS
+from app.utils.media_gc_utils import enqueue_media_deletion
+
+OPTION_KEYS = ("A", "B", "C", "D")
+
+# Columns an examiner can edit through update-exam
+QUESTION_FIELDS = (
+    'question_text', 'question_image_url', 'question_image_id', 'question_order', 'marks',
+    'optA_text', 'optA_image_url', 'optA_image_id',
+    'optB_text', 'optB_image_url', 'optB_image_id',
+    'optC_text', 'optC_image_url', 'optC_image_id',
+    'optD_text', 'optD_image_url', 'optD_image_id',
+    'correct_answer',
+)
+
+QuestionDiff = namedtuple('QuestionDiff', ['inserts', 'updates', 'deletes', 'unchanged', 'released_image_ids'])
+
+
+def question_values(index, q_data, uploads):
+    """
+    Field values for the index-th submitted question. `uploads` holds the
+    already-uploaded question_<n>_image / question_<n>_opt<X>_image files
+    (see UploadPipeline); without a new file the submitted image URL/ID is kept.
+    """
+    values = {
+        'question_text': q_data.get('question_text', ''),
+        'question_image_url': q_data.get('question_image_url') or None,
+        'question_image_id': q_data.get('question_image_id') or None,
+        'question_order': q_data.get('question_order', index + 1),
+        'marks': q_data.get('marks', 1.0),
+        'correct_answer': q_data.get('correct_answer', ''),
+    }
+
+    upload_result = uploads.get(f"question_{index + 1}_image")
+    if upload_result:
+        values['question_image_url'] = upload_result["url"]
+        values['question_image_id'] = upload_result["public_id"]
+
+    for opt_key in OPTION_KEYS:
+        values[f"opt{opt_key}_text"] = q_data.get(f"opt{opt_key}_text", '')
+        upload_result = uploads.get(f"question_{index + 1}_opt{opt_key}_image")
+        if upload_result:
+            values[f"opt{opt_key}_image_url"] = upload_result["url"]
+            values[f"opt{opt_key}_image_id"] = upload_result["public_id"]
+        else:
+            values[f"opt{opt_key}_image_url"] = q_data.get(f"opt{opt_key}_image_url") or None
+            values[f"opt{opt_key}_image_id"] = q_data.get(f"opt{opt_key}_image_id") or None
+
+    return values
+
+
+def diff_exam_questions(exam_id, questions_payload, uploads):
+    """
+    Match submitted questions to stored ones by question_id.
+    Unknown or missing ids become inserts, stored questions that were not
+    submitted become deletes, and matches only carry the fields that changed.
+    Image ids that are replaced or deleted are returned for deferred deletion.
+    """
+    question = ExaminerCreatedExamQuestion
+    stored = {
+        str(row.question_id): row._mapping
+        for row in db.session.execute(
+            db.select(question.question_id, *(getattr(question, field) for field in QUESTION_FIELDS))
+            .where(question.exam_id == exam_id)
+        )
+    }
+
+    now = datetime.utcnow()
+    inserts, updates, seen, released = [], [], set(), set()
+    unchanged = 0
+    for index, q_data in enumerate(questions_payload):
+        values = question_values(index, q_data, uploads)
+        question_id = str(q_data.get('question_id') or '')
+        current = stored.get(question_id)
+
+        if current is None or question_id in seen:
+            inserts.append({
+                'question_id': uuid.uuid4(), 'exam_id': exam_id,
+                'created_at': now, 'updated_at': now, **values
+            })
+            continue
+
+        seen.add(question_id)
+        changed = {field: value for field, value in values.items() if current[field] != value}
+        released.update(current[field] for field in QUESTION_IMAGE_ID_COLUMNS if field in changed)
+        if changed:
+            updates.append({'question_id': current['question_id'], 'updated_at': now, **changed})
+        else:
+            unchanged += 1
+
+    deletes = []
+    for question_id, row in stored.items():
+        if question_id not in seen:
+            deletes.append(row['question_id'])
+            released.update(row[field] for field in QUESTION_IMAGE_ID_COLUMNS)
+    return QuestionDiff(inserts, updates, deletes, unchanged, released)
+
+
+def apply_question_diff(diff):
+    """Write a QuestionDiff with one executemany per statement kind (no commit)."""
+    question = ExaminerCreatedExamQuestion
+    if diff.deletes:
+        db.session.execute(
+            db.delete(question).where(question.question_id.in_(diff.deletes)),
+            execution_options={'synchronize_session': False}
+        )
+    if diff.updates:
+        # ORM bulk UPDATE by primary key; rows with the same changed columns share a batch
+        db.session.execute(db.update(question), diff.updates)
+    if diff.inserts:
+        db.session.execute(db.insert(question), diff.inserts)
+    # Old images may still be used elsewhere; the media GC checks before deleting
+    enqueue_media_deletion(diff.released_image_ids, 'question_updated')
+    return {
+        'inserted': len(diff.inserts),
+        'updated': len(diff.updates),
+        'deleted': len(diff.deletes),
+        'unchanged': diff.unchanged,
+    }
@@ -0,0 +1,225 @@
+import csv
+import io
+import itertools
+import re
+import zipfile
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+from sqlalchemy import func
+
+from app.models import db, User, ExamineeAttemptExams, ExamineeAttemptExamQuestions
+from app.utils.leaderboard_utils import LEADERBOARD_ORDER
+
+# Excel's sheet limit, header row included
+XLSX_MAX_ROWS = 1048576
+
+EXPORT_FORMATS = ('csv', 'xlsx')
+
+# (header, column) per exported attempt field, in leaderboard order
+ATTEMPT_EXPORT_COLUMNS = (
+    ('Examinee', User.name),
+    ('Email', User.email),
+    ('Attempt ID', ExamineeAttemptExams.attempt_exam_id),
+    ('Score', ExamineeAttemptExams.score),
+    ('Total Marks', ExamineeAttemptExams.total_marks),
+    ('Correct', ExamineeAttemptExams.correct_answers),
+    ('Wrong', ExamineeAttemptExams.wrong_answers),
+    ('Unanswered', ExamineeAttemptExams.unanswered_questions),
+    ('Total Questions', ExamineeAttemptExams.total_questions),
+    ('Time Taken (s)', ExamineeAttemptExams.time_taken_seconds),
+    ('Submitted At', ExamineeAttemptExams.created_at),
+)
+
+_ILLEGAL_XML_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def count_attempts(exam_id):
+    return db.session.scalar(
+        db.select(func.count()).select_from(ExamineeAttemptExams).where(ExamineeAttemptExams.exam_id == exam_id)
+    )
+
+
+def attempt_export_rows(exam_id, include_answers=False, batch_size=1000):
+    """
+    Header row, then one row per attempt in leaderboard order (rank first).
+    Rows come from a server-side cursor `batch_size` at a time, so memory
+    does not grow with the number of attempts.
+
+    With include_answers each row also gets "Qn Answer" / "Qn Correct" for
+    every question snapshot, in submission order. Answers come from the same
+    streamed statement (attempts outer-joined to their question rows), not
+    one query per attempt.
+    """
+    columns = [column for _, column in ATTEMPT_EXPORT_COLUMNS]
+    header = ['Rank'] + [name for name, _ in ATTEMPT_EXPORT_COLUMNS]
+    attempt = ExamineeAttemptExams
+
+    if not include_answers:
+        stmt = (
+            db.select(*columns)
+            .outerjoin(User, User.id == attempt.examinee_id)
+            .where(attempt.exam_id == exam_id)
+            .order_by(*LEADERBOARD_ORDER)
+            .execution_options(yield_per=batch_size)
+        )
+        yield header
+        for rank, row in enumerate(db.session.execute(stmt), start=1):
+            yield [rank, *row]
+        return
+
+    question_count = db.session.scalar(
+        db.select(func.max(attempt.total_questions)).where(attempt.exam_id == exam_id)
+    ) or 0
+    question = ExamineeAttemptExamQuestions
+    stmt = (
+        db.select(*columns, question.selected_option_label, question.is_correct)
+        .outerjoin(User, User.id == attempt.examinee_id)
+        .outerjoin(question, question.attempt_exam_id == attempt.attempt_exam_id)
+        .where(attempt.exam_id == exam_id)
+        .order_by(*LEADERBOARD_ORDER, question.created_at)
+        .execution_options(yield_per=batch_size)
+    )
+    for n in range(1, question_count + 1):
+        header += [f'Q{n} Answer', f'Q{n} Correct']
+    yield header
+
+    width = len(columns)
+    attempt_id_index = header.index('Attempt ID') - 1  # header has Rank first
+    grouped = itertools.groupby(db.session.execute(stmt), key=lambda row: row[attempt_id_index])
+    for rank, (_, rows) in enumerate(grouped, start=1):
+        rows = list(rows)  # one attempt's questions
+        answers = []
+        for row in rows:
+            if row[width + 1] is not None:  # attempt without question rows
+                answers += [row[width] or '', row[width + 1]]
+        yield [rank, *rows[0][:width], *answers]
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ', timespec='seconds')
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, str) and value[:1] in ('=', '+', '-', '@', '\t', '\r'):
+        return "'" + value  # spreadsheet formula injection
+    return value
+
+
+def csv_stream(rows, chunk_size=64 * 1024):
+    """CSV bytes (UTF-8 with BOM, so Excel detects the encoding) in ~chunk_size pieces."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in row])
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+class _ChunkSink(io.RawIOBase):
+    """Unseekable file object that collects what ZipFile writes until drained."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+_XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def _xlsx_cell(value):
+    if value is None:
+        return '<c/>'
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c><v>{value!r}</v></c>'
+    if isinstance(value, datetime):
+        value = value.isoformat(sep=' ', timespec='seconds')
+    text = escape(_ILLEGAL_XML_CHARS.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def xlsx_stream(rows, sheet_name='Results', chunk_size=64 * 1024):
+    """
+    Minimal single-sheet XLSX written as it streams: the zip is built on
+    the fly (data descriptors, no seeking) and the sheet uses inline
+    strings, so no row is kept after it is written. Callers must keep
+    rows within XLSX_MAX_ROWS (and the sheet XML under 4 GB; no zip64).
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, xml in _XLSX_PARTS.items():
+            archive.writestr(name, xml)
+        archive.writestr('xl/workbook.xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets><sheet name="{escape(sheet_name[:31], {chr(34): "&quot;"})}" sheetId="1" r:id="rId1"/></sheets>'
+            '</workbook>'
+        ))
+        yield sink.drain()
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w') as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            pending = []
+            pending_size = 0
+            for row in rows:
+                xml = '<row>' + ''.join(_xlsx_cell(value) for value in row) + '</row>'
+                pending.append(xml)
+                pending_size += len(xml)
+                if pending_size >= chunk_size:
+                    sheet.write(''.join(pending).encode('utf-8'))
+                    pending.clear()
+                    pending_size = 0
+                    data = sink.drain()
+                    if data:
+                        yield data
+            sheet.write(''.join(pending).encode('utf-8') + b'</sheetData></worksheet>')
+    yield sink.drain()
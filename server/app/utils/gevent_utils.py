@@ -0,0 +1,49 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+
+def gevent_active():
+    """True inside a gevent worker (threading monkey-patched to greenlets)."""
+    monkey = sys.modules.get('gevent.monkey')
+    return monkey is not None and monkey.is_module_patched('threading')
+
+
+def cpu_executor(max_workers, thread_name_prefix=''):
+    """
+    Executor for CPU-bound work. Under gevent a patched ThreadPoolExecutor
+    runs its jobs as greenlets, which would block the worker's event loop;
+    gevent's own executor runs them on real OS threads instead.
+    """
+    if gevent_active():
+        from gevent.threadpool import ThreadPoolExecutor as GeventThreadPoolExecutor
+        return GeventThreadPoolExecutor(max_workers=max_workers)
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+
+
+def patch_psycopg():
+    """
+    Make psycopg2 yield to the gevent hub while waiting on Postgres instead
+    of blocking the whole worker (the psycogreen wait callback).
+    Returns False when psycopg2 is not installed (e.g. SQLite in development).
+    """
+    try:
+        import psycopg2
+        from psycopg2 import extensions
+    except ImportError:
+        return False
+    from gevent.socket import wait_read, wait_write
+
+    def gevent_wait_callback(conn, timeout=None):
+        while True:
+            state = conn.poll()
+            if state == extensions.POLL_OK:
+                break
+            elif state == extensions.POLL_READ:
+                wait_read(conn.fileno(), timeout=timeout)
+            elif state == extensions.POLL_WRITE:
+                wait_write(conn.fileno(), timeout=timeout)
+            else:
+                raise psycopg2.OperationalError(f"Bad result from poll: {state!r}")
+
+    extensions.set_wait_callback(gevent_wait_callback)
+    return True
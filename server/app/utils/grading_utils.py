@@ -0,0 +1,161 @@
+import threading
+import uuid
+from array import array
+from collections import OrderedDict
+from itertools import compress
+from operator import eq
+
+from app.models import db, ExaminerCreatedExam, ExaminerCreatedExamQuestion
+
+
+class AnswerKey:
+    """
+    Compact, immutable answer key for one exam: parallel vectors of
+    question ids, correct labels and marks in question order. `version` is
+    the exam's updated_at when the key was loaded.
+    """
+    __slots__ = ('exam_id', 'question_ids', 'labels', 'marks', 'positions', 'negative_marks_value', 'version')
+
+    def __init__(self, exam_id, question_ids, labels, marks, negative_marks_value, version=None):
+        self.exam_id = exam_id
+        self.version = version
+        self.question_ids = tuple(question_ids)
+        self.labels = tuple(labels)
+        self.marks = array('d', marks)
+        self.positions = {qid: i for i, qid in enumerate(self.question_ids)}
+        self.negative_marks_value = negative_marks_value or 0.0
+
+    def __len__(self):
+        return len(self.question_ids)
+
+    def grade(self, answers):
+        """
+        Score a {question_id: label} map against the key.
+        Unknown question ids are ignored; missing/blank labels are unanswered.
+        """
+        selected = [answers.get(qid) or None for qid in self.question_ids]
+        answered = [label is not None for label in selected]
+        correct = [is_answered and is_match for is_answered, is_match in zip(answered, map(eq, selected, self.labels))]
+
+        correct_count = sum(correct)
+        answered_count = sum(answered)
+        wrong_count = answered_count - correct_count
+        score = sum(compress(self.marks, correct)) - self.negative_marks_value * wrong_count
+
+        return GradeResult(
+            selected=selected,
+            correct=correct,
+            score=round(score, 4),
+            correct_count=correct_count,
+            wrong_count=wrong_count,
+            unanswered_count=len(selected) - answered_count
+        )
+
+
+class GradeResult:
+    __slots__ = ('selected', 'correct', 'score', 'correct_count', 'wrong_count', 'unanswered_count')
+
+    def __init__(self, selected, correct, score, correct_count, wrong_count, unanswered_count):
+        self.selected = selected
+        self.correct = correct
+        self.score = score
+        self.correct_count = correct_count
+        self.wrong_count = wrong_count
+        self.unanswered_count = unanswered_count
+
+
+def load_answer_key(exam_id):
+    """Build the answer key from the DB with two narrow queries. None if the exam is missing."""
+    exam = db.session.execute(
+        db.select(ExaminerCreatedExam.negative_marks_value, ExaminerCreatedExam.updated_at)
+        .where(ExaminerCreatedExam.exam_id == exam_id)
+    ).first()
+    if exam is None:
+        return None
+
+    question = ExaminerCreatedExamQuestion
+    rows = db.session.execute(
+        db.select(question.question_id, question.correct_answer, question.marks)
+        .where(question.exam_id == exam_id)
+        .order_by(question.question_order, question.created_at)
+    ).all()
+    return AnswerKey(
+        exam_id,
+        [str(row[0]) for row in rows],
+        [row[1] for row in rows],
+        [row[2] if row[2] is not None else 1.0 for row in rows],
+        exam.negative_marks_value,
+        exam.updated_at
+    )
+
+
+def exam_version(exam_id):
+    """The exam's updated_at (primary-key lookup); False if the exam is gone."""
+    row = db.session.execute(
+        db.select(ExaminerCreatedExam.updated_at).where(ExaminerCreatedExam.exam_id == exam_id)
+    ).first()
+    return False if row is None else row[0]
+
+
+class AnswerKeyCache:
+    """
+    Per-worker LRU of AnswerKey objects keyed by exam_id. update_exam bumps
+    the exam's updated_at, so every hit is checked against it (one
+    primary-key SELECT instead of two queries over the questions) and the
+    key is reloaded when it differs: an edit made through another worker is
+    seen by the next submit. invalidate() only frees the local entry early.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # exam_id -> answer_key
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        self.max_entries = app.config.get('ANSWER_KEY_CACHE_MAX_ENTRIES', self.max_entries)
+        app.extensions['answer_key_cache'] = self
+
+    def get(self, exam_id):
+        exam_id = str(exam_id)
+        with self._lock:
+            cached = self._entries.get(exam_id)
+
+        if cached is not None:
+            version = exam_version(uuid.UUID(exam_id))
+            if version is False:
+                self.invalidate(exam_id)
+                return None
+            if version == cached.version:
+                with self._lock:
+                    if exam_id in self._entries:
+                        self._entries.move_to_end(exam_id)
+                    self.hits += 1
+                return cached
+
+        with self._lock:
+            self.misses += 1
+        answer_key = load_answer_key(uuid.UUID(exam_id))
+        if answer_key is not None and self.max_entries > 0:
+            with self._lock:
+                self._entries[exam_id] = answer_key
+                self._entries.move_to_end(exam_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return answer_key
+
+    def invalidate(self, exam_id):
+        with self._lock:
+            self._entries.pop(str(exam_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+answer_key_cache = AnswerKeyCache()
@@ -0,0 +1,37 @@
+import hashlib
+
+from flask import current_app, request
+from werkzeug.http import is_resource_modified
+
+
+def payload_etag(*parts):
+    """
+    Strong ETag for one version of a payload, from what identifies it:
+    the response shape's fingerprint, the row id and its updated_at /
+    created_at. Computable from the parent row alone, so a matching
+    If-None-Match is answered before any question rows are loaded.
+    """
+    key = "\x1f".join("" if part is None else str(part) for part in parts)
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def not_modified(etag, last_modified=None, cache_control=None):
+    """
+    304 response when the request's If-None-Match / If-Modified-Since
+    match, else None. Only GET and HEAD are answered with 304.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        return None
+    return with_validators(current_app.response_class(status=304), etag, last_modified, cache_control)
+
+
+def with_validators(response, etag, last_modified=None, cache_control=None):
+    """Set ETag, Last-Modified (naive datetimes are UTC) and Cache-Control on a response."""
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    if cache_control:
+        response.headers['Cache-Control'] = cache_control
+    return response
@@ -0,0 +1,262 @@
+import cProfile
+import logging
+import os
+import random
+import re
+import threading
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+from app.models import db
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+SERIALIZE_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram, one series per label tuple."""
+
+    def __init__(self, name, help_text, buckets, labels=('endpoint', 'method')):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.labels = labels
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+
+    def observe(self, label_values, value):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, series in sorted(self._series.items()):
+            labels = _labels(self.labels, label_values)
+            for bound, count in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound:g}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {series[-1]}')
+            lines.append(f"{self.name}_sum{{{labels}}} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {series[-1]}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=('endpoint', 'method')):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = {}
+
+    def inc(self, label_values, amount=1):
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{{{_labels(self.labels, label_values)}}} {value}")
+        return lines
+
+
+class RequestInstrumentation:
+    """
+    Per-request SQL and serialization accounting. Cursor events on the app's
+    engine count statements, DB time and rows (as reported by the driver;
+    psycopg2 reports SELECT rows, SQLite does not); app.json.dumps is timed
+    for serialization. Totals go to per-endpoint histograms rendered at
+    /metrics in Prometheus text format (per worker, like the other stats),
+    and to X-SQL-* / Server-Timing response headers when
+    METRICS_RESPONSE_HEADERS is on (the default in debug only).
+
+    With PROFILE_SLOW_REQUEST_MS set, a PROFILE_SAMPLE_RATE share of
+    requests run under cProfile (one at a time per worker); those slower
+    than the threshold are dumped to PROFILE_DIR for `snakeviz`/`pstats`.
+    Work done while a streamed response body is being sent is not counted.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.response_headers = False
+        self.slow_request_ms = 0
+        self.sample_rate = 0.1
+        self.profile_dir = 'profiles'
+        self.max_profiles = 200
+        self._profile_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._instrumented_engines = set()
+        self.request_duration = Histogram(
+            'examapp_request_duration_seconds', 'Request handling time.', DURATION_BUCKETS)
+        self.sql_queries = Histogram(
+            'examapp_request_sql_queries', 'SQL statements executed per request.', QUERY_COUNT_BUCKETS)
+        self.db_time = Histogram(
+            'examapp_request_db_seconds', 'Time spent in SQL statements per request.', DB_TIME_BUCKETS)
+        self.serialize_time = Histogram(
+            'examapp_request_serialization_seconds', 'Time spent serializing JSON per request.', SERIALIZE_BUCKETS)
+        self.sql_rows = Counter(
+            'examapp_request_sql_rows_total', 'Rows returned or affected by SQL statements.')
+        self.requests = Counter(
+            'examapp_requests_total', 'Requests handled.', labels=('endpoint', 'method', 'status'))
+        self.profiles = Counter(
+            'examapp_slow_request_profiles_total', 'cProfile dumps written for slow requests.')
+
+    def init_app(self, app):
+        self.enabled = app.config.get('METRICS_ENABLED', self.enabled)
+        self.response_headers = app.config.get('METRICS_RESPONSE_HEADERS', app.debug)
+        self.slow_request_ms = app.config.get('PROFILE_SLOW_REQUEST_MS', self.slow_request_ms)
+        self.sample_rate = app.config.get('PROFILE_SAMPLE_RATE', self.sample_rate)
+        self.profile_dir = app.config.get('PROFILE_DIR', self.profile_dir)
+        self.max_profiles = app.config.get('PROFILE_MAX_FILES', self.max_profiles)
+        app.extensions['request_metrics'] = self
+        if not self.enabled:
+            return
+
+        with app.app_context():
+            engine = db.engine
+        if id(engine) not in self._instrumented_engines:
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+            event.listen(engine, 'handle_error', _handle_error)
+            self._instrumented_engines.add(id(engine))
+
+        # Time whatever JSON provider the app uses (call after replacing app.json)
+        dumps = app.json.dumps
+
+        def timed_dumps(obj, **kwargs):
+            start = time.perf_counter()
+            try:
+                return dumps(obj, **kwargs)
+            finally:
+                if has_request_context() and hasattr(g, '_metrics'):
+                    g._metrics['serialize'] += time.perf_counter() - start
+
+        app.json.dumps = timed_dumps
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def render_prometheus(self):
+        with self._lock:
+            lines = []
+            for metric in (self.requests, self.request_duration, self.sql_queries, self.db_time,
+                           self.serialize_time, self.sql_rows, self.profiles):
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _before_request(self):
+        g._metrics = {'start': time.perf_counter(), 'queries': 0, 'db': 0.0, 'rows': 0, 'serialize': 0.0}
+        if self.slow_request_ms > 0 and random.random() < self.sample_rate \
+                and self._profile_lock.acquire(blocking=False):
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:  # another profiler is active on this thread
+                self._profile_lock.release()
+                return
+            g._metrics['profiler'] = profiler
+
+    def _after_request(self, response):
+        metrics = g.pop('_metrics', None)
+        if metrics is None:
+            return response
+        duration = time.perf_counter() - metrics['start']
+
+        profiler = metrics.get('profiler')
+        if profiler is not None:
+            profiler.disable()
+            self._profile_lock.release()
+
+        endpoint = request.endpoint or 'unmatched'
+        labels = (endpoint, request.method)
+        with self._lock:
+            self.requests.inc(labels + (str(response.status_code),))
+            self.request_duration.observe(labels, duration)
+            self.sql_queries.observe(labels, metrics['queries'])
+            self.db_time.observe(labels, metrics['db'])
+            self.serialize_time.observe(labels, metrics['serialize'])
+            self.sql_rows.inc(labels, metrics['rows'])
+
+        if profiler is not None and duration * 1000 >= self.slow_request_ms:
+            self._dump_profile(profiler, endpoint, duration)
+            with self._lock:
+                self.profiles.inc(labels)
+
+        if self.response_headers:
+            response.headers['X-SQL-Queries'] = str(metrics['queries'])
+            response.headers['X-SQL-Time-ms'] = f"{metrics['db'] * 1000:.2f}"
+            response.headers['X-SQL-Rows'] = str(metrics['rows'])
+            response.headers['X-Serialize-Time-ms'] = f"{metrics['serialize'] * 1000:.2f}"
+            response.headers['Server-Timing'] = (
+                f"db;dur={metrics['db'] * 1000:.2f}, serialize;dur={metrics['serialize'] * 1000:.2f}, "
+                f"total;dur={duration * 1000:.2f}"
+            )
+        return response
+
+    def _teardown_request(self, exc):
+        # after_request did not run (e.g. it raised): never leave a profiler enabled
+        metrics = g.pop('_metrics', None)
+        if metrics is not None and metrics.get('profiler') is not None:
+            metrics['profiler'].disable()
+            self._profile_lock.release()
+
+    def _dump_profile(self, profiler, endpoint, duration):
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            name = re.sub(r'[^A-Za-z0-9_.-]', '_', endpoint)
+            path = os.path.join(self.profile_dir, f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-"
+                                                  f"{name}-{int(duration * 1000)}ms.prof")
+            profiler.dump_stats(path)
+            logger.warning("Slow request %s (%.0f ms) profiled to %s", endpoint, duration * 1000, path)
+            self._prune_profiles()
+        except OSError:
+            logger.exception("Failed to write request profile")
+
+    def _prune_profiles(self):
+        files = sorted(
+            (entry for entry in os.scandir(self.profile_dir) if entry.name.endswith('.prof')),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        for entry in files[:max(len(files) - self.max_profiles, 0)]:
+            os.remove(entry.path)
+
+
+request_metrics = RequestInstrumentation()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start_time'].pop()
+    if has_request_context():
+        metrics = g.get('_metrics')
+        if metrics is not None:
+            metrics['queries'] += 1
+            metrics['db'] += elapsed
+            if cursor.rowcount > 0:
+                metrics['rows'] += cursor.rowcount
+
+
+def _handle_error(context):
+    if context.connection is not None:
+        stack = context.connection.info.get('query_start_time')
+        if stack:
+            stack.pop()
+
+
+def _labels(names, values):
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,33 @@
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson. UUIDs and datetimes are written
+    natively (same strings as str() / isoformat()); anything else orjson
+    does not know (Decimal, dataclasses, __html__) goes through Flask's
+    default hook. Keys keep their insertion order: response shapes define it.
+    """
+
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        return self.dumps_bytes(obj, **kwargs).decode('utf-8')
+
+    def dumps_bytes(self, obj, indent=None, **kwargs):
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option)
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Goes through self.dumps so request metrics still time serialization
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(f"{self.dumps(obj, indent=indent)}\n", mimetype=self.mimetype)
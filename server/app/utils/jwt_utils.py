@@ -1,66 +1,154 @@
 import jwt
-from datetime import datetime, timedelta
-from flask import current_app
+from jwt.utils import base64url_decode
+from datetime import datetime, timedelta, timezone
+import hashlib
+import hmac
+import json
 import logging
+import time
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
-def generate_jwt(user_id, expires_in=2592000):
-    try:
-        # Ensure user_id is a string
-        user_id_str = str(user_id)
-        
+ALGORITHM = "HS256"
+
+
+class JWTManager:
+    """
+    Signer/verifier bound once at create_app time.
+
+    Keys come from JWT_SIGNING_KEYS ("kid1:secret1,kid2:secret2") with
+    JWT_ACTIVE_KID choosing the signing key; older kids stay valid for
+    verification so keys can be rotated without logging everyone out.
+    Tokens without a kid header (issued before rotation support) are
+    verified against SECRET_KEY only while JWT_ACCEPT_LEGACY_TOKENS is on;
+    turn it off once those tokens have expired. Without JWT_SIGNING_KEYS,
+    kid-less SECRET_KEY tokens are the current format and always accepted.
+
+    Verification is HS256 only and uses HMAC objects keyed once per kid,
+    which avoids PyJWT's per-call key parsing and preparation on the hot
+    path (jwt.decode with a pre-built PyJWK is still ~5x slower).
+    """
+
+    def __init__(self):
+        self._keys = {}
+        self._active_kid = None
+        self._legacy_key = None
+        self._accept_legacy = True
+        self._verifiers = {}
+
+    def init_app(self, app):
+        self._legacy_key = app.config.get('SECRET_KEY')
+        self._keys = parse_signing_keys(app.config.get('JWT_SIGNING_KEYS'))
+        self._active_kid = app.config.get('JWT_ACTIVE_KID') or next(iter(self._keys), None)
+        self._accept_legacy = app.config.get('JWT_ACCEPT_LEGACY_TOKENS', True)
+
+        if self._active_kid is not None and self._active_kid not in self._keys:
+            raise ValueError(f"JWT_ACTIVE_KID {self._active_kid!r} is not in JWT_SIGNING_KEYS")
+        if not self._keys and not self._legacy_key:
+            raise ValueError("SECRET_KEY is not configured")
+        if not self._keys and not self._accept_legacy:
+            raise ValueError("JWT_ACCEPT_LEGACY_TOKENS is off but JWT_SIGNING_KEYS is not configured")
+
+        self._verifiers = {kid: _hmac_sha256(secret) for kid, secret in self._keys.items()}
+        if self._legacy_key and (self._accept_legacy or not self._keys):
+            self._verifiers[None] = _hmac_sha256(self._legacy_key)
+
+        app.extensions['jwt'] = self
+
+    def encode(self, user_id, expires_in=2592000):
+        now = datetime.now(timezone.utc)
         payload = {
-            "user_id": user_id_str,
-            "exp": datetime.utcnow() + timedelta(seconds=expires_in),
-            "iat": datetime.utcnow()  # Issued at time
+            "user_id": str(user_id),
+            "exp": now + timedelta(seconds=expires_in),
+            "iat": now  # Issued at time
         }
-        
-        # Debug: Check if secret key is set
-        secret_key = current_app.config.get('SECRET_KEY')
-        if not secret_key:
-            logger.error("SECRET_KEY is not configured in app config")
-            raise ValueError("SECRET_KEY is not configured")
-            
-        token = jwt.encode(payload, secret_key, algorithm="HS256")
-        
-        # For debugging: log the generated token
-        logger.debug(f"Generated token for user_id: {user_id_str}")
-        
+        if self._active_kid is not None:
+            token = jwt.encode(payload, self._keys[self._active_kid], algorithm=ALGORITHM,
+                               headers={"kid": self._active_kid})
+        else:
+            token = jwt.encode(payload, self._legacy_key, algorithm=ALGORITHM)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Generated token for user_id %s (kid=%s)", payload["user_id"], self._active_kid)
         return token
-        
-    except Exception as e:
-        logger.error(f"Error generating JWT: {str(e)}")
-        raise
 
-def decode_jwt(token):
-    try:
-        # Debug: Check if secret key is set
-        secret_key = current_app.config.get('SECRET_KEY')
-        if not secret_key:
-            logger.error("SECRET_KEY is not configured in app config")
+    def decode(self, token):
+        """Verified payload, or None if the token is invalid or expired."""
+        try:
+            return self._verify(token)
+        except jwt.ExpiredSignatureError:
+            logger.info("JWT token has expired")
+            return None
+        except jwt.InvalidTokenError as e:
+            logger.warning("Invalid JWT token: %s", e)
             return None
-            
-        # Debug: Log the token being decoded
-        logger.debug(f"Attempting to decode token: {token}")
-        
-        payload = jwt.decode(
-            token, 
-            secret_key, 
-            algorithms=["HS256"],
-            options={"verify_exp": True}
-        )
-        
-        logger.debug(f"Successfully decoded token payload: {payload}")
+        except Exception:
+            logger.exception("Unexpected error decoding JWT")
+            return None
+
+    def _verify(self, token):
+        if isinstance(token, str):
+            token = token.encode('ascii', 'replace')
+        if token.count(b'.') != 2:
+            raise jwt.DecodeError("Not enough segments")
+        try:
+            signing_input, signature_segment = token.rsplit(b'.', 1)
+            header_segment, payload_segment = signing_input.split(b'.', 1)
+            header = json.loads(base64url_decode(header_segment))
+            signature = base64url_decode(signature_segment)
+        except ValueError as e:
+            raise jwt.DecodeError(f"Malformed token: {e}") from e
+        if not isinstance(header, dict) or header.get('alg') != ALGORITHM:
+            raise jwt.InvalidAlgorithmError("The specified alg value is not allowed")
+
+        verifier = self._verifiers.get(header.get('kid'))
+        if verifier is None:
+            # InvalidTokenError, not InvalidKeyError: a foreign or retired kid is a bad token, not a bug
+            raise jwt.InvalidTokenError(f"Unknown kid {header.get('kid')!r}")
+        mac = verifier.copy()
+        mac.update(signing_input)
+        if not hmac.compare_digest(mac.digest(), signature):
+            raise jwt.InvalidSignatureError("Signature verification failed")
+
+        try:
+            payload = json.loads(base64url_decode(payload_segment))
+        except ValueError as e:
+            raise jwt.DecodeError(f"Invalid payload: {e}") from e
+        if not isinstance(payload, dict):
+            raise jwt.DecodeError("Invalid payload")
+        exp = payload.get('exp')
+        if not isinstance(exp, (int, float)) or isinstance(exp, bool):
+            raise jwt.MissingRequiredClaimError('exp')
+        if exp <= time.time():
+            raise jwt.ExpiredSignatureError("Signature has expired")
         return payload
-        
-    except jwt.ExpiredSignatureError:
-        logger.warning("JWT token has expired")
-        return None
-    except jwt.InvalidTokenError as e:
-        logger.error(f"Invalid JWT token: {str(e)}")
-        return None
-    except Exception as e:
-        logger.error(f"Unexpected error decoding JWT: {str(e)}")
-        return None
\ No newline at end of file
+
+
+def _hmac_sha256(secret):
+    return hmac.new(secret.encode('utf-8') if isinstance(secret, str) else secret, digestmod=hashlib.sha256)
+
+
+def parse_signing_keys(value):
+    """'kid1:secret1,kid2:secret2' -> {'kid1': 'secret1', 'kid2': 'secret2'} (order kept)."""
+    keys = {}
+    for item in (value or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        kid, sep, secret = item.partition(':')
+        if not sep or not kid or not secret:
+            raise ValueError("JWT_SIGNING_KEYS entries must look like kid:secret")
+        keys[kid] = secret
+    return keys
+
+
+jwt_manager = JWTManager()
+
+
+def generate_jwt(user_id, expires_in=2592000):
+    return jwt_manager.encode(user_id, expires_in)
+
+
+def decode_jwt(token):
+    return jwt_manager.decode(token)
@@ -0,0 +1,341 @@
+import logging
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import case, event, func
+from sqlalchemy.orm import Session
+
+from app.models import db, User, ExamineeAttemptExams, ExamLeaderboardSummary
+
+logger = logging.getLogger(__name__)
+
+# Late commits can carry a created_at slightly older than the newest row we
+# have already seen; catch-up queries look back this far. Catch-up is only a
+# fast path: an index whose length still differs from the summary is reloaded.
+CATCH_UP_SLACK = timedelta(minutes=5)
+
+
+def _rank_key(attempt_exam_id, examinee_id, score, time_taken_seconds, created_at):
+    # Same ordering as LEADERBOARD_ORDER: score desc, time asc, created_at
+    # (NULLs last), id. The trailing examinee_id is never compared because
+    # the id is unique.
+    return (
+        -score, time_taken_seconds, created_at is None, created_at or datetime.min,
+        str(attempt_exam_id), examinee_id
+    )
+
+
+class ExamLeaderboardIndex:
+    """
+    Sorted in-memory leaderboard for one exam.
+    Rank and page lookups are a bisect/slice over the sorted key list.
+    """
+
+    def __init__(self, exam_id):
+        self.exam_id = exam_id
+        self.last_created_at = None
+        self._keys = []
+        self._attempt_ids = set()
+        self._best_by_examinee = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, attempt_exam_id, examinee_id, score, time_taken_seconds, created_at):
+        """Insert an attempt; False if it is already in the index."""
+        attempt_key = str(attempt_exam_id)
+        if attempt_key in self._attempt_ids:
+            return False
+        key = _rank_key(attempt_exam_id, examinee_id, score, time_taken_seconds, created_at)
+        insort(self._keys, key)
+        self._attempt_ids.add(attempt_key)
+
+        best = self._best_by_examinee.get(examinee_id)
+        if best is None or key < best:
+            self._best_by_examinee[examinee_id] = key
+        if created_at and (self.last_created_at is None or created_at > self.last_created_at):
+            self.last_created_at = created_at
+        return True
+
+    def page(self, offset=0, limit=None):
+        """[(rank, attempt_exam_id), ...] for the requested slice."""
+        end = None if limit is None else offset + limit
+        return [(offset + i + 1, key[4]) for i, key in enumerate(self._keys[offset:end])]
+
+    def rank_of(self, examinee_id):
+        best = self._best_by_examinee.get(examinee_id)
+        if best is None:
+            return None
+        return bisect_left(self._keys, best) + 1
+
+    def around(self, examinee_id, neighbours=5):
+        rank = self.rank_of(examinee_id)
+        if rank is None:
+            return []
+        offset = max(rank - 1 - neighbours, 0)
+        return self.page(offset, rank + neighbours - offset)
+
+
+class LeaderboardRegistry:
+    """
+    Per-worker registry of ExamLeaderboardIndex objects, LRU bounded.
+    Freshness is checked against exam_leaderboard_summaries.attempt_count,
+    which every submit bumps in the same transaction as the attempt row and
+    ORM deletes recount (track_attempt_deletes). Attempts deleted with raw
+    SQL leave the count high until `flask leaderboard rebuild` is run.
+    """
+
+    def __init__(self, max_exams=512):
+        self.max_exams = max_exams
+        self._indexes = OrderedDict()
+        self._lock = threading.RLock()
+
+    def init_app(self, app):
+        self.max_exams = app.config.get('LEADERBOARD_INDEX_MAX_EXAMS', self.max_exams)
+        app.extensions['leaderboard_registry'] = self
+        app.cli.add_command(leaderboard_cli)
+        if not getattr(self, '_listening', False):
+            event.listen(Session, 'before_flush', _collect_attempt_deletes)
+            event.listen(Session, 'after_flush', _recount_after_deletes)
+            event.listen(Session, 'after_commit', _invalidate_after_deletes)
+            event.listen(Session, 'after_rollback', _discard_attempt_deletes)
+            self._listening = True
+
+    @property
+    def enabled(self):
+        return self.max_exams > 0
+
+    def get(self, exam_id):
+        """
+        Return an up-to-date index for the exam, or None when the exam has no
+        summary row yet (callers then fall back to the SQL leaderboard).
+        """
+        summary_count = db.session.execute(
+            db.select(ExamLeaderboardSummary.attempt_count)
+            .where(ExamLeaderboardSummary.exam_id == exam_id)
+        ).scalar()
+        if summary_count is None:
+            return None
+
+        with self._lock:
+            index = self._indexes.get(exam_id)
+            if index is not None and len(index) < summary_count:
+                self._catch_up(index)
+            if index is None or len(index) != summary_count:
+                index = self._load(exam_id)
+                if len(index) < summary_count:
+                    # More attempts counted than exist: deleted outside the ORM
+                    logger.warning(
+                        "Leaderboard summary for exam %s counts %d attempts, found %d; "
+                        "run `flask leaderboard rebuild`", exam_id, summary_count, len(index)
+                    )
+            self._indexes[exam_id] = index
+            self._indexes.move_to_end(exam_id)
+            while len(self._indexes) > self.max_exams:
+                self._indexes.popitem(last=False)
+            return index
+
+    def record_attempt(self, attempt):
+        """
+        Add a freshly committed attempt to this worker's index, if loaded.
+        add() ignores an attempt a concurrent get() has already loaded.
+        """
+        with self._lock:
+            index = self._indexes.get(attempt.exam_id)
+            if index is None:
+                return
+            index.add(
+                attempt.attempt_exam_id, attempt.examinee_id, attempt.score,
+                attempt.time_taken_seconds, attempt.created_at
+            )
+
+    def invalidate(self, exam_id):
+        with self._lock:
+            self._indexes.pop(exam_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+    def _load(self, exam_id):
+        index = ExamLeaderboardIndex(exam_id)
+        for row in db.session.execute(_index_rows(exam_id)):
+            index.add(*row)
+        return index
+
+    def _catch_up(self, index):
+        stmt = _index_rows(index.exam_id)
+        if index.last_created_at is not None:
+            stmt = stmt.where(ExamineeAttemptExams.created_at >= index.last_created_at - CATCH_UP_SLACK)
+        for row in db.session.execute(stmt):
+            index.add(*row)
+
+
+def _index_rows(exam_id):
+    attempt = ExamineeAttemptExams
+    return db.select(
+        attempt.attempt_exam_id, attempt.examinee_id, attempt.score,
+        attempt.time_taken_seconds, attempt.created_at
+    ).where(attempt.exam_id == exam_id)
+
+
+def bump_leaderboard_summary(attempt):
+    """
+    Count a new attempt in the exam's summary row. Must run in the same
+    transaction as the attempt insert (after flush, right before commit).
+
+    create-exam inserts the row; this is still an upsert so exams created
+    before the summary table (or a concurrent first burst) never race on the
+    insert: a missing row is seeded from examinee_attempt_exams, which
+    already includes the flushed attempt.
+
+    Trade-off: the upsert takes the summary row lock, held until commit, so
+    submits to one exam commit one at a time and a hot exam tops out at
+    roughly one submit per commit latency. Callers keep that window to the
+    commit itself by calling this last (the attempt and its question rows
+    are already written); that is the price of an exact count for the
+    per-worker indexes.
+    """
+    summary = ExamLeaderboardSummary.__table__
+    attempt_table = ExamineeAttemptExams.__table__
+    if db.session.get_bind().dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    def stat(column):
+        return db.select(column).where(attempt_table.c.exam_id == attempt.exam_id).scalar_subquery()
+
+    now = datetime.utcnow()
+    stmt = insert(summary).values(
+        exam_id=attempt.exam_id,
+        attempt_count=stat(func.count()),
+        top_score=stat(func.max(attempt_table.c.score)),
+        last_attempt_at=stat(func.max(attempt_table.c.created_at)),
+        updated_at=now
+    )
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[summary.c.exam_id],
+        set_={
+            'attempt_count': summary.c.attempt_count + 1,
+            'top_score': case(
+                (summary.c.top_score.is_(None), attempt.score),
+                (summary.c.top_score < attempt.score, attempt.score),
+                else_=summary.c.top_score
+            ),
+            'last_attempt_at': case(
+                (summary.c.last_attempt_at.is_(None), attempt.created_at),
+                (summary.c.last_attempt_at < attempt.created_at, attempt.created_at),
+                else_=summary.c.last_attempt_at
+            ),
+            'updated_at': now
+        }
+    ))
+
+
+def _collect_attempt_deletes(session, flush_context, instances):
+    """
+    before_flush: note exams losing attempts, either deleted directly or
+    through a deleted user (examinee_id is ON DELETE CASCADE in the DB).
+    """
+    exam_ids = set()
+    user_ids = []
+    for obj in session.deleted:
+        if isinstance(obj, ExamineeAttemptExams):
+            exam_ids.add(obj.exam_id)
+        elif isinstance(obj, User):
+            user_ids.append(obj.id)
+    if user_ids:
+        exam_ids.update(session.execute(
+            db.select(ExamineeAttemptExams.exam_id.distinct())
+            .where(ExamineeAttemptExams.examinee_id.in_(user_ids))
+        ).scalars())
+    if exam_ids:
+        session.info.setdefault('leaderboard_deleted_exams', set()).update(exam_ids)
+
+
+def _recount_after_deletes(session, flush_context):
+    """after_flush: recount the summaries of exams that lost attempts."""
+    exam_ids = session.info.get('leaderboard_deleted_exams')
+    if not exam_ids:
+        return
+    summary = ExamLeaderboardSummary.__table__
+    attempt_table = ExamineeAttemptExams.__table__
+
+    def stat(column):
+        return (
+            db.select(column).where(attempt_table.c.exam_id == summary.c.exam_id)
+            .scalar_subquery()
+        )
+
+    session.connection().execute(
+        db.update(summary)
+        .where(summary.c.exam_id.in_(exam_ids))
+        .values(
+            attempt_count=stat(func.count()),
+            top_score=stat(func.max(attempt_table.c.score)),
+            last_attempt_at=stat(func.max(attempt_table.c.created_at)),
+            updated_at=datetime.utcnow()
+        )
+    )
+
+
+def _invalidate_after_deletes(session):
+    # Other workers see the lower count and reload on their next get()
+    for exam_id in session.info.pop('leaderboard_deleted_exams', ()):
+        leaderboard_registry.invalidate(exam_id)
+
+
+def _discard_attempt_deletes(session):
+    session.info.pop('leaderboard_deleted_exams', None)
+
+
+def rebuild_leaderboard_summaries(exam_id=None):
+    """Recompute summary rows from examinee_attempt_exams. Returns rows written."""
+    attempt = ExamineeAttemptExams
+    stats_query = db.select(
+        attempt.exam_id, func.count(), func.max(attempt.score), func.max(attempt.created_at)
+    ).group_by(attempt.exam_id)
+    delete_query = db.delete(ExamLeaderboardSummary)
+    if exam_id is not None:
+        stats_query = stats_query.where(attempt.exam_id == exam_id)
+        delete_query = delete_query.where(ExamLeaderboardSummary.exam_id == exam_id)
+
+    stats = db.session.execute(stats_query).all()
+    db.session.execute(delete_query)
+    now = datetime.utcnow()
+    if stats:
+        db.session.execute(db.insert(ExamLeaderboardSummary), [
+            {
+                'exam_id': row[0],
+                'attempt_count': row[1],
+                'top_score': row[2],
+                'last_attempt_at': row[3],
+                'updated_at': now
+            }
+            for row in stats
+        ])
+    db.session.commit()
+    leaderboard_registry.clear()
+    return len(stats)
+
+
+leaderboard_registry = LeaderboardRegistry()
+
+
+# -----------------------------
+# flask leaderboard rebuild [--exam-id ID]
+# -----------------------------
+leaderboard_cli = AppGroup('leaderboard', help='Maintain materialized exam leaderboards.')
+
+
+@leaderboard_cli.command('rebuild')
+@click.option('--exam-id', default=None, help='Rebuild a single exam instead of all exams.')
+def rebuild_command(exam_id):
+    import uuid
+    count = rebuild_leaderboard_summaries(uuid.UUID(exam_id) if exam_id else None)
+    click.echo(f"Rebuilt {count} leaderboard summaries")
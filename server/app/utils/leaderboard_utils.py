@@ -0,0 +1,178 @@
+import uuid
+from sqlalchemy import func
+from app.models import db, User, ExamineeAttemptExams
+from app.utils.leaderboard_index_utils import leaderboard_registry
+
+# Leaderboard ordering: best score first, faster attempts break ties.
+# NULLS LAST is the PostgreSQL default for ASC; SQLite needs it spelled out.
+LEADERBOARD_ORDER = (
+    ExamineeAttemptExams.score.desc(),
+    ExamineeAttemptExams.time_taken_seconds.asc(),
+    ExamineeAttemptExams.created_at.asc().nulls_last(),
+    ExamineeAttemptExams.attempt_exam_id.asc(),
+)
+
+
+def _leaderboard_columns():
+    attempt = ExamineeAttemptExams
+    return (
+        attempt.attempt_exam_id,
+        attempt.examinee_id,
+        User.name.label('examinee_name'),
+        attempt.exam_id,
+        attempt.exam_name,
+        attempt.subject,
+        attempt.chapter,
+        attempt.class_name,
+        attempt.total_questions,
+        attempt.total_marks,
+        attempt.total_time_minutes,
+        attempt.negative_marks_value,
+        attempt.examiner_name,
+        attempt.score,
+        attempt.correct_answers,
+        attempt.wrong_answers,
+        attempt.unanswered_questions,
+        attempt.time_taken_seconds,
+        attempt.created_at,
+    )
+
+
+def _ranked_attempts(exam_id):
+    """
+    Single statement producing every attempt for an exam with its rank,
+    the examinee name and the total attempt count (window functions).
+    """
+    attempt = ExamineeAttemptExams
+    return (
+        db.select(
+            *_leaderboard_columns(),
+            func.row_number().over(order_by=LEADERBOARD_ORDER).label('rank'),
+            func.count().over().label('total_attempts'),
+        )
+        .outerjoin(User, User.id == attempt.examinee_id)
+        .where(attempt.exam_id == exam_id)
+        .subquery('ranked_attempts')
+    )
+
+
+def _materialized_index(exam_id):
+    if not leaderboard_registry.enabled:
+        return None
+    return leaderboard_registry.get(exam_id)
+
+
+def _rows_for_ranks(exam_id, index, ranked_ids):
+    """
+    Load leaderboard columns for the (rank, attempt_exam_id) pairs picked
+    from the materialized index. Returns None if the index is stale.
+    """
+    if not ranked_ids:
+        return []
+    attempt = ExamineeAttemptExams
+    stmt = (
+        db.select(*_leaderboard_columns())
+        .outerjoin(User, User.id == attempt.examinee_id)
+        .where(attempt.attempt_exam_id.in_([uuid.UUID(attempt_id) for _, attempt_id in ranked_ids]))
+    )
+    rows_by_id = {str(row['attempt_exam_id']): row for row in db.session.execute(stmt).mappings()}
+    if len(rows_by_id) != len(ranked_ids):
+        # Attempts vanished underneath the index (deleted with raw SQL)
+        leaderboard_registry.invalidate(exam_id)
+        return None
+    total_attempts = len(index)
+    return [
+        {**rows_by_id[attempt_id], 'rank': rank, 'total_attempts': total_attempts}
+        for rank, attempt_id in ranked_ids
+    ]
+
+
+def get_leaderboard(exam_id, limit=None, offset=0):
+    """Return ranked leaderboard rows, optionally paged with limit/offset."""
+    index = _materialized_index(exam_id)
+    if index is not None:
+        rows = _rows_for_ranks(exam_id, index, index.page(offset, limit))
+        if rows is not None:
+            return rows
+
+    ranked = _ranked_attempts(exam_id)
+    stmt = db.select(ranked).order_by(ranked.c.rank)
+    if offset:
+        stmt = stmt.offset(offset)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return db.session.execute(stmt).mappings().all()
+
+
+def get_leaderboard_around(exam_id, examinee_id, neighbours=5):
+    """
+    Return the examinee's best-ranked attempt plus `neighbours` rows above
+    and below it. Empty if the examinee has no attempt.
+    """
+    index = _materialized_index(exam_id)
+    if index is not None:
+        rows = _rows_for_ranks(exam_id, index, index.around(examinee_id, neighbours))
+        if rows is not None:
+            return rows
+
+    ranked = _ranked_attempts(exam_id)
+    my_rank = (
+        db.select(func.min(ranked.c.rank))
+        .where(ranked.c.examinee_id == examinee_id)
+        .scalar_subquery()
+    )
+    stmt = (
+        db.select(ranked)
+        .where(ranked.c.rank.between(my_rank - neighbours, my_rank + neighbours))
+        .order_by(ranked.c.rank)
+    )
+    return db.session.execute(stmt).mappings().all()
+
+
+def get_user_rank(exam_id, examinee_id):
+    """Best (lowest) rank of the examinee for this exam, or None."""
+    index = _materialized_index(exam_id)
+    if index is not None:
+        # Same guard as _rows_for_ranks: attempts that vanished underneath the
+        # index (deleted with raw SQL) would shift ranks. Index-only count.
+        attempt_count = db.session.execute(
+            db.select(func.count()).select_from(ExamineeAttemptExams).where(ExamineeAttemptExams.exam_id == exam_id)
+        ).scalar()
+        if attempt_count == len(index):
+            return index.rank_of(examinee_id)
+        leaderboard_registry.invalidate(exam_id)
+
+    ranked = _ranked_attempts(exam_id)
+    stmt = db.select(func.min(ranked.c.rank)).where(ranked.c.examinee_id == examinee_id)
+    return db.session.execute(stmt).scalar()
+
+
+def leaderboard_row_to_dict(row):
+    return {
+        'attempt_exam_id': str(row['attempt_exam_id']),
+        'rank': row['rank'],
+        'examinee_id': str(row['examinee_id']) if row['examinee_name'] is not None else None,
+        'examinee_name': row['examinee_name'] if row['examinee_name'] is not None else "Unknown",
+        'score': row['score'],
+        'correct_answers': row['correct_answers'],
+        'wrong_answers': row['wrong_answers'],
+        'unanswered_questions': row['unanswered_questions'],
+        'time_taken_seconds': row['time_taken_seconds'],
+        'created_at': row['created_at'].isoformat() if row['created_at'] else None
+    }
+
+
+def leaderboard_exam_snapshot(row):
+    """Exam snapshot columns taken from any leaderboard row."""
+    return {
+        'exam_id': str(row['exam_id']),
+        'exam_name': row['exam_name'],
+        'subject': row['subject'],
+        'chapter': row['chapter'],
+        'class_name': row['class_name'],
+        'total_questions': row['total_questions'],
+        'total_marks': row['total_marks'],
+        'total_time_minutes': row['total_time_minutes'],
+        'negative_marks_value': row['negative_marks_value'],
+        'examiner_name': row['examiner_name'],
+    }
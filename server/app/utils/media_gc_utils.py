@@ -0,0 +1,276 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import union
+
+from app.models import db, ExaminerCreatedExamQuestion, ExamineeAttemptExamQuestions, MediaDeletionQueue
+from app.models.examinerModels.createExamModels import QUESTION_IMAGE_ID_COLUMNS
+from app.models.examineeModels.examineeAttemptExamsModel import ATTEMPT_QUESTION_IMAGE_ID_COLUMNS
+from app.utils.upload_utils import upload_pipeline
+
+logger = logging.getLogger(__name__)
+
+# Every column that can reference a stored image; an asset is garbage only if none do
+IMAGE_REFERENCE_COLUMNS = tuple(
+    getattr(ExaminerCreatedExamQuestion, name) for name in QUESTION_IMAGE_ID_COLUMNS
+) + tuple(
+    getattr(ExamineeAttemptExamQuestions, name) for name in ATTEMPT_QUESTION_IMAGE_ID_COLUMNS
+)
+
+
+class MediaGarbageCollector:
+    """
+    Deletes images off the request path. Routes only enqueue candidate
+    public_ids into media_deletion_queue (same transaction as the change);
+    process_batch() later deletes, rate limited, those that no question and no
+    attempt snapshot references any more (content-addressed images are
+    shared). sweep_orphans() enqueues stored assets nothing references.
+    Runs from `flask media gc` / `flask media sweep` (cron), or in a
+    background thread per worker when MEDIA_GC_INTERVAL > 0; workers claim
+    rows with SKIP LOCKED so they never delete the same batch.
+
+    References are checked while the batch's rows are locked, and a deleted
+    asset's row stays behind as a tombstone (deleted_at) for
+    tombstone_seconds. Requests that reuse an existing asset lock the same
+    rows before they commit (claim_reused_uploads), so they either cancel
+    the deletion first or see the tombstone and upload the image again.
+    """
+
+    def __init__(self, batch_size=50, rate_per_second=5.0, grace_seconds=3600,
+                 interval_seconds=0, max_attempts=10, tombstone_seconds=86400):
+        self.batch_size = batch_size
+        self.rate_per_second = rate_per_second
+        self.grace_seconds = grace_seconds
+        self.interval_seconds = interval_seconds
+        self.max_attempts = max_attempts
+        self.tombstone_seconds = tombstone_seconds
+        self._next_delete_at = 0.0
+        self._thread = None
+        self._lock = threading.Lock()
+        self.deleted = 0
+        self.kept = 0
+        self.failed = 0
+        self.last_run_at = None
+
+    def init_app(self, app):
+        self.batch_size = app.config.get('MEDIA_GC_BATCH_SIZE', self.batch_size)
+        self.rate_per_second = app.config.get('MEDIA_GC_RATE_PER_SEC', self.rate_per_second)
+        self.grace_seconds = app.config.get('MEDIA_GC_GRACE_SECONDS', self.grace_seconds)
+        self.interval_seconds = app.config.get('MEDIA_GC_INTERVAL', self.interval_seconds)
+        self.max_attempts = app.config.get('MEDIA_GC_MAX_ATTEMPTS', self.max_attempts)
+        self.tombstone_seconds = app.config.get('MEDIA_GC_TOMBSTONE_SECONDS', self.tombstone_seconds)
+        app.extensions['media_gc'] = self
+        app.cli.add_command(media_cli)
+
+        if self.interval_seconds > 0:
+            # Started from the first request so it runs in the worker, not in CLI commands
+            @app.before_request
+            def _start_media_gc():
+                if self._thread is None:
+                    self.start(app)
+
+    def start(self, app):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, args=(app,), name='media-gc', daemon=True)
+                self._thread.start()
+
+    def process_batch(self, limit=None):
+        """Delete one batch of due queue entries. Returns the number of rows handled."""
+        queue = MediaDeletionQueue
+        now = datetime.utcnow()
+        db.session.execute(
+            db.delete(queue).where(queue.deleted_at < now - timedelta(seconds=self.tombstone_seconds))
+        )
+        rows = db.session.execute(
+            db.select(queue)
+            .where(queue.not_before <= now, queue.deleted_at.is_(None))
+            .order_by(queue.not_before, queue.id)
+            .limit(limit or self.batch_size)
+            .with_for_update(skip_locked=True)
+        ).scalars().all()
+        if not rows:
+            db.session.commit()
+            return 0
+
+        # Checked under the row locks: a request reusing one of these assets
+        # waits in claim_reused_uploads until this batch commits
+        in_use = referenced_image_ids({row.public_id for row in rows})
+        done = set()
+        for row in rows:
+            if row.public_id in in_use:
+                # Still (or again) referenced: drop the entry, keep the asset
+                self.kept += 1
+                db.session.delete(row)
+                continue
+            if row.public_id in done:
+                row.deleted_at = now
+                continue
+
+            self._throttle()
+            try:
+                upload_pipeline.storage.delete(row.public_id)
+            except Exception as e:
+                row.attempts += 1
+                row.last_error = str(e)[:1000]
+                row.not_before = now + timedelta(seconds=min(60 * 2 ** row.attempts, 86400))
+                self.failed += 1
+                if row.attempts >= self.max_attempts:
+                    logger.error("Giving up deleting %s after %d attempts: %s", row.public_id, row.attempts, e)
+                    db.session.delete(row)
+                continue
+
+            done.add(row.public_id)
+            self.deleted += 1
+            row.deleted_at = now  # tombstone for claim_reused_uploads
+
+        db.session.commit()
+        self.last_run_at = now
+        return len(rows)
+
+    def run_once(self, max_batches=None):
+        """Process due batches until the queue is drained (or max_batches)."""
+        handled = batches = 0
+        while max_batches is None or batches < max_batches:
+            count = self.process_batch()
+            handled += count
+            batches += 1
+            if count < self.batch_size:
+                break
+        return handled
+
+    def sweep_orphans(self, chunk_size=500):
+        """Enqueue stored assets that no question or attempt snapshot references."""
+        enqueued = 0
+        chunk = []
+        for public_id in upload_pipeline.storage.list_ids():
+            chunk.append(public_id)
+            if len(chunk) >= chunk_size:
+                enqueued += self._enqueue_orphans(chunk)
+                chunk = []
+        if chunk:
+            enqueued += self._enqueue_orphans(chunk)
+        return enqueued
+
+    def stats(self):
+        return {
+            'deleted': self.deleted,
+            'kept_in_use': self.kept,
+            'failed': self.failed,
+            'last_run_at': self.last_run_at.isoformat() if self.last_run_at else None
+        }
+
+    def _enqueue_orphans(self, public_ids):
+        unreferenced = set(public_ids) - referenced_image_ids(public_ids)
+        if unreferenced:
+            queued = set(db.session.execute(
+                db.select(MediaDeletionQueue.public_id)
+                .where(MediaDeletionQueue.public_id.in_(unreferenced), MediaDeletionQueue.deleted_at.is_(None))
+            ).scalars())
+            enqueue_media_deletion(unreferenced - queued, 'orphan_sweep')
+            unreferenced -= queued
+        db.session.commit()
+        return len(unreferenced)
+
+    def _throttle(self):
+        if self.rate_per_second <= 0:
+            return
+        now = time.monotonic()
+        if self._next_delete_at > now:
+            time.sleep(self._next_delete_at - now)
+        self._next_delete_at = max(now, self._next_delete_at) + 1.0 / self.rate_per_second
+
+    def _run(self, app):
+        while True:
+            time.sleep(self.interval_seconds)
+            try:
+                with app.app_context():
+                    self.run_once()
+            except Exception:
+                logger.exception("Media GC run failed")
+                with app.app_context():
+                    db.session.rollback()
+
+
+media_gc = MediaGarbageCollector()
+
+
+def enqueue_media_deletion(public_ids, reason, delay_seconds=None):
+    """Queue image ids for deferred deletion (caller commits)."""
+    public_ids = sorted({public_id for public_id in public_ids if public_id})
+    if not public_ids:
+        return 0
+    now = datetime.utcnow()
+    not_before = now + timedelta(seconds=media_gc.grace_seconds if delay_seconds is None else delay_seconds)
+    db.session.execute(db.insert(MediaDeletionQueue), [
+        {'public_id': public_id, 'reason': reason, 'enqueued_at': now, 'not_before': not_before, 'attempts': 0}
+        for public_id in public_ids
+    ])
+    return len(public_ids)
+
+
+def claim_reused_uploads(files, uploads):
+    """
+    Call in the transaction that stores `uploads`, before it commits.
+    Uploads that deduplicated onto an existing asset (created False) can
+    race the GC: the asset may be queued, or already deleted, by the time
+    the new reference commits. Locks their queue rows (waiting for a GC
+    batch that holds them), cancels pending deletions, and uploads again
+    the files whose asset the GC already deleted.
+    """
+    reused = sorted({result["public_id"] for result in uploads.values() if not result.get("created", True)})
+    if not reused:
+        return uploads
+    queue = MediaDeletionQueue
+    rows = db.session.execute(
+        db.select(queue).where(queue.public_id.in_(reused)).order_by(queue.id).with_for_update()
+    ).scalars().all()
+    deleted = {row.public_id for row in rows if row.deleted_at is not None}
+    for row in rows:
+        db.session.delete(row)
+    if deleted:
+        logger.warning("Restoring %d reused image(s) deleted by the media GC", len(deleted))
+        upload_pipeline.reupload(files, uploads, deleted)
+    return uploads
+
+
+def collect_exam_image_ids(exam_id):
+    """All image ids referenced by an exam's questions."""
+    question = ExaminerCreatedExamQuestion
+    rows = db.session.execute(
+        db.select(*(getattr(question, name) for name in QUESTION_IMAGE_ID_COLUMNS))
+        .where(question.exam_id == exam_id)
+    )
+    return {public_id for row in rows for public_id in row if public_id}
+
+
+def referenced_image_ids(public_ids):
+    """Subset of public_ids still referenced anywhere (one UNION over the partial indexes)."""
+    public_ids = list(public_ids)
+    if not public_ids:
+        return set()
+    stmt = union(*(
+        db.select(column.label('public_id')).where(column.in_(public_ids))
+        for column in IMAGE_REFERENCE_COLUMNS
+    ))
+    return set(db.session.execute(stmt).scalars())
+
+
+media_cli = AppGroup('media', help='Deferred image deletion and orphan collection.')
+
+
+@media_cli.command('gc')
+@click.option('--max-batches', default=None, type=int, help='Stop after this many batches.')
+def gc_command(max_batches):
+    handled = media_gc.run_once(max_batches)
+    click.echo(f"Processed {handled} queued deletions ({media_gc.deleted} deleted, "
+               f"{media_gc.kept} still in use, {media_gc.failed} failed)")
+
+
+@media_cli.command('sweep')
+def sweep_command():
+    click.echo(f"Queued {media_gc.sweep_orphans()} orphaned assets for deletion")
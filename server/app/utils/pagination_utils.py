@@ -0,0 +1,58 @@
+import base64
+import json
+import uuid
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+MAX_PER_PAGE = 100
+
+KeysetPage = namedtuple('KeysetPage', ['items', 'next_cursor', 'has_next', 'total', 'per_page'])
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at, row_id):
+    """Opaque continuation token for the row a page ended on."""
+    raw = json.dumps([created_at.isoformat() if created_at else None, str(row_id)], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(token):
+    """Token -> (created_at, row_id). Raises InvalidCursor for anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), uuid.UUID(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor('Invalid cursor') from e
+
+
+def keyset_paginate(query, created_col, id_col, cursor=None, per_page=10, with_total=False):
+    """
+    Newest-first page of `query` keyed on (created_at, id), so deep pages cost
+    the same as the first one (no OFFSET). Pass the returned next_cursor back
+    to continue; total is only counted when with_total is set. per_page is
+    clamped to 1..MAX_PER_PAGE and the page carries the value actually used.
+    """
+    per_page = min(max(per_page, 1), MAX_PER_PAGE)
+    total = query.order_by(None).count() if with_total else None
+
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            created_col < created_at,
+            and_(created_col == created_at, id_col < row_id)
+        ))
+
+    rows = query.order_by(created_col.desc(), id_col.desc()).limit(per_page + 1).all()
+    has_next = len(rows) > per_page
+    items = rows[:per_page]
+    next_cursor = None
+    if has_next:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, created_col.key), getattr(last, id_col.key))
+    return KeysetPage(items, next_cursor, has_next, total, per_page)
@@ -0,0 +1,95 @@
+import os
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from app.utils.gevent_utils import cpu_executor
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing pool is saturated; callers answer 429."""
+
+    def __init__(self, retry_after=1):
+        super().__init__("Password hashing pool is saturated")
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """
+    Password hashing with configurable werkzeug cost parameters, run on a
+    bounded thread pool (hashlib's scrypt/pbkdf2 release the GIL).
+
+    At most `workers + queue_size` hashes are in flight per process; beyond
+    that PasswordHasherBusy is raised instead of letting requests pile up.
+    """
+
+    def __init__(self, method="scrypt", workers=None, queue_size=None, timeout=10, retry_after=1):
+        self.method = method
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._executor = None
+        self._slots = None
+        self._method_prefix = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.method = app.config.get('PASSWORD_HASH_METHOD', self.method)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', self.workers)
+        self.queue_size = app.config.get('PASSWORD_HASH_QUEUE_SIZE', self.queue_size)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', self.timeout)
+        self.retry_after = app.config.get('PASSWORD_HASH_RETRY_AFTER', self.retry_after)
+        self._executor = None
+        self._slots = None
+        self._method_prefix = None
+        app.extensions['password_hasher'] = self
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, method=self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True when the stored hash was made with different method/cost parameters."""
+        return password_hash.split('$', 1)[0] != self._current_prefix()
+
+    def _current_prefix(self):
+        if self._method_prefix is None:
+            # Let werkzeug expand defaults ("scrypt" -> "scrypt:32768:8:1")
+            self._method_prefix = generate_password_hash('', method=self.method).split('$', 1)[0]
+        return self._method_prefix
+
+    def _run(self, fn, *args, **kwargs):
+        workers = self.workers if self.workers is not None else (os.cpu_count() or 1)
+        if workers <= 0:
+            return fn(*args, **kwargs)
+
+        executor, slots = self._pool(workers)
+        if not slots.acquire(blocking=False):
+            raise PasswordHasherBusy(self.retry_after)
+        try:
+            future = executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise PasswordHasherBusy(self.retry_after)
+
+    def _pool(self, workers):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    queue_size = self.queue_size if self.queue_size is not None else workers * 4
+                    self._slots = threading.BoundedSemaphore(workers + queue_size)
+                    # Real threads even under gevent: hashing must not block the event loop
+                    self._executor = cpu_executor(workers, thread_name_prefix='password-hash')
+        return self._executor, self._slots
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,71 @@
+from sqlalchemy import func
+
+from app.models import db, ExaminerCreatedExam, ExaminerCreatedExamQuestion, ExamineeAttemptExams
+from app.utils.serializer_utils import Serializer
+
+
+class Projection:
+    """
+    The exact columns a list endpoint serializes. Queries select only these
+    columns (no ORM entities, no lazy relationships) and rows serialize to
+    dicts keyed by column name/label (UUIDs and datetimes are left to the
+    orjson provider).
+    """
+
+    def __init__(self, *columns):
+        self.columns = columns
+        self.keys = tuple(column.key for column in columns)
+        self.serializer = Serializer(
+            {key: index for index, key in enumerate(self.keys)}, name=f'projection_{self.keys[0]}'
+        )
+        self.to_dict = self.serializer.to_dict
+
+    def query(self):
+        return db.session.query(*self.columns)
+
+
+def question_count_column():
+    """Correlated COUNT(*) of an exam's questions (served by the exam_id index)."""
+    return (
+        db.select(func.count())
+        .where(ExaminerCreatedExamQuestion.exam_id == ExaminerCreatedExam.exam_id)
+        .correlate(ExaminerCreatedExam)
+        .scalar_subquery()
+        .label('question_count')
+    )
+
+
+# /api/examiner/my-created-exams
+MY_CREATED_EXAMS = Projection(
+    ExaminerCreatedExam.exam_id,
+    ExaminerCreatedExam.exam_name,
+    ExaminerCreatedExam.exam_code,
+    ExaminerCreatedExam.subject,
+    ExaminerCreatedExam.chapter,
+    ExaminerCreatedExam.class_name,
+    ExaminerCreatedExam.total_marks,
+    ExaminerCreatedExam.total_time_minutes,
+    ExaminerCreatedExam.created_at,
+    question_count_column(),
+)
+
+# /api/examinee/previous-attempt-exam
+ATTEMPT_HISTORY = Projection(
+    ExamineeAttemptExams.attempt_exam_id,
+    ExamineeAttemptExams.exam_id,
+    ExamineeAttemptExams.exam_name,
+    ExamineeAttemptExams.subject,
+    ExamineeAttemptExams.class_name,
+    ExamineeAttemptExams.chapter,
+    ExamineeAttemptExams.total_marks,
+    ExamineeAttemptExams.total_time_minutes,
+    ExamineeAttemptExams.negative_marks_value,
+    ExamineeAttemptExams.examiner_name,
+    ExamineeAttemptExams.score,
+    ExamineeAttemptExams.total_questions,
+    ExamineeAttemptExams.correct_answers,
+    ExamineeAttemptExams.wrong_answers,
+    ExamineeAttemptExams.unanswered_questions,
+    ExamineeAttemptExams.time_taken_seconds,
+    ExamineeAttemptExams.created_at,
+)
@@ -0,0 +1,179 @@
+import hashlib
+
+import orjson
+
+
+class Const:
+    """A fixed value in a response shape."""
+
+    def __init__(self, value):
+        self.value = value
+
+
+class Many:
+    """A list of nested rows, e.g. an exam's questions: Many('questions', QUESTION)."""
+
+    def __init__(self, source, serializer):
+        self.source = source
+        self.serializer = serializer
+
+
+class Serializer:
+    """
+    A response shape defined once and compiled into a single Python function
+    that builds the dict straight from a row, with no per-field dispatch.
+
+    Field sources:
+      'attr'              row.attr (ORM object or named Row)
+      0                   row[0] (plain tuple rows)
+      ('attr', convert)   convert(row.attr)
+      {'key': source}     nested object built from the same row
+      Many('attr', shape) [shape(item) for item in row.attr]
+      Const(value)        value
+      callable            fn(row)
+
+    UUIDs and datetimes can stay native: the orjson provider writes them as
+    the same strings str() / isoformat() would. Convert explicitly only for
+    dicts that are also consumed in Python (e.g. the cached exam paper).
+
+    `fingerprint` hashes the generated source of this shape and any nested
+    ones, so ETags that include it change whenever the shape does.
+    """
+
+    def __init__(self, fields, name='row'):
+        self.fields = fields
+        self.name = name
+        self._namespace = {}
+        self._nested = []
+        source = f"def serialize_{name}(row):\n    return {self._compile(fields)}\n"
+        exec(compile(source, f"<serializer {name}>", 'exec'), self._namespace)
+        self.to_dict = self._namespace[f'serialize_{name}']
+        self.source = source
+        self.fingerprint = hashlib.blake2b(
+            "".join([source] + [nested.fingerprint for nested in self._nested]).encode('utf-8'), digest_size=8
+        ).hexdigest()
+
+    def __call__(self, row):
+        return self.to_dict(row)
+
+    def many(self, rows):
+        to_dict = self.to_dict
+        return [to_dict(row) for row in rows]
+
+    def dumps(self, rows):
+        """Rows -> JSON array bytes."""
+        return orjson.dumps(self.many(rows))
+
+    def _compile(self, fields):
+        items = ", ".join(f"{key!r}: {self._expression(source)}" for key, source in fields.items())
+        return "{" + items + "}"
+
+    def _expression(self, source):
+        if isinstance(source, str):
+            if not source.isidentifier():
+                raise ValueError(f"invalid attribute name {source!r}")
+            return f"row.{source}"
+        if isinstance(source, int):
+            return f"row[{source}]"
+        if isinstance(source, tuple):
+            attr, convert = source
+            return f"{self._bind(convert)}({self._expression(attr)})"
+        if isinstance(source, dict):
+            return self._compile(source)
+        if isinstance(source, Many):
+            self._nested.append(source.serializer)
+            nested = self._bind(source.serializer.to_dict)
+            return f"[{nested}(item) for item in {self._expression(source.source)}]"
+        if isinstance(source, Const):
+            return self._bind(source.value)
+        if callable(source):
+            return f"{self._bind(source)}(row)"
+        raise TypeError(f"unsupported field source {source!r}")
+
+    def _bind(self, value):
+        name = f"_v{len(self._namespace)}"
+        self._namespace[name] = value
+        return name
+
+
+def optional_isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def image_option(letter, prefix):
+    """{'text', 'image_url', 'image_id'} of one answer option, from <prefix><letter>_<field> columns."""
+    return {
+        'text': f"{prefix}{letter}_text",
+        'image_url': f"{prefix}{letter}_image_url",
+        'image_id': f"{prefix}{letter}_image_id",
+    }
+
+
+# Exam question as served to examinees and examiners
+EXAM_QUESTION = Serializer({
+    'question_id': ('question_id', str),
+    'question_text': 'question_text',
+    'question_image_url': 'question_image_url',
+    'question_image_id': 'question_image_id',
+    'marks': 'marks',
+    'question_order': 'question_order',
+    'options': {letter: image_option(letter, 'opt') for letter in 'ABCD'},
+    'correct_answer': 'correct_answer',
+}, name='exam_question')
+
+# enter-exam-code paper and view-created-exam. The paper dict is cached and
+# read back by submit-exam, so ids and timestamps are plain strings.
+EXAM_PAPER = Serializer({
+    'exam_id': ('exam_id', str),
+    'exam_name': 'exam_name',
+    'exam_code': 'exam_code',
+    'subject': 'subject',
+    'chapter': 'chapter',
+    'class_name': 'class_name',
+    'description': 'description',
+    'total_marks': 'total_marks',
+    'passing_marks': 'passing_marks',
+    'total_time_minutes': 'total_time_minutes',
+    'attempts_allowed': 'attempts_allowed',
+    'negative_marks_value': 'negative_marks_value',
+    'examiner_name': 'examiner_name',
+    'created_at': ('created_at', optional_isoformat),
+    'updated_at': ('updated_at', optional_isoformat),
+    'questions': Many('questions', EXAM_QUESTION),
+}, name='exam_paper')
+
+# previous-attempt-exam/<id>: the attempt header ...
+ATTEMPT_REVIEW_EXAM = Serializer({
+    'attempt_exam_id': 'attempt_exam_id',
+    'exam_id': 'exam_id',
+    'exam_name': 'exam_name',
+    'subject': 'subject',
+    'class_name': 'class_name',
+    'chapter': 'chapter',
+    'total_marks': 'total_marks',
+    'total_time_minutes': 'total_time_minutes',
+    'negative_marks_value': 'negative_marks_value',
+    'examiner_name': 'examiner_name',
+    'score': 'score',
+    'total_questions': 'total_questions',
+    'correct_answers': 'correct_answers',
+    'wrong_answers': 'wrong_answers',
+    'unanswered_questions': 'unanswered_questions',
+    'time_taken_seconds': 'time_taken_seconds',
+    'created_at': 'created_at',
+}, name='attempt_review_exam')
+
+# ... and its question snapshots
+ATTEMPT_REVIEW_QUESTION = Serializer({
+    'question_id': 'attempt_question_id',
+    'original_question_id': 'original_question_id',
+    'question_text': 'question_text',
+    'question_image_url': 'question_image_url',
+    'question_image_id': 'question_image_id',
+    'marks': Const(1),  # marks are not snapshotted per question
+    'question_order': Const(None),
+    'selected_answer': 'selected_option_label',
+    'correct_answer': 'correct_option_label',
+    'is_correct': 'is_correct',
+    'options': {letter: image_option(letter.lower(), 'option_') for letter in 'ABCD'},
+}, name='attempt_review_question')
@@ -0,0 +1,267 @@
+import hashlib
+import os
+from abc import ABC, abstractmethod
+import tempfile
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import cloudinary.api
+
+from app.utils.cloudinary_utils import upload_image, delete_image
+
+# Uploads are read and hashed in chunks so large files never sit in memory
+CHUNK_SIZE = 1024 * 1024
+# All media lives under one prefix; the rest of the public_id is the SHA-256
+MEDIA_PREFIX = "exam-app"
+
+SpooledUpload = namedtuple('SpooledUpload', ['path', 'digest', 'size'])
+
+
+class StorageError(Exception):
+    pass
+
+
+def spool_upload(file, directory=None, chunk_size=CHUNK_SIZE):
+    """Copy an uploaded file to a temp file in chunks, hashing it on the way."""
+    stream = getattr(file, 'stream', file)
+    digest = hashlib.sha256()
+    size = 0
+    fd, path = tempfile.mkstemp(prefix='upload-', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return SpooledUpload(path, digest.hexdigest(), size)
+
+
+class MediaStorage(ABC):
+    """
+    Content-addressed media storage. An upload's public_id (stored in the
+    *_image_id columns) is "exam-app/<sha256>", so the same image used in 30
+    questions is stored, and sent over the network, once. Backends implement
+    put/remove/list_ids; put() stores unless the object already exists and
+    reports whether it created it. upload() returns {"url", "public_id",
+    "created"} where created is False when the content was already stored,
+    or when the backend cannot tell: callers delete only assets they
+    created, and a shared asset must never be deleted by mistake.
+
+    Dedup hits remembered in `_known` expire after `known_ttl` seconds:
+    another worker (or the media GC) may delete the asset meanwhile. Routes
+    close the remaining window with media_gc_utils.claim_reused_uploads;
+    `known_ttl` must stay below MEDIA_GC_TOMBSTONE_SECONDS for that to hold.
+    """
+    name = None
+    spool_dir = None
+
+    def __init__(self, known_max_entries=10000, known_ttl=300):
+        self.known_max_entries = known_max_entries
+        self.known_ttl = known_ttl
+        self._known = OrderedDict()  # public_id -> (url, expires_at)
+        self._lock = threading.Lock()
+        self._digest_locks = [threading.Lock() for _ in range(64)]
+
+    def upload(self, file, folder=None, timeout=None):
+        # `folder` is kept for callers; content addressing puts everything under MEDIA_PREFIX
+        spooled = spool_upload(file, self.spool_dir)
+        public_id = f"{MEDIA_PREFIX}/{spooled.digest}"
+        try:
+            # Identical files in one request hash to the same lock and upload once
+            with self._digest_locks[int(spooled.digest[:8], 16) % len(self._digest_locks)]:
+                url = self._known_url(public_id)
+                created = False
+                if url is None:
+                    url, created = self.put(spooled.path, public_id, timeout=timeout)
+                self._remember(public_id, url)
+        finally:
+            if os.path.exists(spooled.path):
+                os.unlink(spooled.path)
+        return {"url": url, "public_id": public_id, "created": created}
+
+    def delete(self, public_id):
+        self.forget(public_id)
+        return self.remove(public_id)
+
+    def forget(self, public_id):
+        """Drop a remembered dedup hit, so the next upload goes to the backend."""
+        with self._lock:
+            self._known.pop(public_id, None)
+
+    @abstractmethod
+    def put(self, path, public_id, timeout=None):
+        """
+        Store the file at `path` (may be moved) unless `public_id` already
+        exists. Returns (url, created); created only if known to be new.
+        """
+
+    @abstractmethod
+    def remove(self, public_id):
+        """Delete the stored object; a missing one is not an error."""
+
+    @abstractmethod
+    def list_ids(self):
+        """Iterate over the public_ids of all stored media (for the orphan sweep)."""
+
+    def _known_url(self, public_id):
+        with self._lock:
+            entry = self._known.get(public_id)
+            if entry is None:
+                return None
+            url, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._known[public_id]
+                return None
+            self._known.move_to_end(public_id)
+            return url
+
+    def _remember(self, public_id, url):
+        with self._lock:
+            self._known[public_id] = (url, time.monotonic() + self.known_ttl)
+            self._known.move_to_end(public_id)
+            while len(self._known) > self.known_max_entries:
+                self._known.popitem(last=False)
+
+
+class CloudinaryStorage(MediaStorage):
+    """Media storage on Cloudinary (production)."""
+    name = 'cloudinary'
+
+    def put(self, path, public_id, timeout=None):
+        # No existence lookup first (the Admin API is rate limited): with
+        # overwrite=False an existing asset is kept and reported as existing.
+        # Without a definite existing=False the asset counts as not created,
+        # so discard() leaves it to the orphan sweep instead of deleting it.
+        folder, _, name = public_id.rpartition('/')
+        options = {'timeout': timeout} if timeout else {}
+        result = upload_image(path, folder=folder, public_id=name, overwrite=False,
+                              unique_filename=False, **options)
+        return result["url"], result["existing"] is False
+
+    def remove(self, public_id):
+        # invalidate: purge CDN copies too, or the URL keeps working for a while
+        return delete_image(public_id, invalidate=True)
+
+    def list_ids(self):
+        next_cursor = None
+        while True:
+            options = {'next_cursor': next_cursor} if next_cursor else {}
+            page = cloudinary.api.resources(type='upload', prefix=f"{MEDIA_PREFIX}/", max_results=500, **options)
+            for resource in page.get('resources', []):
+                yield resource['public_id']
+            next_cursor = page.get('next_cursor')
+            if not next_cursor:
+                break
+
+
+class LocalStorage(MediaStorage):
+    """
+    Media on local disk under MEDIA_ROOT, served from MEDIA_URL_PATH.
+    Files land at <root>/exam-app/<sha[:2]>/<sha>; temp files are spooled
+    inside the root so the final move is an atomic rename.
+    """
+    name = 'local'
+
+    def __init__(self, root, url_path='/media', **kwargs):
+        super().__init__(**kwargs)
+        self.root = os.path.abspath(root)
+        self.url_path = url_path.rstrip('/')
+        self.spool_dir = os.path.join(self.root, '.tmp')
+        os.makedirs(self.spool_dir, exist_ok=True)
+
+    def path_for(self, public_id):
+        prefix, _, digest = public_id.rpartition('/')
+        if prefix != MEDIA_PREFIX or len(digest) != 64 or not all(c in '0123456789abcdef' for c in digest):
+            return None
+        return os.path.join(self.root, prefix, digest[:2], digest)
+
+    def exists(self, public_id):
+        path = self.path_for(public_id)
+        return f"{self.url_path}/{public_id}" if path and os.path.exists(path) else None
+
+    def put(self, path, public_id, timeout=None):
+        url = self.exists(public_id)
+        if url is not None:
+            return url, False
+        target = self.path_for(public_id)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(path, target)
+        return f"{self.url_path}/{public_id}", True
+
+    def remove(self, public_id):
+        path = self.path_for(public_id)
+        if path and os.path.exists(path):
+            os.unlink(path)
+        return {"result": "ok"}
+
+    def list_ids(self):
+        for _, _, filenames in os.walk(os.path.join(self.root, MEDIA_PREFIX)):
+            for filename in filenames:
+                yield f"{MEDIA_PREFIX}/{filename}"
+
+
+class FakeStorage(MediaStorage):
+    """
+    In-memory storage for local runs and benchmarks (MEDIA_STORAGE=fake).
+    `latency` simulates network time per upload; `fail_first` makes that many
+    uploads raise StorageError first, to exercise retries.
+    """
+    name = 'fake'
+
+    def __init__(self, latency=0.0, fail_first=0, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.fail_first = fail_first
+        self.objects = {}
+        self.uploads = 0
+        self.deletes = 0
+
+    def exists(self, public_id):
+        with self._lock:
+            return f"fake://{public_id}" if public_id in self.objects else None
+
+    def put(self, path, public_id, timeout=None):
+        url = self.exists(public_id)
+        if url is not None:
+            return url, False
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.uploads += 1
+            if self.fail_first > 0:
+                self.fail_first -= 1
+                raise StorageError("Simulated upload failure")
+        with open(path, 'rb') as f:
+            data = f.read()
+        with self._lock:
+            self.objects[public_id] = data
+        return f"fake://{public_id}", True
+
+    def remove(self, public_id):
+        with self._lock:
+            self.deletes += 1
+            self.objects.pop(public_id, None)
+        return {"result": "ok"}
+
+    def list_ids(self):
+        with self._lock:
+            return list(self.objects)
+
+
+def storage_from_config(config):
+    backend = config.get('MEDIA_STORAGE', 'cloudinary')
+    options = {'known_ttl': config.get('MEDIA_KNOWN_TTL', 300)}
+    if backend == 'cloudinary':
+        return CloudinaryStorage(**options)
+    if backend == 'local':
+        return LocalStorage(config.get('MEDIA_ROOT', 'media'), config.get('MEDIA_URL_PATH', '/media'), **options)
+    if backend == 'fake':
+        return FakeStorage(latency=config.get('FAKE_STORAGE_LATENCY', 0.0), **options)
+    raise ValueError(f"Unknown MEDIA_STORAGE {backend!r}")
@@ -0,0 +1,186 @@
+import uuid
+from datetime import datetime, timedelta
+from app.models import db, ExamineeAttemptExamQuestions
+
+OPTION_LETTERS = ('A', 'B', 'C', 'D')
+
+
+def normalize_options(options):
+    """
+    Single pass over a submitted question's options.
+    Returns ({letter: option}, selected_letter); the first option seen for a
+    letter wins, matching the old next(...) lookups.
+    """
+    by_letter = {}
+    selected_label = None
+    for opt in options:
+        letter = opt.get('option_letter')
+        if letter not in by_letter:
+            by_letter[letter] = opt
+        if selected_label is None and opt.get('selected_by_user'):
+            selected_label = letter
+    return by_letter, selected_label
+
+
+def build_attempt_question_rows(attempt_exam_id, questions_payload, answer_key):
+    """
+    Grade the submitted questions against the answer key and prepare both
+    the response payload and the attempt-question rows for a single
+    executemany insert. Returns (attempted_questions, rows, grade_result).
+    """
+    normalized = []
+    answers = {}
+    for q in questions_payload:
+        options = q.get('options', [])
+        by_letter, selected_label = normalize_options(options)
+        normalized.append((q, options, by_letter, selected_label))
+        answers[str(q.get('question_id'))] = selected_label
+
+    grade = answer_key.grade(answers)
+
+    attempted_questions = []
+    rows = []
+    now = datetime.utcnow()
+
+    for position, (q, options, by_letter, selected_label) in enumerate(normalized):
+        key_position = answer_key.positions.get(str(q.get('question_id')))
+        if key_position is not None:
+            correct_answer = answer_key.labels[key_position]
+            is_correct = grade.correct[key_position]
+            marks = answer_key.marks[key_position]
+            original_question_id = uuid.UUID(answer_key.question_ids[key_position])
+        else:
+            # Question no longer in the exam (edited mid-attempt): keep the snapshot, score nothing
+            correct_answer = q.get('correct_answer') or ''
+            is_correct = False
+            marks = q.get('marks', 1)
+            original_question_id = None
+
+        # Response options: everything submitted plus blanks for missing letters
+        options_data = [
+            {
+                'option_letter': opt.get('option_letter'),
+                'option_text': opt.get('option_text'),
+                'option_image_url': opt.get('option_image_url'),
+                'option_image_id': opt.get('option_image_id'),
+                'is_correct': opt.get('option_letter') == correct_answer,
+                'selected_by_user': opt.get('selected_by_user', False)
+            }
+            for opt in options
+        ]
+        for letter in OPTION_LETTERS:
+            if letter not in by_letter:
+                options_data.append({
+                    'option_letter': letter,
+                    'option_text': '',
+                    'option_image_url': None,
+                    'option_image_id': None,
+                    'is_correct': False,
+                    'selected_by_user': False
+                })
+        options_data.sort(key=lambda x: x['option_letter'])
+
+        attempted_questions.append({
+            'question_id': q.get('question_id'),
+            'question_text': q.get('question_text'),
+            'question_image_url': q.get('question_image_url'),
+            'question_image_id': q.get('question_image_id'),
+            'marks': marks,
+            'correct_answer': correct_answer,
+            'selected_answer': selected_label,
+            'is_correct': is_correct,
+            'options': options_data
+        })
+
+        row = _snapshot_row(
+            attempt_exam_id, position, now, original_question_id, q,
+            correct_answer, selected_label, is_correct
+        )
+        for letter in OPTION_LETTERS:
+            opt = by_letter.get(letter)
+            prefix = f'option_{letter.lower()}'
+            row[f'{prefix}_text'] = opt.get('option_text') if opt else ''
+            row[f'{prefix}_image_url'] = opt.get('option_image_url') if opt else None
+            row[f'{prefix}_image_id'] = opt.get('option_image_id') if opt else None
+        rows.append(row)
+
+    return attempted_questions, rows, grade
+
+
+def parse_compact_answers(answers, question_ids):
+    """
+    Normalize a compact answers payload to {question_id: label}.
+    Accepts either a {question_id: label} map or a packed string with one
+    character per question in paper order ("AB-D...", '-' or ' ' = unanswered).
+    Raises ValueError on anything else.
+    """
+    if isinstance(answers, str):
+        if len(answers) > len(question_ids):
+            raise ValueError('answers string is longer than the exam')
+        parsed = {}
+        for qid, char in zip(question_ids, answers.upper()):
+            if char in OPTION_LETTERS:
+                parsed[qid] = char
+            elif char not in '- ':
+                raise ValueError(f'invalid answer label {char!r}')
+        return parsed
+
+    if isinstance(answers, dict):
+        parsed = {}
+        for qid, label in answers.items():
+            if label in (None, '', '-'):
+                continue
+            label = str(label).upper()
+            if label not in OPTION_LETTERS:
+                raise ValueError(f'invalid answer label {label!r}')
+            parsed[str(qid)] = label
+        return parsed
+
+    raise ValueError('answers must be an object or a string')
+
+
+def build_attempt_question_rows_from_paper(attempt_exam_id, exam_paper, answer_key, grade):
+    """
+    Attempt-question snapshot rows resolved server-side from the cached
+    exam paper, for submissions that only carry answers.
+    """
+    rows = []
+    now = datetime.utcnow()
+    for position, q in enumerate(exam_paper['questions']):
+        key_position = answer_key.positions.get(q['question_id'])
+        if key_position is None:
+            continue  # paper and key disagree mid-update; key is authoritative
+        row = _snapshot_row(
+            attempt_exam_id, position, now, uuid.UUID(q['question_id']), q,
+            answer_key.labels[key_position], grade.selected[key_position], grade.correct[key_position]
+        )
+        for letter in OPTION_LETTERS:
+            opt = q['options'].get(letter) or {}
+            prefix = f'option_{letter.lower()}'
+            row[f'{prefix}_text'] = opt.get('text') or ''
+            row[f'{prefix}_image_url'] = opt.get('image_url')
+            row[f'{prefix}_image_id'] = opt.get('image_id')
+        rows.append(row)
+    return rows
+
+
+def _snapshot_row(attempt_exam_id, position, now, original_question_id, q, correct_answer, selected_label, is_correct):
+    return {
+        'attempt_question_id': uuid.uuid4(),
+        'attempt_exam_id': attempt_exam_id,
+        'original_question_id': original_question_id,
+        'question_text': q.get('question_text'),
+        'question_image_url': q.get('question_image_url'),
+        'question_image_id': q.get('question_image_id'),
+        'correct_option_label': correct_answer,
+        'selected_option_label': selected_label,
+        'is_correct': is_correct,
+        # Review orders by created_at, so keep submission order explicit
+        'created_at': now + timedelta(microseconds=position),
+    }
+
+
+def insert_attempt_question_rows(rows):
+    """Write all attempt-question rows in one executemany round trip."""
+    if rows:
+        db.session.execute(db.insert(ExamineeAttemptExamQuestions), rows)
@@ -0,0 +1,149 @@
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from app.utils.storage_utils import CloudinaryStorage, storage_from_config
+
+logger = logging.getLogger(__name__)
+
+# question_<n>_image / question_<n>_opt<A-D>_image form fields
+IMAGE_FIELD_RE = re.compile(r'^question_(\d+)_(?:image|opt[ABCD]_image)$')
+
+
+class UploadError(Exception):
+    pass
+
+
+class UploadPipeline:
+    """
+    Uploads every image of a create/update-exam request in parallel on a
+    bounded per-worker pool. Each upload has a timeout and is retried with
+    exponential backoff; if any upload still fails, the ones that succeeded
+    are deleted again so a failed request leaves no assets behind. Call
+    discard() with the results when the DB transaction fails afterwards.
+    """
+
+    def __init__(self, storage=None, workers=8, timeout=30, retries=2, backoff=0.5):
+        self.storage = storage or CloudinaryStorage()
+        self.workers = workers
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.storage = storage_from_config(app.config)
+        self.workers = app.config.get('UPLOAD_WORKERS', self.workers)
+        self.timeout = app.config.get('UPLOAD_TIMEOUT', self.timeout)
+        self.retries = app.config.get('UPLOAD_RETRIES', self.retries)
+        self.backoff = app.config.get('UPLOAD_RETRY_BACKOFF', self.backoff)
+        self._executor = None
+        app.extensions['upload_pipeline'] = self
+
+    def upload_exam_images(self, files, question_count):
+        """
+        Upload the question/option images of an exam request.
+        Returns {field_name: {"url": ..., "public_id": ...}}; raises UploadError.
+        """
+        jobs = {}
+        for field_name, file in files.items():
+            match = IMAGE_FIELD_RE.match(field_name)
+            if not file or not match or not 1 <= int(match.group(1)) <= question_count:
+                continue
+            folder = "exam-app/options" if '_opt' in field_name else "exam-app/questions"
+            jobs[field_name] = (file, folder)
+        return self.upload_many(jobs)
+
+    def reupload(self, files, uploads, public_ids):
+        """
+        Upload again the files whose reused asset was deleted by the media GC
+        before this request could reference it; updates `uploads` in place.
+        """
+        jobs = {}
+        for field_name, result in uploads.items():
+            if result["public_id"] in public_ids:
+                self.storage.forget(result["public_id"])
+                file = files[field_name]
+                file.seek(0)
+                jobs[field_name] = (file, "exam-app/options" if '_opt' in field_name else "exam-app/questions")
+        uploads.update(self.upload_many(jobs))
+        return uploads
+
+    def upload_many(self, jobs):
+        """{key: (file, folder)} -> {key: upload result}, all or nothing."""
+        if not jobs:
+            return {}
+        if len(jobs) == 1 or self.workers <= 1:
+            results = {}
+            try:
+                for key, (file, folder) in jobs.items():
+                    results[key] = self._upload_with_retry(file, folder)
+            except Exception as e:
+                self.discard(results)
+                raise UploadError(f"Image upload failed for {key}: {e}") from e
+            return results
+
+        executor = self._pool()
+        futures = {executor.submit(self._upload_with_retry, file, folder): key
+                   for key, (file, folder) in jobs.items()}
+        # Every attempt is bounded by `timeout`, so this bounds the whole batch
+        done, not_done = wait(futures, timeout=self.timeout * (self.retries + 1) + self._total_backoff())
+
+        results, failed = {}, []
+        for future in done:
+            key = futures[future]
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                failed.append((key, e))
+        for future in not_done:
+            failed.append((futures[future], TimeoutError("upload timed out")))
+            # Clean up late finishers too
+            future.add_done_callback(self._discard_future)
+
+        if failed:
+            self.discard(results)
+            key, error = failed[0]
+            raise UploadError(f"Image upload failed for {key}: {error}")
+        return results
+
+    def discard(self, results):
+        """Delete already-uploaded assets (failed upload batch or DB rollback)."""
+        for result in (results or {}).values():
+            if not result.get("created", True):
+                continue  # content already existed and may be shared
+            try:
+                self.storage.delete(result["public_id"])
+            except Exception:
+                logger.exception("Failed to delete orphaned upload %s", result.get("public_id"))
+
+    def _upload_with_retry(self, file, folder):
+        for attempt in range(self.retries + 1):
+            try:
+                if attempt:
+                    file.seek(0)
+                return self.storage.upload(file, folder, timeout=self.timeout)
+            except Exception:
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.backoff * (2 ** attempt))
+
+    def _total_backoff(self):
+        return sum(self.backoff * (2 ** attempt) for attempt in range(self.retries))
+
+    def _discard_future(self, future):
+        if not future.cancelled() and future.exception() is None:
+            self.discard({'late': future.result()})
+
+    def _pool(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='image-upload')
+        return self._executor
+
+
+upload_pipeline = UploadPipeline()
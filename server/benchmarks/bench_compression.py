@@ -0,0 +1,72 @@
+"""
+Exam paper compression: size and compression time per encoding (what every
+request would pay without precompression), and enter-exam-code latency
+with the compressed bytes served from the exam paper cache.
+
+    python -m benchmarks.bench_compression [--questions 100] [--repeat 200]
+"""
+import argparse
+import json
+import time
+import uuid
+
+from benchmarks.common import make_app, measure
+from app.models import db, User, ExaminerCreatedExam, ExaminerCreatedExamQuestion
+from app.utils.exam_cache_utils import exam_paper_cache
+from app.utils.compression_utils import response_compression
+
+EXAM_CODE = 'BNCH-0001'
+
+
+def seed(question_count):
+    user = User(id=uuid.uuid4(), name='Bench Examiner', email=f'{uuid.uuid4()}@bench.local')
+    user.password_hash = 'x'
+    db.session.add(user)
+    exam = ExaminerCreatedExam(
+        exam_id=uuid.uuid4(), exam_name='Bench', exam_code=EXAM_CODE, subject='Physics', chapter='Mechanics',
+        class_name='XI', total_marks=question_count, total_time_minutes=60, user_id=user.id
+    )
+    db.session.add(exam)
+    for i in range(question_count):
+        db.session.add(ExaminerCreatedExamQuestion(
+            exam_id=exam.exam_id, question_text=f'Question {i}: ' + 'a block slides down a frictionless incline; ' * 3,
+            marks=1, question_order=i, correct_answer='ABCD'[i % 4],
+            **{f'opt{letter}_text': f'Option {letter}: {i * 3 + 1} m/s^2 along the incline' for letter in 'ABCD'},
+        ))
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--questions', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    app = make_app()
+    client = app.test_client()
+    url = f'/api/examinee/enter-exam-code/{EXAM_CODE}'
+    with app.app_context():
+        seed(args.questions)
+    body = client.get(url).get_data()
+
+    results = {'identity_bytes': len(body), 'encodings': {}}
+    with app.test_request_context():
+        for encoding in ('identity',) + response_compression.algorithms:
+            entry = {}
+            if encoding != 'identity':
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    data = response_compression.compress(body, encoding)
+                entry['compress_ms'] = round((time.perf_counter() - start) * 1000 / args.repeat, 3)
+                entry['bytes'] = len(data)
+                entry['ratio'] = round(len(data) / len(body), 4)
+            headers = {'Accept-Encoding': encoding}
+            entry['cached_request'] = measure(lambda: client.get(url, headers=headers), repeat=args.repeat)
+            results['encodings'][encoding] = entry
+    results['exam_paper_cache'] = exam_paper_cache.stats()
+
+    print(json.dumps({'benchmark': 'compression', 'questions': args.questions, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
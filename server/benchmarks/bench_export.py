@@ -0,0 +1,133 @@
+"""
+Exam results export: rows/sec and peak RSS of the streaming CSV / XLSX
+export (with and without per-question answers) against the leaderboard
+endpoint, which materializes every attempt into one JSON list. Each
+scenario runs in a fresh process so its peak RSS is its own.
+
+    python -m benchmarks.bench_export [--attempts 100000] [--questions 10]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from benchmarks.common import make_app, BENCH_DATABASE_URL
+from app.models import db, User, ExaminerCreatedExam, ExamineeAttemptExams, ExamineeAttemptExamQuestions
+from app.utils.jwt_utils import jwt_manager
+
+EXAM_ID = uuid.UUID('00000000-0000-0000-0000-0000000000b1')
+EXAMINER_ID = uuid.UUID('00000000-0000-0000-0000-0000000000a1')
+SCENARIOS = {
+    'leaderboard_json': f'/api/examiner/taken-exam-result/{EXAM_ID}/leaderboard',
+    'export_csv': f'/api/examiner/taken-exam-result/{EXAM_ID}/export?format=csv',
+    'export_csv_answers': f'/api/examiner/taken-exam-result/{EXAM_ID}/export?format=csv&answers=1',
+    'export_xlsx': f'/api/examiner/taken-exam-result/{EXAM_ID}/export?format=xlsx',
+    'export_xlsx_answers': f'/api/examiner/taken-exam-result/{EXAM_ID}/export?format=xlsx&answers=1',
+}
+
+
+def peak_rss_mb():
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def seed(attempts_count, questions_count, users_count=5000):
+    now = datetime.utcnow()
+    users_count = min(users_count, attempts_count)
+    users = [{'id': EXAMINER_ID, 'name': 'Bench Examiner', 'email': 'examiner@bench.local',
+              'password_hash': 'x', 'created_at': now, 'updated_at': now}]
+    users += [{'id': uuid.uuid4(), 'name': f'Examinee {i}', 'email': f'examinee{i}@bench.local',
+               'password_hash': 'x', 'created_at': now, 'updated_at': now} for i in range(users_count)]
+    db.session.execute(db.insert(User), users)
+    db.session.execute(db.insert(ExaminerCreatedExam), [{
+        'exam_id': EXAM_ID, 'exam_name': 'Bench', 'exam_code': 'BNCH-EXPT', 'subject': 'Physics',
+        'chapter': 'Optics', 'class_name': 'Twelve', 'total_marks': questions_count, 'total_time_minutes': 60,
+        'user_id': EXAMINER_ID, 'created_at': now, 'updated_at': now,
+    }])
+
+    for start in range(0, attempts_count, 2000):
+        attempts, attempt_questions = [], []
+        for i in range(start, min(start + 2000, attempts_count)):
+            attempt_id = uuid.uuid4()
+            correct = i % (questions_count + 1)
+            attempts.append({
+                'attempt_exam_id': attempt_id, 'examinee_id': users[1 + i % users_count]['id'],
+                'exam_id': EXAM_ID, 'exam_name': 'Bench', 'subject': 'Physics', 'chapter': 'Optics',
+                'class_name': 'Twelve', 'total_marks': questions_count, 'total_time_minutes': 60,
+                'score': correct, 'total_questions': questions_count, 'correct_answers': correct,
+                'wrong_answers': questions_count - correct, 'unanswered_questions': 0,
+                'time_taken_seconds': 60 + i % 3600, 'created_at': now - timedelta(seconds=i),
+            })
+            for n in range(questions_count):
+                attempt_questions.append({
+                    'attempt_question_id': uuid.uuid4(), 'attempt_exam_id': attempt_id,
+                    'question_text': f'Question {n}', 'correct_option_label': 'A',
+                    'selected_option_label': 'A' if n < correct else 'B', 'is_correct': n < correct,
+                    'created_at': now + timedelta(microseconds=n),
+                })
+        db.session.execute(db.insert(ExamineeAttemptExams), attempts)
+        db.session.execute(db.insert(ExamineeAttemptExamQuestions), attempt_questions)
+    db.session.commit()
+
+
+def run_scenario(name):
+    """Child process: one request, body consumed chunk by chunk."""
+    app = make_app(reset=False)
+    client = app.test_client()
+    with app.app_context():
+        headers = {'Authorization': f'Bearer {jwt_manager.encode(str(EXAMINER_ID))}'}
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    response = client.get(SCENARIOS[name], headers=headers, buffered=False)
+    size = 0
+    for chunk in response.iter_encoded():
+        size += len(chunk)
+    response.close()
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        'status': response.status_code, 'seconds': round(elapsed, 3), 'bytes': size,
+        'peak_rss_mb': peak_rss_mb(), 'rss_growth_mb': round(peak_rss_mb() - rss_before, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--attempts', type=int, default=100000)
+    parser.add_argument('--questions', type=int, default=10)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--scenario', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        run_scenario(args.scenario)
+        return
+
+    app = make_app()
+    with app.app_context():
+        seed(args.attempts, args.questions)
+
+    results = {}
+    env = {**os.environ, 'BENCH_DATABASE_URL': BENCH_DATABASE_URL}
+    for name in args.scenarios.split(','):
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_export', '--scenario', name],
+            env=env, check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        result['rows_per_sec'] = round(args.attempts / result['seconds'], 1)
+        results[name] = result
+
+    print(json.dumps({
+        'benchmark': 'results_export',
+        'attempts': args.attempts,
+        'questions': args.questions,
+        'results': results,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
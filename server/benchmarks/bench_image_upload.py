@@ -0,0 +1,92 @@
+"""
+create-exam image uploads: serial (one upload_image call after another, as
+before) vs the parallel UploadPipeline, against FakeStorage with simulated
+network latency. Also checks retry, cleanup and content-addressed dedup.
+
+    python -m benchmarks.bench_image_upload [--questions 50] [--latency 0.05] [--workers 8]
+"""
+import argparse
+import io
+import json
+import time
+
+from benchmarks.common import BENCH_DATABASE_URL  # noqa: F401  (sets DATABASE_URL before app import)
+from werkzeug.datastructures import FileStorage
+from app.utils.storage_utils import FakeStorage
+from app.utils.upload_utils import UploadPipeline, UploadError
+
+
+def exam_files(questions):
+    """question_<n>_image plus four option images per question."""
+    files = {}
+    for n in range(1, questions + 1):
+        for suffix in ('image', 'optA_image', 'optB_image', 'optC_image', 'optD_image'):
+            name = f"question_{n}_{suffix}"
+            files[name] = FileStorage(io.BytesIO(b'\x89PNG' + name.encode() * 64), filename=f"{name}.png")
+    return files
+
+
+def serial_upload(storage, files):
+    results = {}
+    for name, file in files.items():
+        folder = "exam-app/options" if '_opt' in name else "exam-app/questions"
+        results[name] = storage.upload(file, folder)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--questions', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    results = {'uploads': args.questions * 5}
+
+    storage = FakeStorage(latency=args.latency)
+    start = time.perf_counter()
+    serial_upload(storage, exam_files(args.questions))
+    results['serial_s'] = round(time.perf_counter() - start, 3)
+
+    storage = FakeStorage(latency=args.latency)
+    pipeline = UploadPipeline(storage=storage, workers=args.workers, backoff=0.01)
+    start = time.perf_counter()
+    pipeline.upload_exam_images(exam_files(args.questions), args.questions)
+    results['parallel_s'] = round(time.perf_counter() - start, 3)
+    results['speedup'] = round(results['serial_s'] / results['parallel_s'], 2)
+
+    # Transient failures are retried
+    storage = FakeStorage(latency=args.latency, fail_first=3)
+    pipeline = UploadPipeline(storage=storage, workers=args.workers, backoff=0.01)
+    uploaded = pipeline.upload_exam_images(exam_files(5), 5)
+    results['retry'] = {'uploaded': len(uploaded), 'attempts': storage.uploads}
+
+    # Persistent failure: everything already uploaded is deleted again
+    storage = FakeStorage(latency=args.latency, fail_first=3)
+    pipeline = UploadPipeline(storage=storage, workers=args.workers, retries=0, backoff=0.01)
+    try:
+        pipeline.upload_exam_images(exam_files(5), 5)
+    except UploadError:
+        pass
+    results['cleanup'] = {'left_in_storage': len(storage.objects), 'deleted': storage.deletes}
+
+    # The same diagram on every question is stored once
+    storage = FakeStorage(latency=args.latency)
+    pipeline = UploadPipeline(storage=storage, workers=args.workers, backoff=0.01)
+    same = {f"question_{n}_image": FileStorage(io.BytesIO(b'\x89PNG same diagram'), filename='d.png')
+            for n in range(1, 31)}
+    start = time.perf_counter()
+    uploaded = pipeline.upload_exam_images(same, 30)
+    results['dedup'] = {
+        'files': len(same),
+        'stored_objects': len(storage.objects),
+        'distinct_image_ids': len({r['public_id'] for r in uploaded.values()}),
+        'elapsed_s': round(time.perf_counter() - start, 3),
+    }
+
+    print(json.dumps({'benchmark': 'image_upload', 'workers': args.workers,
+                      'latency_s': args.latency, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+JWT decode throughput: the pre-rotation decode_jwt (config lookup and
+f-string debug logging per call) vs the pre-bound JWTManager.
+
+    python -m benchmarks.bench_jwt [--iterations 20000]
+"""
+import argparse
+import json
+import logging
+import time
+
+from benchmarks.common import make_app
+import jwt
+from flask import current_app
+from app.utils.jwt_utils import jwt_manager
+
+logger = logging.getLogger('benchmarks.legacy_jwt')
+
+
+def legacy_decode_jwt(token):
+    """decode_jwt as it was before JWTManager."""
+    try:
+        secret_key = current_app.config.get('SECRET_KEY')
+        if not secret_key:
+            logger.error("SECRET_KEY is not configured in app config")
+            return None
+        logger.debug(f"Attempting to decode token: {token}")
+        payload = jwt.decode(token, secret_key, algorithms=["HS256"], options={"verify_exp": True})
+        logger.debug(f"Successfully decoded token payload: {payload}")
+        return payload
+    except jwt.InvalidTokenError as e:
+        logger.error(f"Invalid JWT token: {str(e)}")
+        return None
+
+
+def ops_per_second(fn, token, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(token)
+    elapsed = time.perf_counter() - start
+    return round(iterations / elapsed, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    results = {}
+    legacy_app = make_app(SECRET_KEY='bench-secret-key-bench-secret-key!')
+    with legacy_app.app_context():
+        token = jwt_manager.encode('00000000-0000-0000-0000-000000000001')
+        results['legacy_decode_ops_per_sec'] = ops_per_second(legacy_decode_jwt, token, args.iterations)
+        results['manager_decode_ops_per_sec'] = ops_per_second(jwt_manager.decode, token, args.iterations)
+
+    rotated_app = make_app(JWT_SIGNING_KEYS='k2:bench-secret-2-bench-secret-2-bench,k1:bench-secret-1-bench-secret-1-bench')
+    with rotated_app.app_context():
+        token = jwt_manager.encode('00000000-0000-0000-0000-000000000001')
+        results['manager_decode_with_kid_ops_per_sec'] = ops_per_second(jwt_manager.decode, token, args.iterations)
+
+    print(json.dumps({'benchmark': 'jwt_decode', 'iterations': args.iterations, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+"""
+Exam lifecycle benchmark. Seeds the bench database with N users, M exams
+of Q questions and K attempts, then drives the real Flask app (test
+client, full middleware and auth) through register, login, create-exam,
+enter-exam-code, submit-exam, previous-attempt-exam (list and review) and
+leaderboard. Reports per endpoint throughput, latency percentiles, SQL
+statements per request and worker memory, as JSON to diff between releases.
+
+    python -m benchmarks.bench_lifecycle [--users 500] [--exams 50] [--questions 20] [--attempts 2000]
+                                         [--requests 200] [--output lifecycle.json]
+
+Run it twice (before/after a change, same arguments and database) and diff
+the two --output files; the seed is fixed so both runs see the same data.
+"""
+import argparse
+import json
+import platform
+import random
+import resource
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from benchmarks.common import BENCH_DATABASE_URL, make_app
+from sqlalchemy import event
+
+from app.models import (
+    db, User, ExaminerCreatedExam, ExaminerCreatedExamQuestion,
+    ExamineeAttemptExams, ExamineeAttemptExamQuestions
+)
+from app.utils.exam_code_utils import exam_code_allocator
+from app.utils.jwt_utils import jwt_manager
+from app.utils.password_utils import password_hasher
+
+PASSWORD = 'bench-password'
+
+
+class QueryCounter:
+    """Counts SQL statements sent on the app's engine."""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._before)
+
+    def _before(self, *args, **kwargs):
+        self.count += 1
+
+
+def seed(users_count, exams_count, questions_count, attempts_count, rng):
+    now = datetime.utcnow()
+    # Codes first: the allocator reserves blocks on its own connection
+    codes = [exam_code_allocator.allocate() for _ in range(exams_count)]
+    password_hash = password_hasher.hash(PASSWORD)
+    users = [{'id': uuid.uuid4(), 'name': f'User {i}', 'email': f'user{i}@bench.local',
+              'password_hash': password_hash, 'created_at': now, 'updated_at': now}
+             for i in range(users_count)]
+    db.session.execute(db.insert(User), users)
+
+    exams, questions = [], []
+    for i in range(exams_count):
+        exam_id = uuid.uuid4()
+        exams.append({
+            'exam_id': exam_id, 'exam_name': f'Exam {i}', 'exam_code': codes[i],
+            'subject': 'Physics', 'chapter': f'Chapter {i % 10}', 'class_name': 'Twelve',
+            'total_marks': questions_count, 'passing_marks': questions_count // 2, 'total_time_minutes': 60,
+            'attempts_allowed': 'multiple', 'negative_marks_value': 0.25, 'examiner_name': 'Bench',
+            'user_id': users[i % users_count]['id'],
+            'created_at': now - timedelta(minutes=i), 'updated_at': now,
+        })
+        for n in range(questions_count):
+            questions.append({
+                'question_id': uuid.uuid4(), 'exam_id': exam_id, 'question_order': n + 1, 'marks': 1,
+                'question_text': f'Question {n} ' + 'lorem ipsum dolor ' * 8,
+                'optA_text': 'Option A', 'optB_text': 'Option B', 'optC_text': 'Option C', 'optD_text': 'Option D',
+                'correct_answer': 'ABCD'[n % 4], 'created_at': now, 'updated_at': now,
+            })
+    db.session.execute(db.insert(ExaminerCreatedExam), exams)
+    db.session.execute(db.insert(ExaminerCreatedExamQuestion), questions)
+
+    questions_by_exam = {}
+    for q in questions:
+        questions_by_exam.setdefault(q['exam_id'], []).append(q)
+
+    attempts, attempt_questions = [], []
+    for i in range(attempts_count):
+        exam = exams[rng.randrange(exams_count)]
+        attempt_id = uuid.uuid4()
+        correct = rng.randint(0, questions_count)
+        attempts.append({
+            'attempt_exam_id': attempt_id, 'examinee_id': users[rng.randrange(users_count)]['id'],
+            'exam_id': exam['exam_id'], 'exam_name': exam['exam_name'], 'subject': exam['subject'],
+            'chapter': exam['chapter'], 'class_name': exam['class_name'], 'total_marks': questions_count,
+            'total_time_minutes': 60, 'negative_marks_value': 0.25, 'examiner_name': 'Bench',
+            'score': correct, 'total_questions': questions_count, 'correct_answers': correct,
+            'wrong_answers': questions_count - correct, 'unanswered_questions': 0,
+            'time_taken_seconds': rng.randint(60, 3600), 'created_at': now - timedelta(seconds=i),
+        })
+        for q in questions_by_exam[exam['exam_id']]:
+            selected = 'ABCD'[rng.randrange(4)]
+            attempt_questions.append({
+                'attempt_question_id': uuid.uuid4(), 'attempt_exam_id': attempt_id,
+                'original_question_id': q['question_id'], 'question_text': q['question_text'],
+                'option_a_text': 'Option A', 'option_b_text': 'Option B',
+                'option_c_text': 'Option C', 'option_d_text': 'Option D',
+                'correct_option_label': q['correct_answer'], 'selected_option_label': selected,
+                'is_correct': selected == q['correct_answer'], 'created_at': now,
+            })
+    db.session.execute(db.insert(ExamineeAttemptExams), attempts)
+    for start in range(0, len(attempt_questions), 5000):
+        db.session.execute(db.insert(ExamineeAttemptExamQuestions), attempt_questions[start:start + 5000])
+    db.session.commit()
+    return users, exams, questions_by_exam, attempts
+
+
+def exam_form(questions_count):
+    return {'exam_data': json.dumps({
+        'exam_name': 'Bench exam', 'subject': 'Physics', 'chapter': 'Optics', 'class_name': 'Twelve',
+        'total_marks': questions_count, 'total_time_minutes': 60, 'negative_marks_value': 0.25,
+        'questions': [{'question_text': f'Question {n} ' + 'lorem ipsum dolor ' * 8, 'marks': 1,
+                       'optA_text': 'Option A', 'optB_text': 'Option B', 'optC_text': 'Option C',
+                       'optD_text': 'Option D', 'correct_answer': 'ABCD'[n % 4]}
+                      for n in range(questions_count)],
+    })}
+
+
+def submit_payload(exam, questions, rng):
+    return {
+        'exam_id': str(exam['exam_id']), 'exam_name': exam['exam_name'], 'exam_code': exam['exam_code'],
+        'subject': exam['subject'], 'chapter': exam['chapter'], 'class_name': exam['class_name'],
+        'total_marks': exam['total_marks'], 'total_time_minutes': exam['total_time_minutes'],
+        'examiner_name': exam['examiner_name'], 'negative_marks_value': exam['negative_marks_value'],
+        'time_taken_seconds': rng.randint(60, 3600),
+        'questions': [{
+            'question_id': str(q['question_id']), 'question_text': q['question_text'], 'marks': q['marks'],
+            'options': [{'option_letter': letter, 'option_text': f'Option {letter}',
+                         'selected_by_user': letter == 'ABCD'[rng.randrange(4)]} for letter in 'ABCD'],
+        } for q in questions],
+    }
+
+
+def scenarios(users, exams, questions_by_exam, attempts, questions_count, rng):
+    """endpoint -> callable(i) returning (method, path, kwargs)."""
+    tokens = {}
+
+    def auth(user):
+        if user['id'] not in tokens:
+            tokens[user['id']] = {'Authorization': f"Bearer {jwt_manager.encode(user['id'])}"}
+        return tokens[user['id']]
+
+    def random_user():
+        return users[rng.randrange(len(users))]
+
+    def random_exam():
+        return exams[rng.randrange(len(exams))]
+
+    return {
+        'register': lambda i: ('POST', '/api/auth/register', {'json': {
+            'name': f'New {i}', 'email': f'new-{uuid.uuid4().hex}@bench.local', 'password': PASSWORD}}),
+        'login': lambda i: ('POST', '/api/auth/login', {'json': {
+            'email': random_user()['email'], 'password': PASSWORD}}),
+        'create-exam': lambda i: ('POST', '/api/examiner/create-exam', {
+            'data': exam_form(questions_count), 'headers': auth(random_user())}),
+        'enter-exam-code': lambda i: ('POST', '/api/examinee/enter-exam-code', {'json': {
+            'exam_code': random_exam()['exam_code']}}),
+        'submit-exam': lambda i: (lambda exam: ('POST', '/api/examinee/submit-exam', {
+            'json': submit_payload(exam, questions_by_exam[exam['exam_id']], rng),
+            'headers': auth(random_user())}))(random_exam()),
+        'previous-attempt-exam': lambda i: ('GET', '/api/examinee/previous-attempt-exam', {
+            'headers': auth(users[i % len(users)])}),
+        'attempt-review': lambda i: (lambda attempt: (
+            'GET', f"/api/examinee/previous-attempt-exam/{attempt['attempt_exam_id']}", {
+                'headers': auth(next(u for u in users if u['id'] == attempt['examinee_id']))}))(
+            attempts[rng.randrange(len(attempts))]),
+        'leaderboard': lambda i: ('GET', f"/api/examinee/attempt-exam/{random_exam()['exam_id']}/leaderboard", {
+            'headers': auth(random_user())}),
+    }
+
+
+def rss_mb():
+    """Current resident set size of this worker process."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return round(int(statm.read().split()[1]) * resource.getpagesize() / 2 ** 20, 1)
+    except OSError:
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def run_endpoint(client, counter, build, requests, warmup):
+    for i in range(warmup):
+        method, path, kwargs = build(i)
+        client.open(path, method=method, **kwargs)
+
+    latencies, queries, statuses = [], [], {}
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    for i in range(requests):
+        method, path, kwargs = build(i)
+        before = counter.count
+        request_start = time.perf_counter()
+        response = client.open(path, method=method, **kwargs)
+        latencies.append((time.perf_counter() - request_start) * 1000)
+        queries.append(counter.count - before)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': requests,
+        'requests_per_sec': round(requests / elapsed, 1),
+        'mean_ms': round(statistics.mean(latencies), 3),
+        'p50_ms': round(latencies[len(latencies) // 2], 3),
+        'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+        'p99_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 3),
+        'queries_per_request': round(statistics.mean(queries), 2),
+        'max_queries': max(queries),
+        'statuses': {str(code): count for code, count in sorted(statuses.items())},
+        'rss_mb': rss_mb(),
+        'rss_growth_mb': round(rss_mb() - rss_before, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--exams', type=int, default=50)
+    parser.add_argument('--questions', type=int, default=20)
+    parser.add_argument('--attempts', type=int, default=2000)
+    parser.add_argument('--requests', type=int, default=200, help='Measured requests per endpoint')
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--endpoints', help='Comma-separated subset (default: all)')
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--output', help='Also write the JSON report to this file')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rss_start = rss_mb()
+    # Uploads never leave the process: the lifecycle has no images
+    app = make_app(MEDIA_STORAGE='local')
+
+    with app.app_context():
+        seed_start = time.perf_counter()
+        users, exams, questions_by_exam, attempts = seed(
+            args.users, args.exams, args.questions, args.attempts, rng
+        )
+        seed_s = time.perf_counter() - seed_start
+        counter = QueryCounter(db.engine)
+
+    client = app.test_client()
+    builders = scenarios(users, exams, questions_by_exam, attempts, args.questions, rng)
+    selected = args.endpoints.split(',') if args.endpoints else list(builders)
+
+    results = {}
+    for endpoint in selected:
+        requests = args.requests
+        if endpoint == 'register':
+            requests = max(1, args.requests // 10)  # password hashing dominates; keep runs short
+        results[endpoint] = run_endpoint(client, counter, builders[endpoint], requests, args.warmup)
+
+    report = {
+        'benchmark': 'lifecycle',
+        'environment': {
+            'python': platform.python_version(),
+            'database': BENCH_DATABASE_URL.split(':', 1)[0],
+            'password_hash_method': app.config['PASSWORD_HASH_METHOD'],
+        },
+        'dataset': {'users': args.users, 'exams': args.exams, 'questions_per_exam': args.questions,
+                    'attempts': args.attempts, 'seed': args.seed, 'seed_s': round(seed_s, 2)},
+        'memory': {'rss_start_mb': rss_start, 'rss_end_mb': rss_mb(),
+                   'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)},
+        'results': results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Password verification throughput (the CPU cost of /api/auth/login) per
+hashing method, inline vs on the bounded PasswordHasher pool, plus how many
+requests of a login burst get a 429 instead of queueing.
+
+    python -m benchmarks.bench_password_hash [--seconds 3] [--burst 200]
+        [--methods scrypt,scrypt:16384:8:1,pbkdf2:sha256:600000]
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import BENCH_DATABASE_URL  # noqa: F401  (sets DATABASE_URL before app import)
+from werkzeug.security import generate_password_hash, check_password_hash
+from app.utils.password_utils import PasswordHasher, PasswordHasherBusy
+
+PASSWORD = 'correct horse battery staple'
+
+
+def logins_per_second(verify, password_hash, clients, seconds):
+    """Run `clients` threads calling verify() for `seconds`; returns successful verifies/sec."""
+    done = 0
+    rejected = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client():
+        nonlocal done, rejected
+        ok = busy = 0
+        while time.perf_counter() < deadline:
+            try:
+                verify(password_hash, PASSWORD)
+                ok += 1
+            except PasswordHasherBusy:
+                busy += 1
+        with lock:
+            done += ok
+            rejected += busy
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return round(done / (time.perf_counter() - start), 2), rejected
+
+
+def burst(hasher, password_hash, size):
+    """Fire `size` verifies at once; count accepted vs 429-style rejections."""
+    def one():
+        try:
+            hasher.verify(password_hash, PASSWORD)
+            return True
+        except PasswordHasherBusy:
+            return False
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=size) as clients:
+        results = list(clients.map(lambda _: one(), range(size)))
+    return {
+        'requests': size,
+        'accepted': sum(results),
+        'rejected_429': size - sum(results),
+        'elapsed_s': round(time.perf_counter() - start, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--burst', type=int, default=200)
+    parser.add_argument('--queue-size', type=int, default=16)
+    parser.add_argument('--methods', default='scrypt,scrypt:16384:8:1,pbkdf2:sha256:600000')
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    results = {}
+    for method in args.methods.split(','):
+        password_hash = generate_password_hash(PASSWORD, method=method)
+        hasher = PasswordHasher(method=method, workers=cores, queue_size=args.queue_size)
+
+        inline, _ = logins_per_second(check_password_hash, password_hash, 1, args.seconds)
+        pooled, rejected = logins_per_second(hasher.verify, password_hash, cores + args.queue_size, args.seconds)
+        results[method] = {
+            'inline_logins_per_sec': inline,
+            'pooled_logins_per_sec': pooled,
+            'pooled_logins_per_sec_per_core': round(pooled / cores, 2),
+            'pooled_rejected_429': rejected,
+            'burst': burst(hasher, password_hash, args.burst),
+        }
+
+    print(json.dumps({'benchmark': 'password_hash', 'cores': cores, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+"""
+Response serialization throughput for the two heaviest payloads, the exam
+paper (enter-exam-code / view-created-exam) and the attempt review
+(previous-attempt-exam/<id>): hand-built dicts + Flask's stdlib JSON
+provider as before, vs the compiled serializers + OrjsonProvider. Rows are
+transient ORM objects, so only dict building and encoding are measured.
+
+    python -m benchmarks.bench_serialization [--questions 100] [--iterations 300]
+"""
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+
+from benchmarks.common import make_app
+from flask.json.provider import DefaultJSONProvider
+from app.models import ExaminerCreatedExam, ExaminerCreatedExamQuestion, ExamineeAttemptExams, ExamineeAttemptExamQuestions
+from app.utils.serializer_utils import EXAM_PAPER, ATTEMPT_REVIEW_EXAM, ATTEMPT_REVIEW_QUESTION
+
+
+def legacy_exam_paper(exam):
+    """build_exam_paper as it was before the compiled serializers."""
+    exam_data = {
+        'exam_id': str(exam.exam_id),
+        'exam_name': exam.exam_name,
+        'exam_code': exam.exam_code,
+        'subject': exam.subject,
+        'chapter': exam.chapter,
+        'class_name': exam.class_name,
+        'description': exam.description,
+        'total_marks': exam.total_marks,
+        'passing_marks': exam.passing_marks,
+        'total_time_minutes': exam.total_time_minutes,
+        'attempts_allowed': exam.attempts_allowed,
+        'negative_marks_value': exam.negative_marks_value,
+        'examiner_name': exam.examiner_name,
+        'created_at': exam.created_at.isoformat() if exam.created_at else None,
+        'updated_at': exam.updated_at.isoformat() if exam.updated_at else None,
+        'questions': []
+    }
+    for question in exam.questions:
+        exam_data['questions'].append({
+            'question_id': str(question.question_id),
+            'question_text': question.question_text,
+            'question_image_url': question.question_image_url,
+            'question_image_id': question.question_image_id,
+            'marks': question.marks,
+            'question_order': question.question_order,
+            'options': {
+                'A': {'text': question.optA_text, 'image_url': question.optA_image_url, 'image_id': question.optA_image_id},
+                'B': {'text': question.optB_text, 'image_url': question.optB_image_url, 'image_id': question.optB_image_id},
+                'C': {'text': question.optC_text, 'image_url': question.optC_image_url, 'image_id': question.optC_image_id},
+                'D': {'text': question.optD_text, 'image_url': question.optD_image_url, 'image_id': question.optD_image_id}
+            },
+            'correct_answer': question.correct_answer
+        })
+    return exam_data
+
+
+def legacy_attempt_review(exam, questions):
+    """get_attempt_exam's dict as it was before the compiled serializers."""
+    exam_data = {
+        'attempt_exam_id': str(exam.attempt_exam_id),
+        'exam_id': str(exam.exam_id),
+        'exam_name': exam.exam_name,
+        'subject': exam.subject,
+        'class_name': exam.class_name,
+        'chapter': exam.chapter,
+        'total_marks': exam.total_marks,
+        'total_time_minutes': exam.total_time_minutes,
+        'negative_marks_value': exam.negative_marks_value,
+        'examiner_name': exam.examiner_name,
+        'score': exam.score,
+        'total_questions': exam.total_questions,
+        'correct_answers': exam.correct_answers,
+        'wrong_answers': exam.wrong_answers,
+        'unanswered_questions': exam.unanswered_questions,
+        'time_taken_seconds': exam.time_taken_seconds,
+        'created_at': exam.created_at.isoformat() if exam.created_at else None,
+        'questions': []
+    }
+    for question in questions:
+        exam_data['questions'].append({
+            'question_id': str(question.attempt_question_id),
+            'original_question_id': str(question.original_question_id) if question.original_question_id else None,
+            'question_text': question.question_text,
+            'question_image_url': question.question_image_url,
+            'question_image_id': question.question_image_id,
+            'marks': 1,
+            'question_order': None,
+            'selected_answer': question.selected_option_label,
+            'correct_answer': question.correct_option_label,
+            'is_correct': question.is_correct,
+            'options': {
+                letter: {
+                    'text': getattr(question, f'option_{letter.lower()}_text'),
+                    'image_url': getattr(question, f'option_{letter.lower()}_image_url'),
+                    'image_id': getattr(question, f'option_{letter.lower()}_image_id'),
+                } for letter in 'ABCD'
+            }
+        })
+    return exam_data
+
+
+def make_exam(question_count):
+    now = datetime.now(timezone.utc)
+    exam = ExaminerCreatedExam(
+        exam_id=uuid.uuid4(), exam_name='Bench exam', exam_code='ABCD-EFGH', subject='Physics',
+        chapter='Mechanics', class_name='XI', description='Serialization benchmark', total_marks=question_count,
+        passing_marks=question_count // 2, total_time_minutes=60, attempts_allowed=1, negative_marks_value=0.25,
+        examiner_name='Bench Examiner', created_at=now, updated_at=now,
+    )
+    exam.questions = [
+        ExaminerCreatedExamQuestion(
+            question_id=uuid.uuid4(), question_text=f'Question {i}: what is the net force?', marks=1,
+            question_order=i, correct_answer='A',
+            optA_text='Zero', optB_text='mg', optC_text='2mg', optD_text='mg/2',
+            optA_image_url=f'https://res.cloudinary.com/demo/image/upload/q{i}a.png', optA_image_id=f'q{i}a',
+        )
+        for i in range(question_count)
+    ]
+    return exam
+
+
+def make_attempt(question_count):
+    attempt = ExamineeAttemptExams(
+        attempt_exam_id=uuid.uuid4(), exam_id=uuid.uuid4(), exam_name='Bench exam', subject='Physics',
+        class_name='XI', chapter='Mechanics', total_marks=question_count, total_time_minutes=60,
+        negative_marks_value=0.25, examiner_name='Bench Examiner', score=question_count * 0.75,
+        total_questions=question_count, correct_answers=question_count // 2, wrong_answers=question_count // 4,
+        unanswered_questions=question_count // 4, time_taken_seconds=1800, created_at=datetime.now(timezone.utc),
+    )
+    questions = [
+        ExamineeAttemptExamQuestions(
+            attempt_question_id=uuid.uuid4(), original_question_id=uuid.uuid4(),
+            question_text=f'Question {i}: what is the net force?', selected_option_label='B',
+            correct_option_label='A', is_correct=False,
+            option_a_text='Zero', option_b_text='mg', option_c_text='2mg', option_d_text='mg/2',
+            option_a_image_url=f'https://res.cloudinary.com/demo/image/upload/q{i}a.png', option_a_image_id=f'q{i}a',
+        )
+        for i in range(question_count)
+    ]
+    return attempt, questions
+
+
+def rows_per_second(fn, rows, iterations):
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - start
+    return round(rows * iterations / elapsed, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--questions', type=int, default=100)
+    parser.add_argument('--iterations', type=int, default=300)
+    args = parser.parse_args()
+
+    app = make_app()
+    stdlib_json = DefaultJSONProvider(app)
+    results = {}
+    with app.app_context():
+        exam = make_exam(args.questions)
+        attempt, questions = make_attempt(args.questions)
+
+        legacy_paper = stdlib_json.dumps({'status': 'success', 'exam': legacy_exam_paper(exam)})
+        fast_paper = app.json.dumps({'status': 'success', 'exam': EXAM_PAPER(exam)})
+        legacy_review = stdlib_json.dumps({'status': 'success', 'exam': legacy_attempt_review(attempt, questions)})
+        review = ATTEMPT_REVIEW_EXAM(attempt)
+        review['questions'] = ATTEMPT_REVIEW_QUESTION.many(questions)
+        fast_review = app.json.dumps({'status': 'success', 'exam': review})
+        results['payloads_identical'] = (
+            json.loads(legacy_paper) == json.loads(fast_paper)
+            and json.loads(legacy_review) == json.loads(fast_review)
+        )
+
+        def legacy_review_body():
+            return stdlib_json.dumps({'status': 'success', 'exam': legacy_attempt_review(attempt, questions)})
+
+        def fast_review_body():
+            exam_data = ATTEMPT_REVIEW_EXAM(attempt)
+            exam_data['questions'] = ATTEMPT_REVIEW_QUESTION.many(questions)
+            return app.json.dumps({'status': 'success', 'exam': exam_data})
+
+        scenarios = {
+            'exam_paper_legacy': lambda: stdlib_json.dumps({'status': 'success', 'exam': legacy_exam_paper(exam)}),
+            'exam_paper_compiled_orjson': lambda: app.json.dumps({'status': 'success', 'exam': EXAM_PAPER(exam)}),
+            'attempt_review_legacy': legacy_review_body,
+            'attempt_review_compiled_orjson': fast_review_body,
+        }
+        for name, fn in scenarios.items():
+            results[f'{name}_rows_per_sec'] = rows_per_second(fn, args.questions, args.iterations)
+        results['payload_bytes'] = {'exam_paper': len(fast_paper), 'attempt_review': len(fast_review)}
+
+    print(json.dumps({
+        'benchmark': 'serialization',
+        'questions': args.questions,
+        'iterations': args.iterations,
+        'results': results,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Compare the legacy per-object submit-exam write path with the batched one.
+
+    python -m benchmarks.bench_submit_exam [--sizes 10,100,500] [--repeat 20]
+"""
+import argparse
+import json
+import uuid
+
+from benchmarks.common import make_app, measure
+from app.models import db, User, ExaminerCreatedExam, ExamineeAttemptExams, ExamineeAttemptExamQuestions
+from app.utils.grading_utils import AnswerKey
+from app.utils.submission_utils import build_attempt_question_rows, insert_attempt_question_rows
+
+
+def seed(question_count):
+    user = User(id=uuid.uuid4(), name='Bench Examinee', email=f'{uuid.uuid4()}@bench.local')
+    user.password_hash = 'x'
+    db.session.add(user)
+    exam = ExaminerCreatedExam(
+        exam_id=uuid.uuid4(), exam_name='Bench', exam_code=str(uuid.uuid4())[:9], subject='S', chapter='C',
+        class_name='K', total_marks=question_count, total_time_minutes=60, user_id=user.id
+    )
+    db.session.add(exam)
+    db.session.flush()
+
+    questions = []
+    for i in range(question_count):
+        questions.append({
+            'question_id': str(uuid.uuid4()),
+            'question_text': f'Question {i} ' + 'lorem ipsum ' * 10,
+            'question_image_url': None,
+            'question_image_id': None,
+            'marks': 1,
+            'correct_answer': 'ABCD'[i % 4],
+            'options': [
+                {
+                    'option_letter': letter,
+                    'option_text': f'Option {letter} for question {i}',
+                    'option_image_url': None,
+                    'option_image_id': None,
+                    'selected_by_user': letter == 'ABCD'[(i * 7) % 4],
+                }
+                for letter in 'ABCD'
+            ],
+        })
+    db.session.commit()
+    return user.id, exam.exam_id, questions
+
+
+def new_attempt(examinee_id, exam_id, question_count):
+    attempt = ExamineeAttemptExams(
+        examinee_id=examinee_id, exam_id=exam_id, exam_name='Bench', subject='S',
+        class_name='K', chapter='C', total_marks=question_count, total_time_minutes=60,
+        score=0, total_questions=question_count, correct_answers=0, wrong_answers=0,
+        unanswered_questions=question_count, time_taken_seconds=1
+    )
+    db.session.add(attempt)
+    db.session.flush()
+    return attempt
+
+
+def legacy_path(examinee_id, exam_id, questions):
+    """The pre-batching implementation: one ORM object and 12 next() scans per question."""
+    attempt = new_attempt(examinee_id, exam_id, len(questions))
+    for q in questions:
+        selected_label = None
+        for opt in q.get('options', []):
+            if opt.get('selected_by_user'):
+                selected_label = opt.get('option_letter')
+                break
+        is_correct = selected_label == q.get('correct_answer') if selected_label else False
+        db.session.add(ExamineeAttemptExamQuestions(
+            attempt_exam_id=attempt.attempt_exam_id,
+            original_question_id=uuid.UUID(q.get('question_id')),
+            question_text=q.get('question_text'),
+            question_image_url=q.get('question_image_url'),
+            question_image_id=q.get('question_image_id'),
+            **{
+                f'option_{letter.lower()}_{field}': next(
+                    (opt.get(f'option_{field}') for opt in q.get('options', []) if opt.get('option_letter') == letter),
+                    '' if field == 'text' else None
+                )
+                for letter in 'ABCD'
+                for field in ('text', 'image_url', 'image_id')
+            },
+            correct_option_label=q.get('correct_answer'),
+            selected_option_label=selected_label,
+            is_correct=is_correct,
+        ))
+    db.session.commit()
+
+
+def answer_key_for(exam_id, questions):
+    return AnswerKey(exam_id, [q['question_id'] for q in questions], [q['correct_answer'] for q in questions],
+                     [q['marks'] for q in questions], 0.0)
+
+
+def batched_path(examinee_id, exam_id, questions, answer_key):
+    attempt = new_attempt(examinee_id, exam_id, len(questions))
+    _, rows, *_ = build_attempt_question_rows(attempt.attempt_exam_id, questions, answer_key)
+    insert_attempt_question_rows(rows)
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='10,100,500')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app = make_app()
+    results = []
+    with app.app_context():
+        for size in [int(s) for s in args.sizes.split(',')]:
+            examinee_id, exam_id, questions = seed(size)
+            answer_key = answer_key_for(exam_id, questions)
+            legacy = measure(lambda: legacy_path(examinee_id, exam_id, questions), repeat=args.repeat)
+            batched = measure(lambda: batched_path(examinee_id, exam_id, questions, answer_key), repeat=args.repeat)
+            results.append({
+                'questions': size,
+                'legacy': legacy,
+                'batched': batched,
+                'speedup': round(legacy['mean_ms'] / batched['mean_ms'], 2) if batched['mean_ms'] else None,
+            })
+
+    print(json.dumps({'benchmark': 'submit_exam_write_path', 'dialect': app.config['SQLALCHEMY_DATABASE_URI'].split(':')[0], 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
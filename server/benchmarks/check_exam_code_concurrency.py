@@ -0,0 +1,156 @@
+"""
+Exam code allocation under concurrency. Creates thousands of exams in
+parallel through the create-exam endpoint, drives several allocator
+instances (one per simulated worker) against the shared counter row, and
+checks that every code is unique and in the XXXX-XXXX format. Also checks
+that the Feistel permutation is a bijection and that a clash with a legacy
+random code is retried. Exits 1 on any failure.
+
+    python -m benchmarks.check_exam_code_concurrency [--exams 2000] [--threads 16] [--workers 4]
+"""
+import argparse
+import json
+import re
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import make_app
+from app.models import db, User, ExaminerCreatedExam, ExamCodeCounter
+from app.utils.exam_code_utils import (
+    CODE_SPACE, ExamCodeAllocator, FeistelPermutation, exam_code_allocator, format_exam_code
+)
+from app.utils.auth_cache_utils import token_cache, principal_from_user
+from app.utils.jwt_utils import jwt_manager
+
+CODE_RE = re.compile(r'^[23456789ABCDEFGHJKMNPQRSTUVWXYZ]{4}-[23456789ABCDEFGHJKMNPQRSTUVWXYZ]{4}$')
+
+
+def check_permutation():
+    small = FeistelPermutation('bench-key', domain=31 ** 3)
+    outputs = {small.permute(n) for n in range(small.domain)}
+    full = FeistelPermutation('bench-key')
+    samples = [0, 1, 2, CODE_SPACE // 2, CODE_SPACE - 1] + list(range(1000, 1100))
+    return {
+        'bijective_on_31^3': len(outputs) == small.domain and max(outputs) < small.domain,
+        'invert_roundtrip': all(full.invert(full.permute(n)) == n for n in samples),
+    }
+
+
+def exam_form(i):
+    return {'exam_data': json.dumps({
+        'exam_name': f'Exam {i}', 'subject': 'S', 'chapter': 'C', 'class_name': 'K',
+        'total_marks': 1, 'total_time_minutes': 10,
+        'questions': [{'question_text': 'Q', 'marks': 1, 'optA_text': 'a', 'optB_text': 'b',
+                       'optC_text': 'c', 'optD_text': 'd', 'correct_answer': 'A'}],
+    })}
+
+
+def auth_headers(user):
+    token = jwt_manager.encode(user.id)
+    # Warm the token cache as the first request would; keeps the users lookup out of the check
+    token_cache.set(token, principal_from_user(user))
+    return {'Authorization': f'Bearer {token}'}
+
+
+def create_exams(app, count, threads):
+    with app.app_context():
+        user = User(id=uuid.uuid4(), name='Bench Examiner', email=f'{uuid.uuid4()}@bench.local')
+        user.password_hash = 'x'
+        db.session.add(user)
+        db.session.commit()
+        headers = auth_headers(user)
+
+    def create(i):
+        response = app.test_client().post('/api/examiner/create-exam', data=exam_form(i), headers=headers)
+        return response.status_code, (response.get_json() or {}).get('exam_code')
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        responses = list(pool.map(create, range(count)))
+    elapsed = time.perf_counter() - start
+
+    codes = [code for status, code in responses if status == 200]
+    with app.app_context():
+        stored = db.session.scalar(db.select(db.func.count()).select_from(ExaminerCreatedExam))
+    return {
+        'requested': count,
+        'created': len(codes),
+        'errors': count - len(codes),
+        'unique_codes': len(set(codes)),
+        'well_formed': all(CODE_RE.match(code) for code in codes),
+        'rows_in_db': stored,
+        'exams_per_sec': round(count / elapsed, 1),
+    }
+
+
+def allocate_across_workers(app, workers, per_worker, threads):
+    allocators = [ExamCodeAllocator(app.config['SECRET_KEY'], block_size=8) for _ in range(workers)]
+
+    def allocate(i):
+        with app.app_context():
+            return allocators[i % workers].allocate()
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        codes = list(pool.map(allocate, range(workers * per_worker)))
+    return {
+        'workers': workers,
+        'allocated': len(codes),
+        'unique_codes': len(set(codes)),
+        'blocks_reserved': sum(allocator.blocks_reserved for allocator in allocators),
+    }
+
+
+def legacy_clash(app):
+    """Pre-insert, as a legacy random code, the code the route is about to allocate."""
+    with app.app_context():
+        user = db.session.scalars(db.select(User).limit(1)).first()
+        next_value = db.session.scalar(db.select(ExamCodeCounter.next_value))
+        clashing = format_exam_code(exam_code_allocator.permutation.permute(next_value))
+        db.session.add(ExaminerCreatedExam(
+            exam_id=uuid.uuid4(), exam_name='Legacy', exam_code=clashing, subject='S', chapter='C',
+            class_name='K', total_marks=1, total_time_minutes=10, user_id=user.id
+        ))
+        db.session.commit()
+        exam_code_allocator._next = exam_code_allocator._end = 0  # route reserves a fresh block
+        headers = auth_headers(user)
+
+    response = app.test_client().post('/api/examiner/create-exam', data=exam_form(0), headers=headers)
+    expected = format_exam_code(exam_code_allocator.permutation.permute(next_value + 1))
+    code = (response.get_json() or {}).get('exam_code')
+    return {'status': response.status_code, 'skipped_clash': code == expected}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--exams', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    # SQLite serializes writers; wait for the lock instead of failing
+    app = make_app(SQLALCHEMY_ENGINE_OPTIONS={'connect_args': {'timeout': 60}})
+
+    results = {
+        'permutation': check_permutation(),
+        'create_exam': create_exams(app, args.exams, args.threads),
+        'multi_worker': allocate_across_workers(app, args.workers, args.exams, args.threads),
+        'legacy_clash': legacy_clash(app),
+    }
+    print(json.dumps({'check': 'exam_code_concurrency', 'results': results}, indent=2))
+
+    create, multi = results['create_exam'], results['multi_worker']
+    ok = (
+        all(results['permutation'].values())
+        and create['errors'] == 0
+        and create['unique_codes'] == create['created'] == create['rows_in_db']
+        and create['well_formed']
+        and multi['unique_codes'] == multi['allocated']
+        and results['legacy_clash'] == {'status': 200, 'skipped_clash': True}
+    )
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+Query-plan regression check for the hot lookups. Seeds the bench database,
+runs EXPLAIN on the statements the routes issue and exits non-zero if any
+of them reads a hot table with a sequential scan.
+
+    python -m benchmarks.check_query_plans [--attempts 2000]
+
+On Postgres, enable_seqscan is switched off for the check so the small
+seeded tables cannot hide a missing index (a seq scan then only shows up
+when no usable index exists). On SQLite, "SCAN <table>" without an index
+is treated the same way.
+"""
+import argparse
+import json
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+from benchmarks.common import make_app
+from sqlalchemy import text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.models import (
+    db, User, ExaminerCreatedExam, ExaminerCreatedExamQuestion,
+    ExamineeAttemptExams, ExamineeAttemptExamQuestions
+)
+from app.utils.leaderboard_utils import _ranked_attempts
+
+HOT_TABLES = (
+    'examinee_attempt_exams',
+    'examinee_attempt_exam_questions',
+    'examiner_created_exams',
+    'examiner_created_exam_questions',
+)
+
+
+class explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(explain, 'postgresql')
+def _explain_postgresql(element, compiler, **kw):
+    return "EXPLAIN " + compiler.process(element.statement, **kw)
+
+
+@compiles(explain, 'sqlite')
+def _explain_sqlite(element, compiler, **kw):
+    return "EXPLAIN QUERY PLAN " + compiler.process(element.statement, **kw)
+
+
+def seed(attempts_count, questions_per_exam=20, exams_count=20, users_count=200):
+    now = datetime.utcnow()
+    users = [{'id': uuid.uuid4(), 'name': f'user{i}', 'email': f'user{i}@bench.local',
+              'password_hash': 'x'} for i in range(users_count)]
+    db.session.execute(db.insert(User), users)
+
+    exams = [{
+        'exam_id': uuid.uuid4(), 'exam_name': f'exam{i}', 'exam_code': f'PLAN{i:04d}',
+        'subject': 'Physics', 'chapter': 'Motion', 'class_name': '10', 'total_marks': questions_per_exam,
+        'total_time_minutes': 30, 'negative_marks_value': 0.25, 'examiner_name': 'bench',
+        'user_id': users[i % users_count]['id'], 'created_at': now - timedelta(minutes=i),
+    } for i in range(exams_count)]
+    db.session.execute(db.insert(ExaminerCreatedExam), exams)
+
+    questions = [{
+        'question_id': uuid.uuid4(), 'exam_id': exam['exam_id'], 'question_text': f'Q{n}',
+        'optA_text': 'a', 'optB_text': 'b', 'optC_text': 'c', 'optD_text': 'd',
+        'correct_answer': 'A', 'marks': 1.0, 'question_order': n, 'created_at': now,
+    } for exam in exams for n in range(questions_per_exam)]
+    db.session.execute(db.insert(ExaminerCreatedExamQuestion), questions)
+
+    rng = random.Random(7)
+    attempts = [{
+        'attempt_exam_id': uuid.uuid4(), 'examinee_id': rng.choice(users)['id'],
+        'exam_id': rng.choice(exams)['exam_id'], 'exam_name': 'exam', 'subject': 'Physics',
+        'class_name': '10', 'chapter': 'Motion', 'total_marks': questions_per_exam,
+        'total_time_minutes': 30, 'score': rng.randint(0, questions_per_exam),
+        'total_questions': questions_per_exam, 'correct_answers': 0, 'wrong_answers': 0,
+        'unanswered_questions': 0, 'time_taken_seconds': rng.randint(60, 1800),
+        'created_at': now - timedelta(seconds=i),
+    } for i in range(attempts_count)]
+    db.session.execute(db.insert(ExamineeAttemptExams), attempts)
+
+    attempt_questions = [{
+        'attempt_question_id': uuid.uuid4(), 'attempt_exam_id': attempt['attempt_exam_id'],
+        'original_question_id': rng.choice(questions)['question_id'], 'question_text': f'Q{n}',
+        'correct_option_label': 'A', 'is_correct': False, 'created_at': now + timedelta(microseconds=n),
+    } for attempt in attempts[:200] for n in range(questions_per_exam)]
+    db.session.execute(db.insert(ExamineeAttemptExamQuestions), attempt_questions)
+    db.session.commit()
+    return users[0]['id'], exams[0]['exam_id'], attempts[0]['attempt_exam_id'], questions[0]['question_id']
+
+
+def hot_queries(user_id, exam_id, attempt_exam_id, question_id):
+    """The statements issued by the leaderboard, history, my-exams, join and review routes."""
+    ranked = _ranked_attempts(exam_id)
+    return {
+        'leaderboard': db.select(ranked).order_by(ranked.c.rank).limit(50),
+        'attempt_history': db.select(ExamineeAttemptExams)
+            .where(ExamineeAttemptExams.examinee_id == user_id)
+            .order_by(ExamineeAttemptExams.created_at.desc()).limit(10),
+        'my_created_exams': db.select(ExaminerCreatedExam)
+            .where(ExaminerCreatedExam.user_id == user_id)
+            .order_by(ExaminerCreatedExam.created_at.desc()).limit(10),
+        'exam_questions': db.select(ExaminerCreatedExamQuestion)
+            .where(ExaminerCreatedExamQuestion.exam_id == exam_id)
+            .order_by(ExaminerCreatedExamQuestion.question_order, ExaminerCreatedExamQuestion.created_at),
+        'attempt_review_questions': db.select(ExamineeAttemptExamQuestions)
+            .where(ExamineeAttemptExamQuestions.attempt_exam_id == attempt_exam_id)
+            .order_by(ExamineeAttemptExamQuestions.created_at),
+        'question_delete_set_null': db.select(ExamineeAttemptExamQuestions.attempt_question_id)
+            .where(ExamineeAttemptExamQuestions.original_question_id == question_id),
+    }
+
+
+def sequential_scans(dialect, plan_lines):
+    scans = []
+    for line in plan_lines:
+        for table in HOT_TABLES:
+            if dialect == 'postgresql' and f'Seq Scan on {table}' in line:
+                scans.append(line.strip())
+            elif dialect == 'sqlite' and line.startswith(f'SCAN {table}') and 'USING' not in line:
+                scans.append(line.strip())
+    return scans
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--attempts', type=int, default=2000)
+    args = parser.parse_args()
+
+    app = make_app()
+    report = {}
+    with app.app_context():
+        ids = seed(args.attempts)
+        dialect = db.engine.dialect.name
+        db.session.execute(text('ANALYZE'))
+        if dialect == 'postgresql':
+            db.session.execute(text('SET enable_seqscan = off'))
+
+        for name, statement in hot_queries(*ids).items():
+            rows = db.session.execute(explain(statement)).all()
+            plan = [row[0] if dialect == 'postgresql' else row[-1] for row in rows]
+            report[name] = {'plan': plan, 'sequential_scans': sequential_scans(dialect, plan)}
+
+    failed = sorted(name for name, result in report.items() if result['sequential_scans'])
+    print(json.dumps({'check': 'query_plans', 'dialect': dialect, 'failed': failed, 'queries': report}, indent=2))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks run against BENCH_DATABASE_URL (default: a throwaway SQLite file)
+so they never touch the production DATABASE_URL.
+"""
+import os
+import statistics
+import tempfile
+import time
+
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL") or (
+    "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="examapp-bench-"), "bench.db")
+)
+# `import app` builds a default app from DATABASE_URL; point it at the bench DB
+os.environ["DATABASE_URL"] = BENCH_DATABASE_URL
+os.environ.setdefault("EXAM_CODE_KEY", "bench-exam-code-key")
+
+from app.app import create_app  # noqa: E402
+from app.config import Config  # noqa: E402
+from app.models import db  # noqa: E402
+
+
+def make_app(database_url=None, reset=True, **overrides):
+    """App on the bench database; reset=False keeps existing tables and rows."""
+    database_url = database_url or BENCH_DATABASE_URL
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database_url
+        DEBUG = False
+
+    for key, value in overrides.items():
+        setattr(BenchConfig, key, value)
+
+    app = create_app(BenchConfig)
+    if reset:
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+    return app
+
+
+def measure(fn, repeat=20, warmup=2):
+    """Run fn() repeatedly and return timing stats in milliseconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        'runs': repeat,
+        'mean_ms': round(statistics.mean(samples), 3),
+        'p50_ms': round(samples[len(samples) // 2], 3),
+        'p99_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 3),
+    }
@@ -0,0 +1,44 @@
+# Gunicorn settings (`gunicorn -c gunicorn.conf.py run:app`); every value can be
+# overridden from the environment.
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# gevent: each worker serves many requests concurrently, switching greenlets while
+# a request waits on Postgres or Cloudinary. "sync" restores one request per process.
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gevent")
+
+_cpus = multiprocessing.cpu_count()
+if worker_class == "sync":
+    _default_workers = _cpus * 2 + 1
+else:
+    # Async workers are not blocked by I/O; one per core uses the CPUs
+    _default_workers = _cpus + 1
+workers = int(os.getenv("WEB_CONCURRENCY", _default_workers))
+
+# Concurrent clients per gevent worker. Each request in flight needs a DB connection:
+# raise DB_POOL_SIZE / DB_MAX_OVERFLOW (or use DB_PGBOUNCER) to match, and watch the
+# db_pool checkout waits in /health.
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 1000))
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+# Recycle workers now and then so slow leaks cannot build up
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 10000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 1000))
+
+# The app must be imported after gevent has monkey-patched the worker
+preload_app = False
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG")  # unset = no access log
+errorlog = "-"
+
+
+def post_worker_init(worker):
+    if worker_class == "gevent":
+        # Cooperative psycopg2: waiting on Postgres yields to other requests
+        from app.utils.gevent_utils import patch_psycopg
+        patch_psycopg()
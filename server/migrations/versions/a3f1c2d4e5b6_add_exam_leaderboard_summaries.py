@@ -0,0 +1,39 @@
+"""add exam leaderboard summaries
+
+Revision ID: a3f1c2d4e5b6
+Revises: 6ce70f010168
+Create Date: 2026-10-18 10:12:41.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3f1c2d4e5b6'
+down_revision = '6ce70f010168'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('exam_leaderboard_summaries',
+    sa.Column('exam_id', sa.UUID(), nullable=False),
+    sa.Column('attempt_count', sa.Integer(), nullable=False),
+    sa.Column('top_score', sa.Float(), nullable=True),
+    sa.Column('last_attempt_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['exam_id'], ['examiner_created_exams.exam_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('exam_id')
+    )
+
+    # Backfill summaries for exams that already have attempts
+    op.execute(
+        "INSERT INTO exam_leaderboard_summaries (exam_id, attempt_count, top_score, last_attempt_at, updated_at) "
+        "SELECT exam_id, COUNT(*), MAX(score), MAX(created_at), CURRENT_TIMESTAMP "
+        "FROM examinee_attempt_exams GROUP BY exam_id"
+    )
+
+
+def downgrade():
+    op.drop_table('exam_leaderboard_summaries')
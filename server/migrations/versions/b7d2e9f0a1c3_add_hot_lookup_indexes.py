@@ -0,0 +1,46 @@
+"""add hot lookup indexes
+
+Revision ID: b7d2e9f0a1c3
+Revises: a3f1c2d4e5b6
+Create Date: 2026-10-18 14:05:22.731904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2e9f0a1c3'
+down_revision = 'a3f1c2d4e5b6'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = (
+    ('ix_examinee_attempt_exams_leaderboard', 'examinee_attempt_exams',
+     ['exam_id', sa.text('score DESC'), 'time_taken_seconds', 'created_at', 'attempt_exam_id']),
+    ('ix_examinee_attempt_exams_examinee_created', 'examinee_attempt_exams',
+     ['examinee_id', sa.text('created_at DESC')]),
+    ('ix_examinee_attempt_exam_questions_attempt_created', 'examinee_attempt_exam_questions',
+     ['attempt_exam_id', 'created_at']),
+    ('ix_examinee_attempt_exam_questions_original_question', 'examinee_attempt_exam_questions',
+     ['original_question_id']),
+    ('ix_examiner_created_exams_user_created', 'examiner_created_exams',
+     ['user_id', sa.text('created_at DESC')]),
+    ('ix_examiner_created_exam_questions_exam_order', 'examiner_created_exam_questions',
+     ['exam_id', 'question_order', 'created_at']),
+)
+
+
+def upgrade():
+    # CONCURRENTLY so live tables are not write-locked while the indexes build
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False,
+                            postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,64 @@
+"""add media deletion queue
+
+Revision ID: c4e8a1b2d3f5
+Revises: b7d2e9f0a1c3
+Create Date: 2026-10-18 17:31:08.114720
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8a1b2d3f5'
+down_revision = 'b7d2e9f0a1c3'
+branch_labels = None
+depends_on = None
+
+
+IMAGE_ID_INDEXES = (
+    ('examiner_created_exam_questions', 'question_image_id', 'question_image_id'),
+    ('examiner_created_exam_questions', 'optA_image_id', 'opta_image_id'),
+    ('examiner_created_exam_questions', 'optB_image_id', 'optb_image_id'),
+    ('examiner_created_exam_questions', 'optC_image_id', 'optc_image_id'),
+    ('examiner_created_exam_questions', 'optD_image_id', 'optd_image_id'),
+    ('examinee_attempt_exam_questions', 'question_image_id', 'question_image_id'),
+    ('examinee_attempt_exam_questions', 'option_a_image_id', 'option_a_image_id'),
+    ('examinee_attempt_exam_questions', 'option_b_image_id', 'option_b_image_id'),
+    ('examinee_attempt_exam_questions', 'option_c_image_id', 'option_c_image_id'),
+    ('examinee_attempt_exam_questions', 'option_d_image_id', 'option_d_image_id'),
+)
+
+
+def upgrade():
+    op.create_table('media_deletion_queue',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('public_id', sa.String(length=255), nullable=False),
+    sa.Column('reason', sa.String(length=50), nullable=False),
+    sa.Column('enqueued_at', sa.DateTime(), nullable=False),
+    sa.Column('not_before', sa.DateTime(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_media_deletion_queue_public_id', 'media_deletion_queue', ['public_id'], unique=False)
+    op.create_index('ix_media_deletion_queue_not_before', 'media_deletion_queue', ['not_before'], unique=False)
+
+    # Partial indexes: only rows that actually reference an image are indexed
+    with op.get_context().autocommit_block():
+        for table, column, suffix in IMAGE_ID_INDEXES:
+            where = sa.text(f'"{column}" IS NOT NULL')
+            op.create_index(f'ix_{table}_{suffix}', table, [column], unique=False,
+                            postgresql_where=where, sqlite_where=where,
+                            postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for table, _, suffix in reversed(IMAGE_ID_INDEXES):
+            op.drop_index(f'ix_{table}_{suffix}', table_name=table,
+                          postgresql_concurrently=True, if_exists=True)
+
+    op.drop_index('ix_media_deletion_queue_not_before', table_name='media_deletion_queue')
+    op.drop_index('ix_media_deletion_queue_public_id', table_name='media_deletion_queue')
+    op.drop_table('media_deletion_queue')
@@ -0,0 +1,29 @@
+"""add exam code counters
+
+Revision ID: d9a3b5c7e1f2
+Revises: c4e8a1b2d3f5
+Create Date: 2026-10-18 18:12:44.503261
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9a3b5c7e1f2'
+down_revision = 'c4e8a1b2d3f5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    allocator = op.create_table('exam_code_counters',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('next_value', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(allocator, [{'name': 'exam_code', 'next_value': 0}])
+
+
+def downgrade():
+    op.drop_table('exam_code_counters')
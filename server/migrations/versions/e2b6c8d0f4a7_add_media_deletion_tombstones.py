@@ -0,0 +1,26 @@
+"""add media deletion tombstones
+
+Revision ID: e2b6c8d0f4a7
+Revises: d9a3b5c7e1f2
+Create Date: 2026-10-18 21:04:37.228915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b6c8d0f4a7'
+down_revision = 'd9a3b5c7e1f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('media_deletion_queue', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('deleted_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('media_deletion_queue', schema=None) as batch_op:
+        batch_op.drop_column('deleted_at')